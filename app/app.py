@@ -6,25 +6,121 @@ Routes:
   /players    - list players (from stats/playerStats.json)
   /player/<key> - player detail by `nameKey` or numeric id
   /teams      - list teams (from stats/teamsStats.json)
+  /img/<name>  - cached image or resized variant (content-addressed, immutable)
   /headshots/<path:filename> - serve or redirect to headshot image
+  /api/history/...  - multi-season data from stats/history.sqlite3 (careers,
+                      standings on a date, season leaders, rolling windows)
+  /live, /live/events - live game state and its Server-Sent Events stream
+  /api/status/scheduler - job status written by collector/scheduler.py
+  /metrics    - per-route latency histograms (Prometheus text format)
 
 This app reads local JSON files produced by the collector (stats/playerStats.json
-and stats/teamsStats.json). It intentionally avoids any external API calls.
+and stats/teamsStats.json). It intentionally avoids any external API calls;
+the only outbound requests copy images from the NHL CDN into the local image
+cache, once per image.
+The files are kept in memory by `stats.datastore.DataStore` and only re-parsed
+when they change on disk.
 """
 from __future__ import annotations
 
+import base64
 import json
 import os
 import sys
+import time
+from datetime import date
 from typing import Any
 
-REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if REPO_ROOT not in sys.path:
-    sys.path.insert(0, REPO_ROOT)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(APP_DIR, ".."))
+for _path in (REPO_ROOT, APP_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
 
-STATS_DIR = os.path.join(REPO_ROOT, "stats")
+STATS_DIR = os.environ.get("OKEY_STATS_DIR") or os.path.join(REPO_ROOT, "stats")
 PLAYER_FILE = os.path.join(STATS_DIR, "playerStats.json")
 TEAM_FILE = os.path.join(STATS_DIR, "teamsStats.json")
+LIVE_FILE = os.path.join(STATS_DIR, "live.json")
+SCHEDULER_FILE = os.path.join(STATS_DIR, "scheduler.json")
+HEADSHOTS_DIR = os.path.join(REPO_ROOT, "headshots")  # written by collector/headshot.py
+
+from stats import history
+from stats import gamelog
+from stats.analyst import career_trajectory, hottest_from_history, season_engine
+from stats.bracket import cached_bracket
+from stats.datastore import DataStore
+from stats.index import PlayerIndex
+from stats.live import events_after
+from images import IMMUTABLE, ImageStore, canonical
+from metrics import Metrics, SamplingProfiler, phase
+from webcache import CachedBody, LRUCache, coded_etag, etag_for, if_none_match, matching_etag
+
+# parsed once and kept in memory; reloaded when the collector rewrites the files.
+# The player list is wrapped in a PlayerIndex for O(1) lookups and fast search.
+PLAYERS = DataStore(PLAYER_FILE, build=PlayerIndex, default=[])
+TEAMS = DataStore(TEAM_FILE, default=[])
+
+# written by `collector.py --live` during games; checked for changes often
+LIVE_POLL = float(os.environ.get("OKEY_LIVE_POLL", "1"))
+LIVE_HEARTBEAT = 15
+LIVE = DataStore(LIVE_FILE, default={}, check_interval=LIVE_POLL / 2)
+SCHEDULER = DataStore(SCHEDULER_FILE, default=None)
+
+# pre-encoded JSON responses, keyed by route + query + dataset version
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("OKEY_RESPONSE_CACHE_ENTRIES", "2048"))
+RESPONSE_CACHE_BYTES = int(os.environ.get("OKEY_RESPONSE_CACHE_MB", "32")) * 1024 * 1024
+JSON_MAX_AGE = int(os.environ.get("OKEY_JSON_MAX_AGE", "60"))
+
+# rendered HTML pages, same keying; pages are revalidated by ETag on every view
+PAGE_CACHE_ENTRIES = int(os.environ.get("OKEY_PAGE_CACHE_ENTRIES", "4096"))
+PAGE_CACHE_BYTES = int(os.environ.get("OKEY_PAGE_CACHE_MB", "64")) * 1024 * 1024
+
+# local copies of headshots/logos and their resized variants (see images.py)
+IMAGE_CACHE_DIR = os.environ.get("OKEY_IMAGE_CACHE") or os.path.join(STATS_DIR, ".imagecache")
+IMAGE_CACHE_BYTES = int(os.environ.get("OKEY_IMAGE_CACHE_MB", "256")) * 1024 * 1024
+IMAGE_BLOB_BYTES = int(os.environ.get("OKEY_IMAGE_BLOBS_MB", "256")) * 1024 * 1024
+IMAGE_HOSTS = tuple(h.strip() for h in os.environ.get("OKEY_IMAGE_HOSTS", "assets.nhle.com").split(",") if h.strip())
+
+# request metrics on /metrics (OKEY_METRICS=0 disables); the sampling profiler
+# is off unless OKEY_PROFILE_SLOW_MS is set (see metrics.py)
+METRICS_ENABLED = os.environ.get("OKEY_METRICS", "1") != "0"
+PROFILE_SLOW_MS = float(os.environ.get("OKEY_PROFILE_SLOW_MS") or 0)
+PROFILE_INTERVAL_MS = float(os.environ.get("OKEY_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("OKEY_PROFILE_DIR") or os.path.join(STATS_DIR, "profiles")
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+SEARCH_LIMIT = 12  # /_search_players results
+
+
+def encode_cursor(after: Any) -> str:
+    """Opaque /api/players cursor for an `(id, value)` keyset position."""
+    raw = json.dumps(list(after), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Inverse of `encode_cursor`; raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id, value = json.loads(raw)
+        return (last_id, float(value))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def search_results(index: PlayerIndex, q: str) -> list:
+    """Autocomplete matches for `q`, as served by /_search_players."""
+    return [
+        {
+            "name": p.get("name"),
+            "id": p.get("id"),
+            "nameKey": p.get("nameKey"),
+            "headshot": p.get("headshot"),
+            "team": p.get("team"),
+        }
+        for p in index.search(q, limit=SEARCH_LIMIT)
+    ]
 
 
 def load_json(path: str) -> Any:
@@ -37,242 +133,553 @@ def load_json(path: str) -> Any:
 
 def create_app():
     try:
-        from flask import Flask, render_template, abort, redirect, request, send_from_directory, jsonify
+        from flask import Flask, Response, render_template, abort, redirect, request, send_from_directory, jsonify, stream_with_context
     except Exception:
         raise
 
     app = Flask(__name__)
+    response_cache = LRUCache(max_entries=RESPONSE_CACHE_ENTRIES, max_bytes=RESPONSE_CACHE_BYTES)
+    app.extensions["okey_response_cache"] = response_cache
+
+    page_cache = LRUCache(max_entries=PAGE_CACHE_ENTRIES, max_bytes=PAGE_CACHE_BYTES)
+    app.extensions["okey_page_cache"] = page_cache
+
+    metrics = Metrics()
+    app.extensions["okey_metrics"] = metrics
+    profiler = None
+    if PROFILE_SLOW_MS > 0:
+        profiler = SamplingProfiler(PROFILE_DIR, PROFILE_SLOW_MS / 1000, interval=PROFILE_INTERVAL_MS / 1000)
+    app.extensions["okey_profiler"] = profiler
+
+    @app.before_request
+    def start_timing():
+        metrics.begin()
+        if profiler is not None:
+            profiler.start()
+
+    @app.after_request
+    def record_timing(response):
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        metrics.end(route, request.method, response.status_code)
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        if profiler is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            # failed requests are always dumped
+            path = profiler.stop(route, failed=exc is not None)
+            if path:
+                app.logger.info("slow request %s profiled to %s", request.path, path)
+
+    def snapshot(store):
+        """`store.snapshot()`, timed as the request's load phase."""
+        with phase("load"):
+            return store.snapshot()
+
+    images = ImageStore(IMAGE_CACHE_DIR, HEADSHOTS_DIR, max_variant_bytes=IMAGE_CACHE_BYTES, allowed_hosts=IMAGE_HOSTS,
+                        max_blob_bytes=IMAGE_BLOB_BYTES)
+    app.extensions["okey_images"] = images
+    referenced = {"version": None, "urls": frozenset()}
+
+    def referenced_images():
+        """Image URLs the stats files can put on a page; /img/fetch takes no others."""
+        players, teams = PLAYERS.snapshot(), TEAMS.snapshot()
+        version = (players.version, teams.version)
+        if referenced["version"] != version:
+            urls = set()
+            for record in list(players.data.players) + list(teams.data or []):
+                if isinstance(record, dict):
+                    for field in ("headshot", "heroImage", "teamLogo"):
+                        if isinstance(record.get(field), str):
+                            urls.add(canonical(record[field]))
+            referenced.update(version=version, urls=frozenset(urls))
+        return referenced["urls"]
+    app.jinja_env.globals.update(image_src=images.src, headshot_src=images.headshot_src)
+
+    def cached_response(cache, version, build, mimetype, cache_control):
+        """Serve the bytes returned by `build()`, built once per request key.
+
+        The key is the path, the sorted query args and `version`. Clients
+        sending the current ETag (in any content-coding) get a 304 without
+        `build` running.
+        """
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+        etag = etag_for(key)
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        matched = matching_etag(request.headers.get("If-None-Match"), etag)
+        if matched:
+            headers["ETag"] = matched
+            return Response(status=304, headers=headers)
+        entry = cache.get_or_build(key, lambda: CachedBody(build(), mimetype, etag))
+        body, encoding = entry.encoded(request.headers.get("Accept-Encoding", ""))
+        headers["ETag"] = coded_etag(etag, encoding)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, mimetype=entry.mimetype, headers=headers)
+
+    def cached_json(version, build):
+        """Serve `build()` as JSON, encoded once per query and dataset version."""
+        def encode():
+            with phase("compute"):
+                data = build()
+            with phase("render"):
+                return app.json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+        return cached_response(
+            response_cache,
+            version,
+            encode,
+            "application/json",
+            f"public, max-age={JSON_MAX_AGE}",
+        )
+
+    def cached_page(template, version, context):
+        """Render `template` once per query and dataset version.
+
+        `context` is a callable returning the template variables, so a cache
+        hit does no data work at all. Image URLs are resolved at render time,
+        so the image store's version is part of the key. In debug mode the
+        template's mtime is too, so edits show up immediately.
+        """
+        if app.debug:
+            try:
+                version = (version, os.stat(os.path.join(app.root_path, app.template_folder, template)).st_mtime_ns)
+            except OSError:
+                pass
+        def render():
+            with phase("compute"):
+                variables = context()
+            with phase("render"):
+                return render_template(template, **variables).encode("utf-8")
+
+        return cached_response(
+            page_cache,
+            (template, version, images.version()),
+            render,
+            "text/html",
+            "no-cache",
+        )
 
     @app.route("/")
     def index():
-        # load top featured players to show on the index page
-        players = load_json(PLAYER_FILE) or []
-        try:
-            featured = sorted([p for p in players if isinstance(p, dict)], key=lambda x: x.get("points") or 0, reverse=True)[:8]
-        except Exception:
-            featured = players[:8]
+        snap = snapshot(PLAYERS)
 
-        # compute 'hot' players from recent games when possible
-        try:
-            from stats import analyst
+        def context():
+            # load top featured players to show on the index page
+            index = snap.data
+            featured = index.by_points[:8]
 
-            hot_players = analyst.hottest_players(players, top_n=3, last_n=5)
-        except Exception:
-            hot_players = []
+            # compute 'hot' players from recent games when possible; the columnar
+            # engine memoizes this until the dataset reloads
+            try:
+                hot_players = index.analytics.hottest(top_n=3, last_n=5)
+            except Exception:
+                hot_players = []
+            images.warm(list(featured) + [h["player"] for h in hot_players if isinstance(h, dict) and h.get("player")])
+            return {"featured": featured, "hot_players": hot_players}
 
-        return render_template("index.html", featured=featured, hot_players=hot_players)
+        return cached_page("index.html", snap.version, context)
 
     @app.route("/players")
     def players():
-        players = load_json(PLAYER_FILE) or []
-        # allow simple query param filtering
-        q = (request.args.get("q") or "").strip().lower()
-        if q:
-            filtered = []
-            for p in players:
-                if not isinstance(p, dict):
-                    continue
-                name = (p.get("name") or "").lower()
-                nid = str(p.get("id", ""))
-                key = (p.get("nameKey") or "").lower()
-                if q in name or q == nid or q in key:
-                    filtered.append(p)
-            players = filtered
-        # sort by points desc if present
-        try:
-            players = sorted(players, key=lambda x: x.get("points") or 0, reverse=True)
-        except Exception:
-            pass
-        return render_template("players.html", players=players)
+        snap = snapshot(PLAYERS)
+
+        def context():
+            index = snap.data
+            # allow simple query param filtering; results are sorted by points desc
+            q = (request.args.get("q") or "").strip()
+            if q:
+                players = index.search(q, by_points=True)
+            else:
+                players = index.by_points
+            return {"players": players}
+
+        return cached_page("players.html", snap.version, context)
 
     @app.route("/_search_players")
     def search_players():
         # simple JSON endpoint for autocomplete on the players page
-        players = load_json(PLAYER_FILE) or []
-        q = (request.args.get("q") or "").strip().lower()
+        q = (request.args.get("q") or "").strip()
         if not q:
             return jsonify([])
-        matches = []
-        for p in players:
-            if not isinstance(p, dict):
+        snap = snapshot(PLAYERS)
+
+        return cached_json(snap.version, lambda: search_results(snap.data, q))
+
+    @app.route("/api/players")
+    def api_players():
+        """Paginated, sortable player list.
+
+        Query parameters: `sort` (any numeric stat, default points), `order`
+        (desc|asc), `team`, `position` (C, L, R, D, G or F), `min_<stat>` /
+        `max_<stat>` bounds, `limit` (max 200) and `cursor` (the `next` value
+        of the previous page). Players without the sort stat are left out.
+        """
+        snap = snapshot(PLAYERS)
+        engine = snap.data.analytics
+        stats = set(engine.numeric_stats)
+        args = request.args
+
+        sort = args.get("sort") or "points"
+        order = (args.get("order") or "desc").lower()
+        if sort not in stats:
+            return jsonify({"error": f"unknown sort stat {sort!r}"}), 400
+        if order not in ("asc", "desc"):
+            return jsonify({"error": "order must be asc or desc"}), 400
+        try:
+            limit = min(max(int(args.get("limit") or API_PAGE_SIZE), 1), API_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        try:
+            after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+        bounds = {}
+        for name, value in args.items():
+            prefix, _, stat = name.partition("_")
+            if prefix not in ("min", "max") or not stat:
                 continue
-            name = (p.get("name") or "").lower()
-            nid = str(p.get("id", ""))
-            key = (p.get("nameKey") or "").lower()
-            if q in name or q == nid or q in key:
-                matches.append({
-                    "name": p.get("name"),
-                    "id": p.get("id"),
-                    "nameKey": p.get("nameKey"),
-                    "headshot": p.get("headshot"),
-                    "team": p.get("team"),
-                })
-            if len(matches) >= 12:
-                break
-        return jsonify(matches)
+            if stat not in stats:
+                return jsonify({"error": f"unknown stat {stat!r}"}), 400
+            try:
+                bound = float(value)
+            except ValueError:
+                return jsonify({"error": f"{name} must be a number"}), 400
+            lo, hi = bounds.get(stat, (None, None))
+            bounds[stat] = (bound, hi) if prefix == "min" else (lo, bound)
+        ranges = tuple((stat, lo, hi) for stat, (lo, hi) in sorted(bounds.items()))
+
+        def build():
+            players, total, next_after = engine.page(
+                sort,
+                limit=limit,
+                after=after,
+                descending=order == "desc",
+                team=args.get("team") or None,
+                position=args.get("position") or None,
+                ranges=ranges,
+            )
+            return {
+                "items": players,
+                "total": total,
+                "next": encode_cursor(next_after) if next_after else None,
+            }
+
+        return cached_json(snap.version, build)
 
     @app.route("/player/<key>")
     def player_detail(key: str):
-        players = load_json(PLAYER_FILE) or []
-        found = None
-        for p in players:
-            if not isinstance(p, dict):
-                continue
-            if str(p.get("id")) == key or (p.get("nameKey") or "") == key:
-                found = p
-                break
+        snap = snapshot(PLAYERS)
+        found = snap.data.get(key)
         if not found:
             abort(404)
-        return render_template("player_detail.html", p=found)
+        return cached_page("player_detail.html", snap.version, lambda: {"p": found})
 
     @app.route("/teams")
     def teams():
-        teams = load_json(TEAM_FILE) or []
-        # group teams by division and sort by divisionSequence (position)
-        try:
-            from collections import defaultdict
-            divs = defaultdict(list)
-            for t in teams:
-                div = t.get('division') or t.get('divisionAbbrev') or t.get('conference') or 'Unknown'
-                divs[div].append(t)
-            # sort each division by divisionSequence if present, fallback to points desc
-            for k in divs:
-                divs[k].sort(key=lambda x: x.get('divisionSequence') or -int(x.get('points', 0)), reverse=False)
-            # create an ordered list of (division_name, teams_list)
-            divisions = [(k, divs[k]) for k in sorted(divs.keys())]
-        except Exception:
-            divisions = [(None, teams)]
-
-        return render_template("teams.html", divisions=divisions)
+        snap = snapshot(TEAMS)
+
+        def context():
+            teams = snap.data or []
+            # group teams by division and sort by divisionSequence (position)
+            try:
+                from collections import defaultdict
+                divs = defaultdict(list)
+                for t in teams:
+                    div = t.get('division') or t.get('divisionAbbrev') or t.get('conference') or 'Unknown'
+                    divs[div].append(t)
+                # sort each division by divisionSequence if present, fallback to points desc
+                for k in divs:
+                    divs[k].sort(key=lambda x: x.get('divisionSequence') or -int(x.get('points', 0)), reverse=False)
+                # create an ordered list of (division_name, teams_list)
+                divisions = [(k, divs[k]) for k in sorted(divs.keys())]
+            except Exception:
+                divisions = [(None, teams)]
+            return {"divisions": divisions}
+
+        return cached_page("teams.html", snap.version, context)
 
     @app.route("/_teams")
     def teams_json():
-        teams = load_json(TEAM_FILE) or []
-        return jsonify(teams)
+        snap = snapshot(TEAMS)
+        return cached_json(snap.version, lambda: snap.data or [])
 
     @app.route("/bracket")
     def bracket():
-        """Compute a simple playoff bracket if the playoffs started now.
+        """Show the playoff bracket if the playoffs started now.
 
-        Approach: pick top 8 teams by `points` in each conference and seed 1..8
-        then pair: 1 vs 8, 2 vs 7, 3 vs 6, 4 vs 5. This is a straightforward
-        conference-based bracket (not the full NHL divisional wildcard pairing
-        complexity) but answers "if playoffs started now" clearly.
+        The NHL divisional/wild-card bracket and its projected later rounds
+        are computed by `stats.bracket` once per teamsStats.json version.
         """
-        teams = load_json(TEAM_FILE) or []
-        by_conf = {}
-        for t in teams:
-            conf = t.get("conferenceAbbrev") or t.get("conference") or "Unknown"
-            by_conf.setdefault(conf, []).append(t)
-
-        bracket = {}
-        for conf, lst in by_conf.items():
-            # group teams by division inside the conference
-            divs = {}
-            for t in lst:
-                div = t.get("divisionAbbrev") or t.get("division") or "Unknown"
-                divs.setdefault(div, []).append(t)
-
-            # sort each division by divisionSequence (1 is top) or by points
-            for k in divs:
-                try:
-                    divs[k] = sorted(divs[k], key=lambda x: x.get("divisionSequence") or 999)
-                except Exception:
-                    divs[k] = sorted(divs[k], key=lambda x: x.get("points", 0), reverse=True)
-
-            # If we have exactly two divisions for the conference, build NHL-style bracket
-            if len(divs) == 2:
-                # collect automatic qualifiers: top 3 from each division (if available)
-                auto = []
-                for k in divs:
-                    auto.extend(divs[k][:3])
-
-                # wild-card teams: the next two highest-point teams in the conference not already auto-qualified
-                remaining = [t for t in lst if t not in auto]
-                try:
-                    remaining = sorted(remaining, key=lambda x: x.get("points", 0), reverse=True)
-                except Exception:
-                    pass
-                wildcards = remaining[:2]
-
-                # identify division winners and their divisions
-                div_items = list(divs.items())
-                # ensure stable order
-                div1_name, div1_list = div_items[0]
-                div2_name, div2_list = div_items[1]
-                div1_winner = div1_list[0] if div1_list else None
-                div2_winner = div2_list[0] if div2_list else None
-
-                # sort division winners by points to find the top division winner
-                winners = [w for w in (div1_winner, div2_winner) if w]
-                try:
-                    winners = sorted(winners, key=lambda x: x.get("points", 0), reverse=True)
-                except Exception:
-                    pass
-
-                top_div_winner = winners[0] if winners else None
-                other_div_winner = winners[1] if len(winners) > 1 else None
-
-                # determine higher/lower wildcards by points
-                try:
-                    wild_sorted = sorted(wildcards, key=lambda x: x.get("points", 0), reverse=True)
-                except Exception:
-                    wild_sorted = wildcards
-                higher_wild = wild_sorted[0] if len(wild_sorted) > 0 else None
-                lower_wild = wild_sorted[1] if len(wild_sorted) > 1 else (wild_sorted[0] if wild_sorted else None)
-
-                # Build structured first-round slots so we can place them visually
-                # upper: top division winner vs lower wild, and that division's 2v3
-                # lower: other division winner vs higher wild, and that division's 2v3
-                # determine which div list corresponds to the top_div_winner
-                if top_div_winner and top_div_winner is div1_winner:
-                    top_div_list = div1_list
-                    other_div_list = div2_list
-                else:
-                    top_div_list = div2_list
-                    other_div_list = div1_list
-
-                upper = []
-                # top division winner vs lower wild
-                upper.append((1, top_div_list[0] if top_div_list else None, None, lower_wild))
-                # top division 2 vs 3
-                upper.append((2, top_div_list[1] if len(top_div_list) > 1 else None, 3, top_div_list[2] if len(top_div_list) > 2 else None))
-
-                lower = []
-                # other division winner vs higher wild
-                lower.append((1, other_div_list[0] if other_div_list else None, None, higher_wild))
-                # other division 2 vs 3
-                lower.append((2, other_div_list[1] if len(other_div_list) > 1 else None, 3, other_div_list[2] if len(other_div_list) > 2 else None))
-
-                bracket[conf] = {"upper": upper, "lower": lower}
-            else:
-                # fallback: simple top-8 seeding by points (1v8,2v7,...)
-                try:
-                    sorted_lst = sorted(lst, key=lambda x: x.get("points", 0), reverse=True)
-                except Exception:
-                    sorted_lst = lst
-                seeds = sorted_lst[:8]
-                matchups = []
-                for i in range(4):
-                    a = seeds[i] if len(seeds) > i else None
-                    b = seeds[7 - i] if len(seeds) > 7 - i else None
-                    matchups.append((i + 1, a, 8 - i, b))
-                bracket[conf] = matchups
-
-        return render_template("bracket.html", bracket=bracket)
+        snap = snapshot(TEAMS)
+
+        def context():
+            result = cached_bracket(snap.data or [])
+            return {"bracket": result["conferences"], "final": result["final"]}
+
+        return cached_page("bracket.html", snap.version, context)
+
+    def history_json(build):
+        """Serve `build(conn)` from the history store, cached per database version."""
+        version = history.version()
+
+        def run():
+            conn = history.connect(readonly=True)
+            if conn is None:
+                return build(None)
+            try:
+                return build(conn)
+            finally:
+                conn.close()
+
+        return cached_json(("history", version), run)
+
+    @app.route("/api/history/seasons")
+    def history_seasons():
+        return history_json(lambda conn: {
+            "seasons": history.seasons(conn) if conn else [],
+            "standingsDates": history.snapshot_dates(conn) if conn else [],
+        })
+
+    @app.route("/api/history/player/<key>")
+    def history_player(key: str):
+        """Career trajectory of a player across every stored season."""
+        found = PLAYERS.data().get(key)
+        if found is not None:
+            key = str(found.get("id"))
+        return history_json(lambda conn: {
+            "key": key,
+            "seasons": career_trajectory(conn, key) if conn else [],
+        })
+
+    @app.route("/api/history/standings")
+    def history_standings():
+        """Standings as they were on ?date=YYYY-MM-DD (default: latest stored)."""
+        day = request.args.get("date")
+        if day:
+            try:
+                day = date.fromisoformat(day).isoformat()
+            except ValueError:
+                return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+        def build(conn):
+            if conn is None:
+                return {"date": None, "teams": []}
+            return {"date": history.snapshot_on(conn, day), "teams": history.standings_on(conn, day)}
+
+        return history_json(build)
+
+    @app.route("/api/history/team/<abbr>")
+    def history_team(abbr: str):
+        season = request.args.get("season")
+        return history_json(lambda conn: {
+            "team": abbr.upper(),
+            "snapshots": history.team_history(conn, abbr, season_id=season) if conn else [],
+        })
+
+    @app.route("/api/history/rolling")
+    def history_rolling():
+        """Leaders over each player's last N games (?window=, stat=, limit=, season=)."""
+        try:
+            window = int(request.args.get("window", 10))
+            limit = min(max(1, int(request.args.get("limit", 10))), API_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "window and limit must be integers"}), 400
+        stat = request.args.get("stat", "points")
+        if stat not in gamelog.SORTABLE:
+            return jsonify({"error": f"stat must be one of {', '.join(gamelog.SORTABLE)}"}), 400
+        if window != gamelog.SEASON and window not in gamelog.ROLLING_WINDOWS:
+            windows = ", ".join(str(n) for n in (gamelog.SEASON,) + gamelog.ROLLING_WINDOWS)
+            return jsonify({"error": f"window must be one of {windows}"}), 400
+        season = request.args.get("season")
+        if season is not None and not season.isdigit():
+            return jsonify({"error": "season must be a season id such as 20252026"}), 400
+
+        def build(conn):
+            if conn is None:
+                return {"season": None, "window": window, "items": []}
+            season_id = season or next(iter(history.seasons(conn)), None)
+            items = gamelog.leaders(conn, season_id, last_n=window, stat=stat, limit=limit) if season_id else []
+            return {"season": season_id, "window": window, "items": items}
+
+        return history_json(build)
+
+    @app.route("/api/history/leaders")
+    def history_leaders():
+        """Top players of a stored season by a season stat (?season=, stat=, limit=, team=, position=)."""
+        season = request.args.get("season")
+        if season is None or not season.isdigit():
+            return jsonify({"error": "season must be a season id such as 20232024"}), 400
+        stat = request.args.get("stat", "points")
+        position = (request.args.get("position") or "").upper() or None
+        if position is not None and position not in ("C", "L", "R", "D", "G", "F"):
+            return jsonify({"error": "position must be one of C, L, R, D, G, F"}), 400
+        try:
+            limit = min(max(1, int(request.args.get("limit", 10))), API_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        team = (request.args.get("team") or "").upper() or None
+
+        def build(conn):
+            if conn is None:
+                return {"season": int(season), "stat": stat, "items": []}
+            engine = season_engine(conn, season)
+            if stat not in engine.numeric_stats:
+                return {"season": int(season), "stat": stat, "items": []}
+            top = engine.top(stat, k=limit, team=team, position=position)
+            return {"season": int(season), "stat": stat, "items": [{"player": p, "value": v} for p, v in top]}
+
+        return history_json(build)
+
+    @app.route("/api/history/hottest")
+    def history_hottest():
+        """Most points over each player's last ?window= games of a season (?season=, top=)."""
+        try:
+            window = int(request.args.get("window", 10))
+            top_n = min(max(1, int(request.args.get("top", 3))), API_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "window and top must be integers"}), 400
+        if window not in gamelog.ROLLING_WINDOWS:
+            return jsonify({"error": f"window must be one of {', '.join(map(str, gamelog.ROLLING_WINDOWS))}"}), 400
+        season = request.args.get("season")
+        if season is not None and not season.isdigit():
+            return jsonify({"error": "season must be a season id such as 20252026"}), 400
+
+        def build(conn):
+            if conn is None:
+                return {"season": None, "window": window, "items": []}
+            season_id = season or next(iter(history.seasons(conn)), None)
+            items = hottest_from_history(conn, season_id, top_n=top_n, last_n=window) if season_id else []
+            return {"season": season_id, "window": window, "items": items}
+
+        return history_json(build)
+
+    @app.route("/live")
+    def live_state():
+        """Current state of today's live games, as published by the collector."""
+        snap = snapshot(LIVE)
+        return cached_json(snap.version, lambda: {"seq": (snap.data or {}).get("seq", 0), "games": (snap.data or {}).get("games", {})})
+
+    @app.route("/live/events")
+    def live_events():
+        """Server-Sent Events stream of live game deltas.
+
+        A new client (or one whose Last-Event-ID is no longer in the log) first
+        gets a `snapshot` event with every game, then one `delta` event per
+        change. Comment lines keep idle connections open through proxies.
+        """
+        try:
+            last = int(request.headers.get("Last-Event-ID") or request.args.get("since") or -1)
+        except ValueError:
+            last = -1
+
+        def sse(event, data, seq):
+            return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+        def stream():
+            nonlocal last
+            quiet_since = time.monotonic()
+            yield f"retry: {int(LIVE_POLL * 2000)}\n\n"
+            while True:
+                data = LIVE.data() or {}
+                seq = int(data.get("seq") or 0)
+                events = events_after(data, last) if last >= 0 else None
+                if events is None:
+                    yield sse("snapshot", {"seq": seq, "games": data.get("games", {})}, seq)
+                    last = seq
+                    quiet_since = time.monotonic()
+                elif events:
+                    for event in events:
+                        yield sse("delta", event, event["seq"])
+                    last = events[-1]["seq"]
+                    quiet_since = time.monotonic()
+                elif time.monotonic() - quiet_since >= LIVE_HEARTBEAT:
+                    yield ": ping\n\n"
+                    quiet_since = time.monotonic()
+                time.sleep(LIVE_POLL)
+
+        return Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.route("/api/status/scheduler")
+    def scheduler_status():
+        """Queue depth and per-job last success of the collector scheduler."""
+        snap = snapshot(SCHEDULER)
+        if snap.data is None:
+            return jsonify({"error": "scheduler has not run"}), 404
+        return Response(
+            app.json.dumps(snap.data, separators=(",", ":")),
+            mimetype="application/json",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    caches = {"response": response_cache, "page": page_cache}
+    metrics.gauge("okey_cache_entries", "Entries held by each in-memory response cache.",
+                  lambda: {name: len(c) for name, c in caches.items()})
+    metrics.gauge("okey_cache_bytes", "Bytes held by each in-memory response cache.",
+                  lambda: {name: c.bytes for name, c in caches.items()})
+    metrics.gauge("okey_cache_hits_total", "Response cache hits.",
+                  lambda: {name: c.hits for name, c in caches.items()}, kind="counter")
+    metrics.gauge("okey_cache_misses_total", "Response cache misses.",
+                  lambda: {name: c.misses for name, c in caches.items()}, kind="counter")
+    metrics.gauge("okey_image_variant_bytes", "Bytes of resized images in the on-disk variant cache.",
+                  lambda: images.variant_bytes)
+    metrics.gauge("okey_image_blob_bytes", "Bytes of fetched original images in the on-disk cache.",
+                  lambda: images.blob_bytes)
+    metrics.gauge("okey_players", "Players in the loaded dataset.", lambda: len(PLAYERS.snapshot().data))
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Request latency histograms and cache gauges, Prometheus text format."""
+        if not METRICS_ENABLED:
+            abort(404)
+        return Response(
+            metrics.render(),
+            mimetype="text/plain",
+            headers={"Cache-Control": "no-store", "Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    @app.route("/img/fetch")
+    def image_fetch():
+        """Copy an allowed remote image into the local cache, then redirect to it."""
+        url = canonical(request.args.get("u") or "")
+        if not images.allowed(url) or url not in referenced_images():
+            abort(404)
+        if not images.fetch(url):
+            # CDN unreachable: let the browser try it directly
+            return redirect(url)
+        width = request.args.get("w", type=int)
+        response = redirect(images.src(url, width))
+        response.headers["Cache-Control"] = "public, max-age=86400"
+        return response
+
+    @app.route("/img/<name>")
+    def image(name: str):
+        """A cached original or resized variant; names are content hashes."""
+        found = images.resolve(name)
+        if found is None:
+            abort(404)
+        path, mimetype = found
+        etag = '"' + name + '"'
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+        if if_none_match(request.headers.get("If-None-Match"), etag):
+            return Response(status=304, headers=headers)
+        with open(path, "rb") as fh:
+            return Response(fh.read(), mimetype=mimetype, headers=headers)
 
     @app.route('/headshots/<path:filename>')
     def headshot_proxy(filename: str):
-        # Many headshot URLs in player JSON are full remote URLs; simply redirect to them
-        # But also support local files under stats/headshots if you place them there.
-        # Prefer local file if exists
-        local_dir = os.path.join(STATS_DIR, "headshots")
-        local_path = os.path.join(local_dir, filename)
-        if os.path.exists(local_path):
-            return send_from_directory(local_dir, filename)
-        # otherwise assume filename is a full URL
-        # unescape and redirect
-        return redirect(filename)
+        # Files saved by collector/headshot.py (or placed in stats/headshots)
+        # are served directly; anything else is treated as a remote URL.
+        for local_dir in (HEADSHOTS_DIR, os.path.join(STATS_DIR, "headshots")):
+            if os.path.exists(os.path.join(local_dir, filename)):
+                return send_from_directory(local_dir, filename, max_age=86400)
+        # a remote URL: serve it from the image cache when possible
+        return redirect(images.src(filename) or filename)
 
     return app
 
@@ -0,0 +1,238 @@
+"""Async (ASGI) variant of the app's read-only JSON endpoints.
+
+The Flask app serves every request on a worker thread, which is wasteful for
+the tiny JSON bodies the players page asks for on every keystroke. This is a
+dependency-free ASGI application for those reads:
+
+  /_search_players?q=...  - autocomplete matches (same body as the Flask route)
+  /_teams                 - standings (same body as the Flask route)
+  /api/player/<key>       - one player record, by `nameKey` or numeric id
+  /api/leaders            - top players by a stat; query parameters `stat`
+                            (default points), `limit` (max 200), `team`,
+                            `position` (C, L, R, D, G or F), `last` (sum over
+                            the last N >= 1 games instead of the season
+                            value) and `order` (desc|asc); an unknown stat,
+                            team or position is a 400
+
+It reads the same `DataStore`s and `PlayerIndex` as app.py, and caches
+encoded bodies the same way (`webcache`), keyed by path, query and dataset
+version, with identical ETags. A cache hit is answered on the event loop
+without blocking; reloading a stats file and building a missing body run in
+a worker thread, so a slow reload never stalls the other connections.
+
+Run it with any ASGI server, next to the Flask app for the pages, and route
+the paths above to it, e.g.:
+
+  uvicorn --app-dir app asgi:application --workers 4 --port 8001
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote
+
+import app as webapp
+from stats.analyst import FORWARD_POSITIONS, RECENT_STATS
+from webcache import CachedBody, LRUCache, coded_etag, etag_for, matching_etag
+
+LEADERS_DEFAULT = 10
+POSITIONS = FORWARD_POSITIONS + ("D", "G", "F")
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the handlers need."""
+
+    __slots__ = ("method", "path", "query", "args", "headers")
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.method = scope.get("method", "GET")
+        self.path = scope.get("path") or "/"
+        items = parse_qsl((scope.get("query_string") or b"").decode("latin-1"), keep_blank_values=True)
+        self.query = tuple(sorted(items))
+        self.args: Dict[str, str] = {}
+        for name, value in items:
+            self.args.setdefault(name, value)
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers") or ()}
+
+
+Reply = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+def _json(data: Any) -> bytes:
+    # byte-for-byte what Flask's app.json.dumps produces, so ETags agree
+    return json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _error(status: int, message: str) -> Reply:
+    return status, [(b"content-type", b"application/json"), (b"cache-control", b"no-store")], _json({"error": message})
+
+
+def leaders(engine, stat: str, limit: int, team: Optional[str] = None, position: Optional[str] = None,
+            last_n: Optional[int] = None, ascending: bool = False) -> List[Dict[str, Any]]:
+    """Leaderboard rows for /api/leaders, best first."""
+    rows = []
+    for rank, (p, value) in enumerate(engine.top(stat, k=limit, team=team, position=position,
+                                                  last_n=last_n, ascending=ascending), 1):
+        rows.append({
+            "rank": rank,
+            "id": p.get("id"),
+            "name": p.get("name"),
+            "nameKey": p.get("nameKey"),
+            "team": p.get("team"),
+            "position": p.get("position"),
+            "headshot": p.get("headshot"),
+            "value": value,
+        })
+    return rows
+
+
+class ReadAPI:
+    """ASGI application serving the read endpoints from shared DataStores."""
+
+    def __init__(self, players=None, teams=None, cache: Optional[LRUCache] = None):
+        self.players = players or webapp.PLAYERS
+        self.teams = teams or webapp.TEAMS
+        self.cache = cache or LRUCache(max_entries=webapp.RESPONSE_CACHE_ENTRIES, max_bytes=webapp.RESPONSE_CACHE_BYTES)
+        self.cache_control = f"public, max-age={webapp.JSON_MAX_AGE}".encode("latin-1")
+        self._vocabulary: Optional[Tuple[Any, Tuple[frozenset, frozenset]]] = None
+        self.routes: List[Tuple["re.Pattern[str]", Callable[..., Awaitable[Reply]]]] = [
+            (re.compile(r"/_search_players"), self.search_players),
+            (re.compile(r"/_teams"), self.teams_json),
+            (re.compile(r"/api/player/([^/]+)"), self.player),
+            (re.compile(r"/api/leaders"), self.leaders),
+        ]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        req = Request(scope)
+        if req.method not in ("GET", "HEAD"):
+            status, headers, body = _error(405, "method not allowed")
+            headers.append((b"allow", b"GET, HEAD"))
+        else:
+            status, headers, body = await self.dispatch(req)
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if req.method == "HEAD" else body})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # parse the stats files before the first request needs them
+                await asyncio.to_thread(self.players.snapshot)
+                await asyncio.to_thread(self.teams.snapshot)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def dispatch(self, req: Request) -> Reply:
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(req.path)
+            if match:
+                return await handler(req, *(unquote(g) for g in match.groups()))
+        return _error(404, "not found")
+
+    @staticmethod
+    async def snapshot(store):
+        """`store.snapshot()`, in a thread when it may have to stat or parse."""
+        return store.current() or await asyncio.to_thread(store.snapshot)
+
+    async def vocabulary(self, snap) -> Tuple[frozenset, frozenset]:
+        """The stats and team abbreviations /api/leaders accepts for `snap`."""
+        known = self._vocabulary
+        if known is None or known[0] != snap.version:
+            def build():
+                # builds the analytics engine, which walks every record once
+                engine = snap.data.analytics
+                return frozenset(engine.numeric_stats), frozenset(t for t in engine.team if t)
+
+            known = self._vocabulary = (snap.version, await asyncio.to_thread(build))
+        return known[1]
+
+    async def cached_json(self, req: Request, version: Any, build: Callable[[], Any]) -> Reply:
+        """Serve `build()` as JSON, encoded once per query and dataset version.
+
+        Mirrors `cached_json` in app.py, including the ETag.
+        """
+        key = (req.path, req.query, version)
+        etag = etag_for(key)
+        headers = [(b"cache-control", self.cache_control), (b"vary", b"Accept-Encoding")]
+        matched = matching_etag(req.headers.get("if-none-match"), etag)
+        if matched:
+            headers.append((b"etag", matched.encode("latin-1")))
+            return 304, headers, b""
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = await asyncio.to_thread(lambda: CachedBody(_json(build()), "application/json", etag))
+            self.cache.put(key, entry)
+        body, encoding = entry.encoded(req.headers.get("accept-encoding", ""))
+        headers.append((b"etag", coded_etag(etag, encoding).encode("latin-1")))
+        headers.append((b"content-type", b"application/json"))
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+        return 200, headers, body
+
+    async def search_players(self, req: Request) -> Reply:
+        q = (req.args.get("q") or "").strip()
+        if not q:
+            return 200, [(b"content-type", b"application/json")], b"[]"
+        snap = await self.snapshot(self.players)
+        return await self.cached_json(req, snap.version, lambda: webapp.search_results(snap.data, q))
+
+    async def teams_json(self, req: Request) -> Reply:
+        snap = await self.snapshot(self.teams)
+        return await self.cached_json(req, snap.version, lambda: snap.data or [])
+
+    async def player(self, req: Request, key: str) -> Reply:
+        snap = await self.snapshot(self.players)
+        found = snap.data.get(key)
+        if not found:
+            return _error(404, f"no player {key!r}")
+        return await self.cached_json(req, snap.version, lambda: found)
+
+    async def leaders(self, req: Request) -> Reply:
+        snap = await self.snapshot(self.players)
+        args = req.args
+        stat = args.get("stat") or "points"
+        order = (args.get("order") or "desc").lower()
+        if order not in ("asc", "desc"):
+            return _error(400, "order must be asc or desc")
+        try:
+            limit = min(max(int(args.get("limit") or LEADERS_DEFAULT), 1), webapp.API_MAX_PAGE_SIZE)
+        except ValueError:
+            return _error(400, "limit must be an integer")
+        try:
+            last_n = int(args["last"]) if args.get("last") else None
+        except ValueError:
+            return _error(400, "last must be an integer")
+        stats, teams = await self.vocabulary(snap)
+        if last_n is not None:
+            if last_n < 1:
+                return _error(400, "last must be at least 1")
+            if stat not in RECENT_STATS:
+                return _error(400, f"no per-game values for {stat!r}")
+        elif stat not in stats:
+            return _error(400, f"unknown stat {stat!r}")
+        # both end up in the engine's memo key, so only known values get through
+        team = (args.get("team") or "").upper() or None
+        if team is not None and team not in teams:
+            return _error(400, f"unknown team {args['team']!r}")
+        position = (args.get("position") or "").upper() or None
+        if position is not None and position not in POSITIONS:
+            return _error(400, f"position must be one of {', '.join(POSITIONS)}")
+
+        def build():
+            return leaders(snap.data.analytics, stat, limit, team=team, position=position,
+                           last_n=last_n, ascending=order == "asc")
+
+        return await self.cached_json(req, snap.version, build)
+
+
+application = ReadAPI()
@@ -0,0 +1,511 @@
+"""Local image cache for headshots, hero images and team logos.
+
+Pages used to point `<img>` tags at the NHL CDN (or at a `/headshots/` path
+that never matched a file). `ImageStore` serves every image from local disk
+instead:
+
+  - originals are content-addressed: `<cache>/blobs/<digest>.<ext>`, where
+    the digest is the first 20 hex digits of the file's sha256. Local files
+    (`headshots/*.png` written by collector/headshot.py) are hard-linked in,
+    remote ones are fetched once from an allowed host and stored. Fetched
+    blobs have a byte budget of their own and are evicted least-recently-used
+    like the variants; URLs are compared without their query string;
+  - fetched `url -> blob` is kept in `<cache>/index.json`, and headshot.py's
+    manifest (player URL -> local file) is read as well, so most headshots
+    resolve without any network access. Local files are hashed once per
+    process rather than trusting the manifest's sha256, so a blob's name
+    always matches its bytes. A digest of
+    the two files is the store's `version()`: it is the same in every worker
+    and across restarts, and changes whenever `src()` may;
+  - resized WebP variants are rendered on demand with Pillow into
+    `<cache>/variants/`, a disk cache evicted least-recently-used once it
+    exceeds its byte budget. Thumbnails headshot.py already rendered
+    (`headshots/thumbs/`) are used as-is.
+
+Because names are content hashes, `/img/<name>` responses are immutable and
+cached by browsers for a year; a changed image gets a new URL.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+DIGEST_LEN = 20
+# widths variants can be requested at; keeps the variant cache bounded
+WIDTHS = (32, 40, 64, 96, 128, 256, 512, 1280)
+RASTER = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+EXTENSIONS = RASTER + (".svg",)
+NAME_RE = re.compile(r"^([0-9a-f]{%d})(?:-(\d+))?(\.[a-z]+)$" % DIGEST_LEN)
+
+MIMETYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+}
+
+
+def _ext(path_or_url: str) -> str:
+    ext = os.path.splitext(urllib.parse.urlparse(path_or_url).path)[1].lower()
+    return ext if ext in EXTENSIONS else ".png"
+
+
+def canonical(url: str) -> str:
+    """`url` without its query string and fragment, the key it is cached under."""
+    parsed = urllib.parse.urlparse(url or "")
+    return urllib.parse.urlunparse((parsed.scheme, parsed.netloc.lower(), parsed.path, "", "", ""))
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()[:DIGEST_LEN]
+
+
+def _sane(name: str) -> str:
+    # same rule as collector/headshot.py
+    keep = "abcdefghijklmnopqrstuvwxyz0123456789-_"
+    return "".join(c for c in str(name).lower().replace(" ", "_") if c in keep)
+
+
+def _headshot_file(player: Dict, ext: str) -> str:
+    # same name as collector/headshot.py's headshot_filename
+    stem = _sane(player.get("nameKey") or player.get("name") or "")
+    if player.get("id") is not None:
+        stem = f"{stem}-{player['id']}" if stem else str(player["id"])
+    return (stem or "unknown") + ext
+
+
+class ImageStore:
+    """Resolves image URLs to local content-addressed files and variants."""
+
+    def __init__(self, cache_dir: str, headshots_dir: Optional[str] = None, max_variant_bytes: int = 256 * 1024 * 1024,
+                 allowed_hosts: Iterable[str] = ("assets.nhle.com",), fetch_timeout: float = 5.0,
+                 max_blob_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.variants_dir = os.path.join(cache_dir, "variants")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.headshots_dir = headshots_dir
+        self.max_variant_bytes = max_variant_bytes
+        self.max_blob_bytes = max_blob_bytes
+        self.allowed_hosts = {h.lower() for h in allowed_hosts}
+        self.fetch_timeout = fetch_timeout
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.variants_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._session = None
+        self._inflight: set = set()
+        self._rendering: Dict[str, threading.Lock] = {}  # variant name -> render lock
+        self._local: Dict[str, Tuple[int, int, str]] = {}  # path -> (mtime_ns, size, name)
+        self._manifest_version = None
+        self._manifest: Dict[str, str] = {}  # url -> file
+        self._urls: Dict[str, str] = {}  # fetched url -> blob name, as in index.json
+        self._index_version = None
+        self._version: Tuple[object, str] = (None, "")
+        self._load_index()
+
+        # variant LRU: oldest first, seeded from the files' mtimes
+        self._variants: "OrderedDict[str, int]" = OrderedDict()
+        self.variant_bytes = 0
+        entries = []
+        for entry in os.scandir(self.variants_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._variants[name] = size
+            self.variant_bytes += size
+
+        # fetched-blob LRU, same idea; hard links to saved headshots cost
+        # no space and are not counted
+        self._blobs: "OrderedDict[str, int]" = OrderedDict()
+        self.blob_bytes = 0
+        entries = []
+        for entry in os.scandir(self.blobs_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                if st.st_nlink == 1:
+                    entries.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._blobs[name] = size
+            self.blob_bytes += size
+
+    # ---- originals -----------------------------------------------------
+
+    def _link(self, src: str, name: str) -> str:
+        dest = os.path.join(self.blobs_dir, name)
+        if not os.path.exists(dest):
+            tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        return dest
+
+    def name_for_file(self, path: str) -> Optional[str]:
+        """Content name of a local file, adding it to the blob store.
+
+        The file is hashed (once per mtime and size): a name served as
+        immutable must never point at other bytes.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        memo = self._local.get(path)
+        if memo and memo[:2] == (st.st_mtime_ns, st.st_size) and os.path.exists(os.path.join(self.blobs_dir, memo[2])):
+            return memo[2]
+        name = file_digest(path) + _ext(path)
+        self._link(path, name)
+        self._local[path] = (st.st_mtime_ns, st.st_size, name)
+        return name
+
+    def _headshot_manifest(self) -> Dict[str, str]:
+        if not self.headshots_dir:
+            return {}
+        path = os.path.join(self.headshots_dir, "manifest.json")
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self._manifest
+        version = (st.st_mtime_ns, st.st_size)
+        if version != self._manifest_version:
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+                self._manifest = {
+                    canonical(e["url"]): e["file"]
+                    for e in data.values()
+                    if isinstance(e, dict) and e.get("url") and e.get("file")
+                }
+            except (OSError, ValueError, AttributeError):
+                pass
+            self._manifest_version = version
+        return self._manifest
+
+    def _load_index(self) -> None:
+        """Re-read index.json when another process (a worker) rewrote it."""
+        try:
+            st = os.stat(self.index_path)
+        except OSError:
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if stamp == self._index_version:
+                return
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as fh:
+                    self._urls = dict(json.load(fh))
+            except (OSError, ValueError, TypeError):
+                return
+            self._index_version = stamp
+
+    def version(self) -> str:
+        """Changes when `src()` may return a different path for some URL.
+
+        Part of the page cache key (and so of page ETags), so a page rendered
+        while an image was still remote (an `/img/fetch` link) is rendered
+        again once it is local. A digest of index.json and the headshot
+        manifest rather than a counter, so every worker and every restart
+        agrees on it; the files are only hashed when their stat changes.
+        """
+        self._load_index()
+        self._headshot_manifest()
+        sources = (self.index_path, os.path.join(self.headshots_dir, "manifest.json") if self.headshots_dir else "")
+        stamps = []
+        for path in sources:
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        stamps = tuple(stamps)
+        if self._version[0] != stamps:
+            h = hashlib.sha256()
+            for path in sources:
+                try:
+                    with open(path, "rb") as fh:
+                        h.update(fh.read())
+                except OSError:
+                    pass
+                h.update(b"\0")
+            self._version = (stamps, h.hexdigest()[:DIGEST_LEN])
+        return self._version[1]
+
+    def name_for_url(self, url: str, local_hint: Optional[str] = None) -> Optional[str]:
+        """Content name for an image URL if it is available locally, else None.
+
+        `local_hint` is a file that holds the same image (a player's
+        headshot saved under their nameKey and id).
+        """
+        if not url:
+            return None
+        url = canonical(url)
+        name = self._urls.get(url)
+        if name and os.path.exists(os.path.join(self.blobs_dir, name)):
+            with self._lock:
+                if name in self._blobs:
+                    self._blobs.move_to_end(name)
+            return name
+        # saved headshots are not added to index.json: they resolve the same
+        # way every time, and recording them would change version()
+        found = self._headshot_manifest().get(url)
+        if found:
+            return self.name_for_file(os.path.join(self.headshots_dir, found))
+        if local_hint and os.path.exists(local_hint):
+            return self.name_for_file(local_hint)
+        return None
+
+    def _remember(self, url: str, name: str) -> bool:
+        """Map fetched `url` to blob `name`; False when it already was."""
+        self._load_index()  # keep what other workers fetched
+        with self._lock:
+            if self._urls.get(url) == name:
+                return False
+            self._urls[url] = name
+            self._save_index()
+        return True
+
+    def _save_index(self) -> None:
+        # caller holds self._lock
+        tmp = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self._urls, fh, sort_keys=True)
+        os.replace(tmp, self.index_path)
+        st = os.stat(self.index_path)
+        self._index_version = (st.st_mtime_ns, st.st_size)
+
+    def _store_blob(self, name: str, content: bytes) -> None:
+        """Write a fetched blob and evict the least recently used ones over budget."""
+        dest = os.path.join(self.blobs_dir, name)
+        if os.path.exists(dest):
+            with self._lock:
+                if name in self._blobs:
+                    self._blobs.move_to_end(name)
+            return  # already fetched, or a saved headshot's hard link
+        tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp, dest)
+        with self._lock:
+            self.blob_bytes += len(content) - self._blobs.pop(name, 0)
+            self._blobs[name] = len(content)
+            evicted = set()
+            while self.blob_bytes > self.max_blob_bytes and len(self._blobs) > 1:
+                old, old_size = self._blobs.popitem(last=False)
+                self.blob_bytes -= old_size
+                evicted.add(old)
+                try:
+                    os.remove(os.path.join(self.blobs_dir, old))
+                except OSError:
+                    pass
+            if evicted:
+                # those URLs go back to /img/fetch links
+                self._urls = {u: n for u, n in self._urls.items() if n not in evicted}
+                self._save_index()
+
+    def allowed(self, url: str) -> bool:
+        parsed = urllib.parse.urlparse(url or "")
+        return parsed.scheme in ("http", "https") and (parsed.hostname or "").lower() in self.allowed_hosts
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Download an allowed remote image into the blob store; returns its name."""
+        url = canonical(url)
+        name = self.name_for_url(url)
+        if name or not self.allowed(url):
+            return name
+        import requests
+
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+                self._session.headers["User-Agent"] = "okey-app/1.0"
+            session = self._session
+        try:
+            resp = session.get(url, timeout=self.fetch_timeout)
+        except requests.RequestException:
+            return None
+        if resp.status_code != 200 or not resp.content:
+            return None
+        name = hashlib.sha256(resp.content).hexdigest()[:DIGEST_LEN] + _ext(url)
+        self._store_blob(name, resp.content)
+        self._remember(url, name)
+        return name
+
+    def prefetch(self, urls: Iterable[str]) -> None:
+        """Fetch the given URLs into the cache on a background thread."""
+        with self._lock:
+            todo = [u for u in dict.fromkeys(urls) if u and u not in self._inflight and self.allowed(u) and not self.name_for_url(u)]
+            self._inflight.update(todo)
+        if not todo:
+            return
+
+        def run():
+            try:
+                for url in todo:
+                    self.fetch(url)
+            finally:
+                with self._lock:
+                    self._inflight.difference_update(todo)
+
+        threading.Thread(target=run, name="okey-image-prefetch", daemon=True).start()
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """Wait up to `timeout` seconds for background fetches; True when none are left."""
+        deadline = time.monotonic() + timeout
+        while self._inflight and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self._inflight
+
+    # ---- URLs for templates --------------------------------------------
+
+    @staticmethod
+    def _width(width: Optional[int]) -> Optional[int]:
+        """Smallest allowed width >= `width` (the largest one if none is)."""
+        if not width:
+            return None
+        for w in WIDTHS:
+            if w >= width:
+                return w
+        return WIDTHS[-1]
+
+    def src(self, url: Optional[str], width: Optional[int] = None, local_hint: Optional[str] = None) -> Optional[str]:
+        """Path to use in an <img src> for `url`, at least `width` px wide."""
+        if not url:
+            return None
+        if url.startswith("/") and not url.startswith("//"):
+            return url  # already served by the app (static files)
+        name = self.name_for_url(url, local_hint)
+        width = self._width(width)
+        if name:
+            stem, ext = os.path.splitext(name)
+            return f"/img/{stem}-{width}.webp" if width and ext in RASTER else f"/img/{name}"
+        if self.allowed(url):
+            query = {"u": canonical(url)}
+            if width:
+                query["w"] = width
+            return "/img/fetch?" + urllib.parse.urlencode(query)
+        return url
+
+    def headshot_src(self, player: Dict, width: Optional[int] = None) -> str:
+        """`src` for a player dict's headshot, using the saved file if any."""
+        url = player.get("headshot") or player.get("heroImage")
+        hint = None
+        if self.headshots_dir and (player.get("nameKey") or player.get("name") or player.get("id") is not None):
+            hint = os.path.join(self.headshots_dir, _headshot_file(player, _ext(url or ".png")))
+        return self.src(url, width, hint) or "/static/placeholder_headshot.png"
+
+    def warm(self, players: Iterable[Dict]) -> None:
+        """Make sure the headshots and team logos of `players` are local.
+
+        Saved headshots are registered right away; anything else is fetched
+        in the background so pages never wait on the CDN for them.
+        """
+        todo = []
+        for p in players:
+            if not isinstance(p, dict):
+                continue
+            src = self.headshot_src(p)
+            if src.startswith("/img/fetch"):
+                todo.append(p.get("headshot") or p.get("heroImage"))
+            todo.append(p.get("teamLogo"))
+        self.prefetch(todo)
+
+    # ---- serving -------------------------------------------------------
+
+    def original_path(self, name: str) -> Optional[str]:
+        path = os.path.join(self.blobs_dir, name)
+        return path if NAME_RE.match(name) and os.path.exists(path) else None
+
+    def variant_path(self, digest: str, ext: str, width: int) -> Optional[str]:
+        """Path of the WebP variant of blob `digest+ext` at `width`, rendering it if needed."""
+        if width not in WIDTHS:
+            return None
+        vname = f"{digest}-{width}.webp"
+        if self.headshots_dir:
+            pre = os.path.join(self.headshots_dir, "thumbs", vname)
+            if os.path.exists(pre):
+                return pre
+        path = os.path.join(self.variants_dir, vname)
+        with self._lock:
+            if vname in self._variants:
+                self._variants.move_to_end(vname)
+                if os.path.exists(path):
+                    return path
+                self.variant_bytes -= self._variants.pop(vname)
+        src = self.original_path(digest + ext)
+        if src is None or ext not in RASTER:
+            return None
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        # one render per variant: concurrent requests for it wait here
+        with self._lock:
+            render_lock = self._rendering.setdefault(vname, threading.Lock())
+        with render_lock:
+            try:
+                with self._lock:
+                    if vname in self._variants and os.path.exists(path):
+                        return path
+                return self._render(src, path, vname, width)
+            finally:
+                with self._lock:
+                    if self._rendering.get(vname) is render_lock:
+                        del self._rendering[vname]
+
+    def _render(self, src: str, path: str, vname: str, width: int) -> str:
+        from PIL import Image
+
+        with Image.open(src) as img:
+            img.load()
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            if img.width > width:
+                img.thumbnail((width, width * img.height // max(1, img.width) or 1), Image.LANCZOS)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            img.save(tmp, "WEBP", quality=82, method=4)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self.variant_bytes += size - self._variants.pop(vname, 0)
+            self._variants[vname] = size
+            while self.variant_bytes > self.max_variant_bytes and len(self._variants) > 1:
+                old, old_size = self._variants.popitem(last=False)
+                self.variant_bytes -= old_size
+                try:
+                    os.remove(os.path.join(self.variants_dir, old))
+                except OSError:
+                    pass
+        return path
+
+    def resolve(self, name: str) -> Optional[Tuple[str, str]]:
+        """(path, mimetype) for an `/img/<name>` request, or None."""
+        m = NAME_RE.match(name)
+        if not m:
+            return None
+        digest, width, ext = m.group(1), m.group(2), m.group(3)
+        if width is None:
+            path = self.original_path(name)
+            return (path, MIMETYPES.get(ext, "application/octet-stream")) if path else None
+        for src_ext in RASTER:
+            if os.path.exists(os.path.join(self.blobs_dir, digest + src_ext)):
+                path = self.variant_path(digest, src_ext, int(width))
+                return (path, "image/webp") if path else None
+        return None
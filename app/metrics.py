@@ -0,0 +1,256 @@
+"""Request metrics and an opt-in sampling profiler for the Flask app.
+
+`Metrics` keeps one latency histogram per route (the URL rule, so
+`/player/<key>` is one series) and one per route and phase:
+
+  load     taking a DataStore snapshot, i.e. (re)parsing a stats file
+  compute  building the data for a page or JSON body (index, analyst)
+  render   rendering the template or encoding the JSON
+
+Phases are timed with `phase(name)` around the corresponding code; time a
+request spends in none of them (cache lookups, compression, Flask itself)
+is the difference between the total and the phases. `render()` returns
+everything in the Prometheus text exposition format for `/metrics`.
+
+`SamplingProfiler` is off unless OKEY_PROFILE_SLOW_MS is set. While on, a
+background thread samples the stacks of the threads serving requests every
+few milliseconds; when a request takes longer than the threshold its samples
+are written as folded stacks (`frame;frame;frame count` per line), the input
+format of flamegraph.pl and speedscope.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# seconds; Prometheus' default buckets shifted towards fast in-memory responses
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class Histogram:
+    """Cumulative-bucket histogram (the Prometheus layout)."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        out, running = [], 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            running += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            out.append(f'{name}_bucket{{{labels},le="{le}"}} {running}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to phase `name` of the current request."""
+    phases = getattr(_local, "phases", None)
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+class Metrics:
+    """Per-route latency histograms with a phase breakdown."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self._phases: Dict[Tuple[str, str], Histogram] = {}
+        self._gauges: Dict[str, Tuple[str, str, Callable]] = {}
+        self.started = time.time()
+
+    def reset(self) -> None:
+        """Forget every recorded request (e.g. the warm-up requests)."""
+        with self._lock:
+            self._requests.clear()
+            self._phases.clear()
+
+    def begin(self) -> None:
+        """Start timing a request on the current thread."""
+        _local.phases = {}
+        _local.start = time.perf_counter()
+
+    def end(self, route: str, method: str, status: int) -> float:
+        """Record the current request; returns its duration in seconds."""
+        start = getattr(_local, "start", None)
+        phases = getattr(_local, "phases", None) or {}
+        _local.phases = _local.start = None
+        if start is None:
+            return 0.0
+        elapsed = time.perf_counter() - start
+        key = (route, method, f"{status // 100}xx")
+        with self._lock:
+            hist = self._requests.get(key)
+            if hist is None:
+                hist = self._requests[key] = Histogram()
+            hist.observe(elapsed)
+            for name, seconds in phases.items():
+                hist = self._phases.get((route, name))
+                if hist is None:
+                    hist = self._phases[(route, name)] = Histogram()
+                hist.observe(seconds)
+        return elapsed
+
+    def gauge(self, name: str, help_text: str, read, kind: str = "gauge") -> None:
+        """Export `read()` (a number, or {cache name: number}) on every scrape.
+
+        `kind` is the Prometheus type, "counter" for values that only grow.
+        """
+        self._gauges[name] = (help_text, kind, read)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP okey_request_duration_seconds Time to produce a response, by route.",
+            "# TYPE okey_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            requests = sorted(self._requests.items())
+            phases = sorted(self._phases.items())
+            for (route, method, status), hist in requests:
+                lines += hist.lines("okey_request_duration_seconds",
+                                    f'route="{_label(route)}",method="{method}",status="{status}"')
+            lines += [
+                "# HELP okey_request_phase_seconds Time per request spent in each phase (load, compute, render).",
+                "# TYPE okey_request_phase_seconds histogram",
+            ]
+            for (route, name), hist in phases:
+                lines += hist.lines("okey_request_phase_seconds", f'route="{_label(route)}",phase="{name}"')
+        for name, (help_text, kind, read) in sorted(self._gauges.items()):
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f'{name}{{cache="{_label(label)}"}} {v}')
+            else:
+                lines.append(f"{name} {value}")
+        lines += [
+            "# HELP okey_process_start_time_seconds Start time of the process since the epoch.",
+            "# TYPE okey_process_start_time_seconds gauge",
+            f"okey_process_start_time_seconds {self.started:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Samples request threads' stacks; dumps folded stacks of slow requests."""
+
+    def __init__(self, out_dir: str, threshold: float, interval: float = 0.005, keep: int = 200):
+        self.out_dir = out_dir
+        self.threshold = threshold
+        self.interval = interval
+        self.keep = keep
+        self._active: Dict[int, Counter] = {}
+        self._started: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            samples = []
+            for ident, counts in active:
+                frame = frames.get(ident)
+                if frame is None or ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                samples.append((ident, counts, ";".join(reversed(stack))))
+            # stop() pops a thread's counts and reads them under the lock:
+            # only count into those still being sampled
+            with self._lock:
+                for ident, counts, stack in samples:
+                    if self._active.get(ident) is counts:
+                        counts[stack] += 1
+
+    def start(self) -> None:
+        """Begin sampling the current thread."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="okey-profiler", daemon=True)
+                    self._thread.start()
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            self._started[threading.get_ident()] = time.perf_counter()
+
+    def stop(self, route: str, failed: bool = False) -> Optional[str]:
+        """Stop sampling the current thread; returns the dump path if it was slow.
+
+        Failed requests are dumped whatever their duration.
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            counts = self._active.pop(ident, None)
+            started = self._started.pop(ident, None)
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        if not counts or (elapsed < self.threshold and not failed):
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        suffix = "-failed" if failed else ""
+        path = os.path.join(self.out_dir,
+                            f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms{suffix}-{slug}.folded")
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, n in counts.most_common():
+                fh.write(f"{stack} {n}\n")
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        try:
+            dumps = sorted(
+                (e for e in os.scandir(self.out_dir) if e.name.endswith(".folded")),
+                key=lambda e: e.stat().st_mtime,
+            )
+        except OSError:
+            return
+        for entry in dumps[:-self.keep] if len(dumps) > self.keep else []:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
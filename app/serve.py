@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Production server for the Flask app: preloaded, pre-forked workers.
+
+`python app/app.py` runs Flask's single-process debug server. This entry
+point instead:
+
+  1. builds the app once in the master process, loads playerStats.json and
+     teamsStats.json, builds the PlayerIndex and the analytics engine, and
+     warms the page/JSON caches by requesting the main pages and the most
+     viewed player pages (`warm`);
+  2. moves everything loaded so far out of the garbage collector's reach
+     (`gc.freeze()`), so workers do not dirty the shared pages just by
+     collecting, then forks `--workers` processes that all accept on one
+     listening socket. Each worker serves requests on threads.
+
+The dataset therefore lives in memory once, in pages the workers share
+copy-on-write, and the first visitor of each page gets a cache hit. Workers
+never reload the stats themselves: the master checks the files every
+`--reload-interval` seconds and, when the collector rewrote them, loads and
+warms the new version and replaces the workers with a fresh generation
+forked from it (the old ones finish their requests first). SIGHUP forces
+that roll-over; SIGTERM/SIGINT stop everything. A worker that dies is
+replaced.
+
+Each worker keeps its own request metrics, so `/metrics` reports the worker
+that answered the scrape. SIGUSR1 makes the master log the RSS, PSS and
+private dirty memory of every process (Linux, from /proc/<pid>/smaps_rollup).
+
+Sharing is partial: reference counting and the workers' own caches still
+dirty pages. Measured on the real dataset with 4 workers after each had
+served every page (about 4800 requests): 59 MB RSS and 29 MB PSS per worker,
+22 MB of it private, against 68 MB PSS for one unshared process doing the
+same work.
+
+The workers run werkzeug's threaded HTTP server (no server package is
+required), which has no request timeouts, keep-alive tuning or slow-client
+protection. That is fine behind a reverse proxy such as nginx on a trusted
+network; do not expose it to internet traffic directly. For that, use a
+hardened pre-forking server with `warmed_app()` as below.
+
+Usage:
+  python app/serve.py [--bind 127.0.0.1:8000] [--workers N] [--no-threads]
+                      [--reload-interval 5] [--warm-players 100]
+
+With another pre-forking server, load `serve:warmed_app()` with preloading
+enabled (e.g. `gunicorn --preload -w 4 --chdir app 'serve:warmed_app()'`);
+it returns the app after warming and freezing, but the rolling reload above
+is specific to this runner.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+import app as webapp
+
+WARM_PLAYERS = int(os.environ.get("OKEY_WARM_PLAYERS", "100"))
+WARM_PATHS = ("/", "/players", "/teams", "/bracket", "/_teams", "/api/players")
+# stores the master reloads for the workers; LIVE and SCHEDULER are small and
+# change every few seconds, so workers keep polling those themselves
+SHARED_STORES = (webapp.PLAYERS, webapp.TEAMS)
+
+
+def warm(app, players: int = WARM_PLAYERS) -> int:
+    """Load the datasets and fill the response caches; returns pages warmed."""
+    index = webapp.PLAYERS.snapshot().data
+    webapp.TEAMS.snapshot()
+    try:
+        index.analytics.hottest(top_n=3, last_n=5)
+    except Exception:
+        pass
+    paths = list(WARM_PATHS) + [f"/player/{p['nameKey']}" for p in index.by_points[:max(0, players)] if p.get("nameKey")]
+    client = app.test_client()
+    images = app.extensions["okey_images"]
+    image_version = images.version()
+    warmed = sum(1 for path in paths if client.get(path).status_code == 200)
+    # background image fetches must not hold a lock across fork()
+    images.drain()
+    if images.version() != image_version:
+        # images fetched meanwhile: render the pages again with local URLs
+        warmed = sum(1 for path in paths if client.get(path).status_code == 200)
+    app.extensions["okey_metrics"].reset()
+    return warmed
+
+
+def warmed_app(players: int = WARM_PLAYERS):
+    """The Flask app with datasets loaded and caches warm, ready to fork."""
+    app = webapp.create_app()
+    warm(app, players)
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def _versions():
+    return tuple(store.snapshot().version for store in SHARED_STORES)
+
+
+def memory(pid: int) -> Optional[Dict[str, int]]:
+    """Rss, Pss and Private_Dirty of a process in kB (Linux only), or None."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r", encoding="ascii") as fh:
+            fields = dict(line.split(":", 1) for line in fh if ":" in line and not line[0].isdigit())
+    except OSError:
+        return None
+    return {name: int(fields[name].split()[0]) for name in ("Rss", "Pss", "Private_Dirty") if name in fields}
+
+
+def _bind(address: str) -> socket.socket:
+    host, _, port = address.rpartition(":")
+    sock = socket.socket(socket.AF_INET6 if ":" in host.strip("[]") else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host.strip("[]") or "0.0.0.0", int(port)))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _worker(app, sock: socket.socket, threaded: bool) -> None:
+    from werkzeug.serving import make_server
+
+    for store in SHARED_STORES:
+        store.freeze()  # the master reloads these
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever to return, so not from this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    server.serve_forever()
+
+
+class Master:
+    """Forks and supervises worker generations."""
+
+    def __init__(self, sock, workers: int, threaded: bool, reload_interval: float, warm_players: int):
+        self.sock = sock
+        self.size = max(1, workers)
+        self.threaded = threaded
+        self.reload_interval = reload_interval
+        self.warm_players = warm_players
+        self.workers = set()
+        self.app = None
+        self.versions = None
+        self.stopping = False
+        self.reload_requested = False
+        self.report_requested = False
+
+    def report(self) -> None:
+        """Log the memory of the master and each worker; PSS splits shared pages."""
+        total = 0
+        for label, pid in [("master", os.getpid())] + [("worker", pid) for pid in sorted(self.workers)]:
+            mem = memory(pid)
+            if mem is None:
+                continue
+            total += mem.get("Pss", 0)
+            print(f"[master] {label} {pid}: rss {mem.get('Rss', 0) / 1024:.1f} MB, pss {mem.get('Pss', 0) / 1024:.1f} MB, "
+                  f"private dirty {mem.get('Private_Dirty', 0) / 1024:.1f} MB", file=sys.stderr, flush=True)
+        print(f"[master] total pss {total / 1024:.1f} MB", file=sys.stderr, flush=True)
+
+    def load(self) -> None:
+        gc.unfreeze()
+        if self.app is not None:
+            for name in ("okey_page_cache", "okey_response_cache"):
+                self.app.extensions[name].clear()
+        start = time.perf_counter()
+        self.app = self.app or webapp.create_app()
+        warmed = warm(self.app, self.warm_players)
+        self.versions = _versions()
+        gc.collect()
+        gc.freeze()
+        print(f"[master {os.getpid()}] dataset loaded, {warmed} pages warmed in {time.perf_counter() - start:.2f}s",
+              file=sys.stderr, flush=True)
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _worker(self.app, self.sock, self.threaded)
+            except BaseException:
+                import traceback
+
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers.add(pid)
+        return pid
+
+    def roll(self) -> None:
+        """Start a new generation from freshly loaded data, then retire the old one."""
+        old = set(self.workers)
+        self.load()
+        self.workers -= old
+        for _ in range(self.size):
+            self.spawn()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.workers.discard(pid)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self.workers.discard(pid)
+                if not self.stopping:
+                    print(f"[master] worker {pid} exited; starting a new one", file=sys.stderr, flush=True)
+                    self.spawn()
+
+    def run(self) -> int:
+        def stop(signum, frame):
+            self.stopping = True
+
+        def hup(signum, frame):
+            self.reload_requested = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, hup)
+        signal.signal(signal.SIGUSR1, lambda signum, frame: setattr(self, "report_requested", True))
+
+        self.load()
+        for _ in range(self.size):
+            self.spawn()
+        host, port = self.sock.getsockname()[:2]
+        print(f"[master {os.getpid()}] serving on http://{host}:{port} with {self.size} worker(s)",
+              file=sys.stderr, flush=True)
+
+        next_check = time.monotonic() + self.reload_interval
+        while not self.stopping:
+            time.sleep(0.2)
+            self.reap()
+            if self.report_requested:
+                self.report_requested = False
+                self.report()
+            if self.reload_requested or time.monotonic() >= next_check:
+                changed = self.reload_requested or _versions() != self.versions
+                self.reload_requested = False
+                next_check = time.monotonic() + self.reload_interval
+                if changed:
+                    self.roll()
+
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + 10
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGKILL)
+        return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the okey web app with preloaded, pre-forked workers")
+    parser.add_argument("--bind", default=os.environ.get("OKEY_BIND", "127.0.0.1:8000"), help="host:port to listen on")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("OKEY_WORKERS", os.cpu_count() or 2)))
+    parser.add_argument("--no-threads", dest="threaded", action="store_false",
+                        help="Serve one request at a time per worker (SSE clients then hold a worker)")
+    parser.add_argument("--reload-interval", type=float, default=5.0,
+                        help="Seconds between checks for new stats files (default 5)")
+    parser.add_argument("--warm-players", type=int, default=WARM_PLAYERS,
+                        help=f"Player pages rendered before serving (default {WARM_PLAYERS})")
+    args = parser.parse_args(argv)
+    if not hasattr(os, "fork"):
+        print("serve.py needs os.fork(); use app.py on this platform", file=sys.stderr)
+        return 2
+    sock = _bind(args.bind)
+    return Master(sock, args.workers, args.threaded, args.reload_interval, args.warm_players).run()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
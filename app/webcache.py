@@ -0,0 +1,158 @@
+"""Response caching for the Flask app.
+
+The data behind every route only changes when the collector rewrites the
+stats files, so responses are cached under a key made of the route, the
+query parameters and the dataset version (`DataStore.version()`):
+
+  - `LRUCache` is a thread-safe, size-capped LRU map used for the cached
+    bodies;
+  - `CachedBody` holds one encoded body plus lazily built gzip/brotli
+    variants;
+  - `etag_for` derives a strong ETag from the cache key alone, so a client
+    revalidating with If-None-Match gets a 304 without the body being
+    rebuilt, even after the cache entry was evicted or the process restarted.
+    Compressed bodies carry that tag with the coding appended
+    (`coded_etag`), as different bytes need different strong validators;
+    `matching_etag` accepts any of them.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional
+    brotli = None
+
+# bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+class LRUCache:
+    """Least-recently-used map bounded by entry count and total bytes.
+
+    `sizeof` returns the cost of a value in bytes; values larger than the
+    whole budget are not stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda v: len(v))
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+
+def etag_for(key: Hashable) -> str:
+    """Strong ETag for a cache key that already includes the data version."""
+    return '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:24] + '"'
+
+
+class CachedBody:
+    """An encoded response body with its compressed variants."""
+
+    __slots__ = ("body", "mimetype", "etag", "_encoded")
+
+    def __init__(self, body: bytes, mimetype: str, etag: str):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self._encoded = {}
+
+    def __len__(self) -> int:
+        # gzip/brotli variants are at most about the size of the body
+        return 2 * len(self.body)
+
+    def encoded(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Pick the best encoding the client accepts; returns (body, encoding)."""
+        if len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, None
+        accept = (accept_encoding or "").lower()
+        for name in ("br", "gzip"):
+            if name not in accept or (name == "br" and brotli is None):
+                continue
+            data = self._encoded.get(name)
+            if data is None:
+                data = brotli.compress(self.body) if name == "br" else gzip.compress(self.body, 6, mtime=0)
+                self._encoded[name] = data
+            return data, name
+        return self.body, None
+
+
+def coded_etag(etag: str, encoding: Optional[str]) -> str:
+    """The strong ETag of `etag`'s body in a content-coding (None: identity)."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def matching_etag(header: Optional[str], etag: str) -> Optional[str]:
+    """The If-None-Match tag naming `etag` in any coding, or None.
+
+    `*` matches and yields `etag` itself.
+    """
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag in (coded_etag(etag, "gzip"), coded_etag(etag, "br")):
+            return tag
+    return None
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header value matches `etag`."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    return etag in tags or f"W/{etag}" in tags
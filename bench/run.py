@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the loader, analyst, web routes and collector.
+
+Each player scale (1x, 10x and 100x the real playerStats.json, see synth.py)
+gets its own temporary stats directory and its own worker process, so the
+app and collector read it through OKEY_STATS_DIR exactly as in production
+and one scale's memory does not skew the next.
+
+Benchmarks (the name is suffixed with the scale, e.g. `route.players[10x]`):
+  load_json              app.load_json of playerStats.json
+  index.build            PlayerIndex over the parsed list
+  analyst.hottest        stats.analyst.hottest_players
+  analyst.engine         StatsEngine build + hottest (what the index page does)
+  route.<name>           Flask test client; `.cold` clears the response and
+                         page caches before every request, the plain name is
+                         the cached path a repeat visitor hits
+  collector.cold/.warm   collect_all_player_stats against a local stub API
+                         (stub_api.py) that sleeps --latency per request; the
+                         warm run revalidates with conditional requests
+
+Usage:
+  python bench/run.py [--scales 1,10,100] [--repeat 15] [--only route.]
+                      [--collector-scales 1] [--latency 0.02]
+                      [--out bench/results.json]
+                      [--baseline bench/baseline.json] [--save-baseline]
+                      [--tolerance 0.25] [--fail-on-regression]
+
+Results are written as JSON ({"meta": ..., "results": {name: summary}}),
+every timing in seconds. Medians are compared against a previous results
+file, --baseline or else the committed bench/baseline.json, and slowdowns
+beyond --tolerance are reported as regressions (exit status 1 with
+--fail-on-regression). --save-baseline replaces that file after comparing.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, ".."))
+for _path in (REPO_ROOT, BENCH_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+DEFAULT_OUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+SEARCH_QUERIES = ("mc", "suz", "con", "mat", "ovech", "z", "lind", "ka")
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+def measure(fn: Callable[[int], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Time `fn(i)` `repeat` times after `warmup` untimed calls."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+# ---- worker side (runs with OKEY_STATS_DIR pointing at the dataset) ------
+
+def data_benchmarks(repeat: int, only: str) -> Dict[str, Any]:
+    sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+    import app as webapp
+    from stats.analyst import StatsEngine, hottest_players
+    from stats.index import PlayerIndex
+
+    results = {}
+
+    def run(name, fn, n=repeat, warmup=1):
+        if name.startswith(only):
+            results[name] = measure(fn, n, warmup)
+
+    players = webapp.load_json(webapp.PLAYER_FILE)
+    run("load_json", lambda i: webapp.load_json(webapp.PLAYER_FILE), n=max(3, repeat // 3))
+    run("index.build", lambda i: PlayerIndex(players), n=max(3, repeat // 3))
+    run("analyst.hottest", lambda i: hottest_players(players, top_n=3, last_n=5))
+    run("analyst.engine", lambda i: StatsEngine(players).hottest(top_n=3, last_n=5), n=max(3, repeat // 3))
+
+    app = webapp.create_app()
+    client = app.test_client()
+    caches = [app.extensions["okey_page_cache"], app.extensions["okey_response_cache"]]
+    index = webapp.PLAYERS.snapshot().data
+    keys = [p.get("nameKey") for p in index.by_points[:200] if p.get("nameKey")] or ["none"]
+
+    def get(path, cold):
+        def call(i):
+            if cold:
+                for cache in caches:
+                    cache.clear()
+            resp = client.get(path(i))
+            if resp.status_code >= 500:
+                raise RuntimeError(f"{path(i)} returned {resp.status_code}")
+        return call
+
+    routes = {
+        "players": lambda i: "/players",
+        "search_players": lambda i: f"/_search_players?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}",
+        "player_detail": lambda i: f"/player/{keys[i % len(keys)]}",
+        "bracket": lambda i: "/bracket",
+    }
+    for name, path in routes.items():
+        run(f"route.{name}.cold", get(path, cold=True))
+        run(f"route.{name}", get(path, cold=False), warmup=len(keys) if name == "player_detail" else 1)
+    return results
+
+
+def collector_benchmarks(only: str) -> Dict[str, Any]:
+    """One collector run, named by `only` (collector.cold or collector.warm)."""
+    sys.path.insert(0, os.path.join(REPO_ROOT, "collector"))
+    import collector as col
+
+    start = time.perf_counter()
+    players = col.collect_all_player_stats(os.environ["OKEY_BENCH_SEASON"], quiet=True, resume=False) or []
+    elapsed = time.perf_counter() - start
+    return {only: dict(summarize([elapsed]), players=len(players))}
+
+
+def worker(args) -> int:
+    if args.worker == "data":
+        results = data_benchmarks(args.repeat, args.only)
+    else:
+        results = collector_benchmarks(args.only)
+    json.dump(results, sys.stdout)
+    return 0
+
+
+# ---- driver --------------------------------------------------------------
+
+def _spawn(kind: str, env: Dict[str, str], args) -> Dict[str, Any]:
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", kind, "--repeat", str(args.repeat), "--only", args.only]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"{kind} benchmark worker failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_scale(scale: int, args, collect: bool) -> Dict[str, Any]:
+    from stub_api import StubAPI
+    from synth import synthetic_players, synthetic_teams, write_dataset
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix=f"okey-bench-{scale}x-") as tmp:
+        write_dataset(tmp, scale)
+        env = dict(os.environ, OKEY_STATS_DIR=tmp, OKEY_IMAGE_CACHE=os.path.join(tmp, ".imagecache"))
+        if not args.only.startswith("collector"):
+            results.update(_spawn("data", env, args))
+        runs = [name for name in ("collector.cold", "collector.warm") if name.startswith(args.only)]
+        if collect and runs:
+            players = synthetic_players(scale)
+            with StubAPI(players, synthetic_teams(), latency=args.latency) as stub:
+                out_dir = os.path.join(tmp, "collect")
+                os.makedirs(out_dir)
+                with open(os.path.join(out_dir, "teamsStats.json"), "w", encoding="utf-8") as fh:
+                    json.dump(synthetic_teams(), fh)
+                env.update(
+                    OKEY_STATS_DIR=out_dir,
+                    OKEY_API_BASE=stub.url,
+                    OKEY_RATE=str(args.rate),
+                    OKEY_BENCH_SEASON=str(stub.season),
+                )
+                # separate processes sharing out_dir: the warm run finds the
+                # cold run's HTTP cache on disk, like the next scheduled run
+                for name in runs:
+                    before = stub.requests
+                    found = _spawn("collector", env, argparse.Namespace(**dict(vars(args), only=name)))
+                    found[name]["requests"] = stub.requests - before
+                    results.update(found)
+    return {f"{name}[{scale}x]": summary for name, summary in results.items()}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print a median comparison table; returns the regressed benchmark names."""
+    regressed = []
+    print(f"{'benchmark':<36} {'median ms':>10} {'baseline':>10} {'ratio':>7}")
+    for name, summary in results.items():
+        base = baseline.get(name)
+        line = f"{name:<36} {summary['median'] * 1000:>10.2f}"
+        if base and base.get("median"):
+            ratio = summary["median"] / base["median"]
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressed.append(name)
+            elif ratio < 1 - tolerance:
+                flag = "  faster"
+            line += f" {base['median'] * 1000:>10.2f} {ratio:>7.2f}{flag}"
+        print(line)
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the okey benchmark suite")
+    parser.add_argument("--scales", default="1,10,100", help="Player dataset multipliers (default 1,10,100)")
+    parser.add_argument("--collector-scales", default="1", help="Scales the collector benchmark runs at (default 1)")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed iterations per benchmark")
+    parser.add_argument("--only", default="", help="Run only benchmarks whose name starts with this")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub API latency per request in seconds")
+    parser.add_argument("--rate", type=float, default=1000, help="Collector request rate against the stub")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=None, help=f"Results file to compare with (default {DEFAULT_BASELINE} when it exists)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write the results to {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--worker", choices=("data", "collector"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return worker(args)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    collector_scales = {int(s) for s in args.collector_scales.split(",") if s.strip()}
+    results: Dict[str, Any] = {}
+    for scale in scales:
+        print(f"Running {scale}x ...", file=sys.stderr)
+        results.update(run_scale(scale, args, scale in collector_scales))
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency": args.latency,
+        },
+        "results": results,
+    }
+    # read before --save-baseline overwrites it
+    baseline = {}
+    baseline_path = args.baseline or (DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE) else None)
+    if baseline_path:
+        try:
+            with open(baseline_path, "r", encoding="utf-8") as fh:
+                baseline = json.load(fh).get("results") or {}
+        except (OSError, ValueError) as e:
+            print(f"Cannot read baseline {baseline_path}: {e}", file=sys.stderr)
+
+    targets = [args.out] + ([DEFAULT_BASELINE] if args.save_baseline else [])
+    for path in targets:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    regressed = compare(results, baseline, args.tolerance)
+    if regressed:
+        print(f"{len(regressed)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""Local stand-in for the NHL API used by the collector benchmark.
+
+`StubAPI` serves `/standings/now`, `/roster/<abbr>/<season>` and
+`/player/<id>/landing` from a player list, on a free localhost port, and
+sleeps `latency` seconds before every response to mimic a remote API.
+Responses carry ETags, so conditional requests get 304s like the real API.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+ROSTER_GROUPS = {"G": "goalies", "D": "defensemen"}
+
+
+def _landing(p: Dict[str, Any], season: Any) -> Dict[str, Any]:
+    sub = {k: v for k, v in p.items() if isinstance(v, (int, float)) and not k.startswith("career")}
+    career = {k[6].lower() + k[7:]: v for k, v in p.items() if k.startswith("career") and isinstance(v, (int, float))}
+    return {
+        "position": p.get("position"),
+        "sweaterNumber": p.get("sweaterNumber"),
+        "birthDate": p.get("birthDate"),
+        "headshot": p.get("headshot"),
+        "heroImage": p.get("heroImage"),
+        "teamLogo": p.get("teamLogo"),
+        "featuredStats": {"season": int(season), "regularSeason": {"subSeason": sub, "career": career}},
+        "last5Games": p.get("last5Games") or [],
+    }
+
+
+class StubAPI:
+    """Threaded HTTP server answering collector requests from `players`."""
+
+    def __init__(self, players: List[Dict[str, Any]], teams: List[Dict[str, Any]], latency: float = 0.02,
+                 season: Optional[Any] = None):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.season = season or next((p.get("season") for p in players if p.get("season")), 20252026)
+        self.rosters: Dict[str, Dict[str, list]] = {}
+        self.landings: Dict[str, Dict[str, Any]] = {}
+        for p in players:
+            group = ROSTER_GROUPS.get(p.get("position"), "forwards")
+            first, _, last = str(p.get("name") or "").partition(" ")
+            roster = self.rosters.setdefault(p.get("team") or "", {"forwards": [], "defensemen": [], "goalies": []})
+            roster[group].append({
+                "id": p["id"],
+                "firstName": {"default": first},
+                "lastName": {"default": last},
+                "positionCode": p.get("position"),
+                "headshot": p.get("headshot"),
+            })
+            self.landings[str(p["id"])] = _landing(p, self.season)
+        self.standings = {"standings": [
+            {"teamAbbrev": {"default": t.get("abrev")}, "teamName": {"default": t.get("team")}, "seasonId": self.season}
+            for t in teams
+        ]}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def body(self, path: str) -> Optional[Any]:
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if parts[:2] == ["standings", "now"]:
+            return self.standings
+        if len(parts) >= 2 and parts[0] == "roster":
+            return self.rosters.get(parts[1], {})
+        if len(parts) >= 3 and parts[0] == "player" and parts[2] == "landing":
+            return self.landings.get(parts[1])
+        return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                data = stub.body(self.path)
+                if data is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                payload = json.dumps(data).encode("utf-8")
+                etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def __enter__(self) -> "StubAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
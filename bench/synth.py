@@ -0,0 +1,72 @@
+"""Synthetic datasets for the benchmarks.
+
+`synthetic_players(scale)` replicates the records of the real
+`stats/playerStats.json` `scale` times. Copies get new ids, names and
+nameKeys and have their counting stats jittered, so search, ranking and
+caching behave as they would on a bigger league rather than on duplicates.
+The output is deterministic for a given scale and seed.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SOURCE_DIR = os.path.join(REPO_ROOT, "stats")
+
+# counting stats scaled by a random factor on each copy
+JITTERED = ("gamesPlayed", "goals", "assists", "shots", "pim", "powerPlayGoals", "powerPlayPoints", "wins", "losses")
+ID_STRIDE = 10_000_000
+
+
+def _load(name: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(SOURCE_DIR, name), "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def synthetic_players(scale: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """The real player list repeated `scale` times with distinct identities."""
+    base = _load("playerStats.json")
+    if scale <= 1:
+        return base
+    rng = random.Random(seed)
+    out = list(base)
+    for copy_no in range(1, scale):
+        for p in base:
+            q = copy.deepcopy(p)
+            q["id"] = p["id"] + copy_no * ID_STRIDE
+            q["name"] = f"{p.get('name')} {copy_no}"
+            q["nameKey"] = f"{p.get('nameKey')}{copy_no}"
+            for stat in JITTERED:
+                if isinstance(q.get(stat), int):
+                    q[stat] = max(0, int(round(q[stat] * rng.uniform(0.5, 1.5))))
+            if "goals" in q and "assists" in q:
+                q["points"] = q["goals"] + q["assists"]
+            for game in q.get("last5Games") or []:
+                if isinstance(game, dict) and isinstance(game.get("goals"), int):
+                    game["goals"] = rng.choice((0, 0, 0, 1, 1, 2))
+                    game["points"] = game["goals"] + int(game.get("assists") or 0)
+            out.append(q)
+    return out
+
+
+def synthetic_teams() -> List[Dict[str, Any]]:
+    """The real standings; team count does not grow with the player scale."""
+    return _load("teamsStats.json")
+
+
+def write_dataset(directory: str, scale: int, seed: int = 1) -> Dict[str, str]:
+    """Write playerStats.json and teamsStats.json for `scale` into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "players": os.path.join(directory, "playerStats.json"),
+        "teams": os.path.join(directory, "teamsStats.json"),
+    }
+    with open(paths["players"], "w", encoding="utf-8") as fh:
+        json.dump(synthetic_players(scale, seed), fh, ensure_ascii=False, indent=2)
+    with open(paths["teams"], "w", encoding="utf-8") as fh:
+        json.dump(synthetic_teams(), fh, ensure_ascii=False, indent=4)
+    return paths
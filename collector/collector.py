@@ -1,19 +1,65 @@
 import requests
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
 import json
 import os
+import sys
+import threading
 import time
 import random
+import re
 import urllib.parse
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from requests.exceptions import RequestException
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 # Get the directory where this script is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-STATISTICS_DIR = os.path.join(BASE_DIR, "..", "stats")
+REPO_ROOT = os.path.abspath(os.path.join(BASE_DIR, ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from stats import boxscore, gamelog, history, live as live_state
+from stats.lookup import write_lookup
+from stats.snapshot import snapshot_path, write_snapshot
+
+STATISTICS_DIR = os.environ.get("OKEY_STATS_DIR") or os.path.join(BASE_DIR, "..", "stats")
 os.makedirs(STATISTICS_DIR, exist_ok=True)
 
+# Overridable so the collector can be pointed at a local stub server
+API_BASE = os.environ.get("OKEY_API_BASE", "https://api-web.nhle.com/v1").rstrip("/")
+
+# Concurrency and request budget shared by all fetch workers
+DEFAULT_CONCURRENCY = int(os.environ.get("OKEY_CONCURRENCY", "6"))
+DEFAULT_RATE = float(os.environ.get("OKEY_RATE", "8"))  # requests per second
+MAX_429_RETRIES = 5
+
+# On-disk cache of conditional-GET validators and bodies (set OKEY_HTTP_CACHE=0 to disable)
+HTTP_CACHE_DIR = os.path.join(STATISTICS_DIR, ".httpcache")
+LANDING_HASHES_FILE = os.path.join(HTTP_CACHE_DIR, "landingHashes.json")
+
+# Live mode poll intervals in seconds (see live())
+LIVE_FILE = os.path.join(STATISTICS_DIR, "live.json")
+LIVE_FAST_INTERVAL = float(os.environ.get("OKEY_LIVE_FAST", "5"))    # close games late in the 3rd, OT
+LIVE_INTERVAL = float(os.environ.get("OKEY_LIVE_INTERVAL", "15"))    # games in progress
+LIVE_SLOW_INTERVAL = float(os.environ.get("OKEY_LIVE_SLOW", "60"))   # intermissions, pre-game
+LIVE_IDLE_INTERVAL = 300                                             # longest wait for the first puck drop
+
+# An interrupted player collection resumes from its checkpoint (see
+# PlayerStaging) only within one run's cadence; the scheduler runs it daily
+STAGING_MAX_AGE = float(os.environ.get("OKEY_STAGING_MAX_AGE", str(24 * 3600)))  # seconds
+
+# Run telemetry (see Telemetry): the last run's summary, and one line per run
+RUN_SUMMARY_FILE = os.path.join(STATISTICS_DIR, "collectorRun.json")
+RUN_HISTORY_FILE = os.path.join(STATISTICS_DIR, "collectorRuns.jsonl")
+
+# Multi-season SQLite store every run is upserted into (see stats/history.py)
+HISTORY_DB = os.environ.get("OKEY_HISTORY_DB") or os.path.join(STATISTICS_DIR, "history.sqlite3")
+
 # Session with retry/backoff
 SESSION = requests.Session()
 SESSION.headers.update({
@@ -21,33 +67,473 @@ SESSION.headers.update({
     "Accept": "application/json, text/plain, */*",
 })
 
+# 429 is handled in safe_get so the back-off applies to every worker
 RETRY_STRATEGY = Retry(
     total=5,
     backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
+    status_forcelist=[500, 502, 503, 504],
     allowed_methods=["GET"],
     raise_on_status=False,
+    respect_retry_after_header=False,
 )
-ADAPTER = HTTPAdapter(max_retries=RETRY_STRATEGY)
+ADAPTER = HTTPAdapter(max_retries=RETRY_STRATEGY, pool_connections=4, pool_maxsize=32)
 SESSION.mount("https://", ADAPTER)
 SESSION.mount("http://", ADAPTER)
 
-def safe_get(url, timeout=10, quiet=False):
-    """Perform GET with shared session + retry"""
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate of all workers.
+
+    `rate` tokens are added per second up to `burst`; each request takes one.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+RATE_LIMITER = TokenBucket(DEFAULT_RATE, burst=DEFAULT_CONCURRENCY)
+
+
+@contextlib.contextmanager
+def rate_limit(rate, burst=1):
+    """Limit requests to `rate` per second inside the block.
+
+    RATE_LIMITER is replaced by a new bucket and the previous one is put back
+    on exit, so a run with its own rate does not change the rate of whatever
+    runs after it in the same process. A `rate` of None keeps the current one.
+    """
+    global RATE_LIMITER
+    if rate is None:
+        yield RATE_LIMITER
+        return
+    previous = RATE_LIMITER
+    RATE_LIMITER = TokenBucket(rate, burst=burst)
     try:
-        resp = SESSION.get(url, timeout=timeout)
-    except RequestException as e:
-        if not quiet:
-            print(f"Error fetching {url}: {e}")
+        yield RATE_LIMITER
+    finally:
+        RATE_LIMITER = previous
+
+# monotonic deadline set by a 429; every worker waits for it before fetching
+_PAUSE_LOCK = threading.Lock()
+_pause_until = 0.0
+
+
+def _retry_after(resp):
+    """Seconds requested by a Retry-After header, or None"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _pause_all(seconds):
+    global _pause_until
+    with _PAUSE_LOCK:
+        _pause_until = max(_pause_until, time.monotonic() + seconds)
+
+
+def _wait_for_pause():
+    while True:
+        delay = _pause_until - time.monotonic()
+        if delay <= 0:
+            return
+        time.sleep(delay)
+
+
+# API path -> endpoint type reported by Telemetry
+ENDPOINT_TYPES = (
+    (re.compile(r"^/standings/"), "standings"),
+    (re.compile(r"^/schedule/"), "schedule"),
+    (re.compile(r"^/roster/"), "roster"),
+    (re.compile(r"^/player/[^/]+/landing"), "landing"),
+    (re.compile(r"^/player/[^/]+/game-log/"), "game-log"),
+    (re.compile(r"^/gamecenter/[^/]+/boxscore"), "boxscore"),
+)
+LATENCY_SAMPLES = 10000  # per endpoint type; reservoir-sampled beyond that
+
+
+def endpoint_type(url):
+    path = url[len(API_BASE):] if url.startswith(API_BASE) else urllib.parse.urlparse(url).path
+    for pattern, name in ENDPOINT_TYPES:
+        if pattern.match(path):
+            return name
+    return "other"
+
+
+def _percentile(ordered, q):
+    if not ordered:
         return None
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Telemetry:
+    """Thread-safe accounting of every request made through safe_get.
+
+    Per endpoint type: requests sent, responses by status, transport errors,
+    304s and cache hits, bytes received, urllib3 retries (5xx) and 429
+    retries, latency percentiles, and the time workers spent waiting, both
+    on the token bucket (`rateWaitSeconds`) and in 429 back-offs
+    (`throttleSeconds`). Latency covers the whole SESSION.get call, i.e.
+    including urllib3's own retries and their back-off.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.endpoints = {}
+
+    def _entry(self, kind):
+        entry = self.endpoints.get(kind)
+        if entry is None:
+            entry = self.endpoints[kind] = {
+                "requests": 0, "errors": 0, "status": {}, "notModified": 0, "cacheHits": 0,
+                "bytes": 0, "retries": 0, "retries429": 0, "rateWaitSeconds": 0.0, "throttleSeconds": 0.0,
+                "latencies": [], "seen": 0,
+            }
+        return entry
+
+    def waited(self, kind, rate_wait=0.0, throttle=0.0):
+        with self.lock:
+            entry = self._entry(kind)
+            entry["rateWaitSeconds"] += rate_wait
+            entry["throttleSeconds"] += throttle
+
+    def request(self, kind, seconds, resp=None, error=False):
+        retries = 0
+        history = getattr(getattr(getattr(resp, "raw", None), "retries", None), "history", None)
+        if history:
+            retries = len(history)
+        with self.lock:
+            entry = self._entry(kind)
+            entry["requests"] += 1
+            entry["retries"] += retries
+            if error or resp is None:
+                entry["errors"] += 1
+            else:
+                code = str(resp.status_code)
+                entry["status"][code] = entry["status"].get(code, 0) + 1
+                if resp.status_code == 304:
+                    entry["notModified"] += 1
+                elif resp.status_code == 429:
+                    entry["retries429"] += 1
+                entry["bytes"] += len(resp.content or b"")
+            entry["seen"] += 1
+            samples = entry["latencies"]
+            if len(samples) < LATENCY_SAMPLES:
+                samples.append(seconds)
+            else:
+                slot = random.randrange(entry["seen"])
+                if slot < LATENCY_SAMPLES:
+                    samples[slot] = seconds
+
+    def cache_hit(self, kind):
+        with self.lock:
+            self._entry(kind)["cacheHits"] += 1
 
-    if resp.status_code == 429:
-        wait = 5 + random.random() * 5
+    def summary(self):
+        """Plain-dict report of everything recorded since the last reset."""
+        with self.lock:
+            endpoints = {}
+            totals = {"requests": 0, "errors": 0, "notModified": 0, "cacheHits": 0, "bytes": 0,
+                      "retries": 0, "retries429": 0, "rateWaitSeconds": 0.0, "throttleSeconds": 0.0}
+            for kind, entry in sorted(self.endpoints.items()):
+                ordered = sorted(entry["latencies"])
+                report = {k: v for k, v in entry.items() if k not in ("latencies", "seen")}
+                report["status"] = dict(sorted(entry["status"].items()))
+                report["rateWaitSeconds"] = round(entry["rateWaitSeconds"], 3)
+                report["throttleSeconds"] = round(entry["throttleSeconds"], 3)
+                report["latency"] = {
+                    "p50": _percentile(ordered, 0.50),
+                    "p90": _percentile(ordered, 0.90),
+                    "p99": _percentile(ordered, 0.99),
+                    "max": ordered[-1] if ordered else None,
+                    "mean": sum(ordered) / len(ordered) if ordered else None,
+                }
+                report["latency"] = {k: None if v is None else round(v, 4) for k, v in report["latency"].items()}
+                endpoints[kind] = report
+                for key in totals:
+                    totals[key] += entry[key]
+            totals["rateWaitSeconds"] = round(totals["rateWaitSeconds"], 3)
+            totals["throttleSeconds"] = round(totals["throttleSeconds"], 3)
+            finished = time.time()
+            return {
+                "startedAt": _utc_stamp(datetime.fromtimestamp(self.started, timezone.utc)),
+                "finishedAt": _utc_stamp(datetime.fromtimestamp(finished, timezone.utc)),
+                "wallSeconds": round(finished - self.started, 3),
+                "totals": totals,
+                "endpoints": endpoints,
+            }
+
+
+TELEMETRY = Telemetry()
+
+
+def write_run_summary(command, quiet=False, **extra):
+    """Write TELEMETRY's report to collectorRun.json and append it to collectorRuns.jsonl"""
+    report = dict(TELEMETRY.summary(), command=command, **extra)
+    try:
+        write_json_atomic(RUN_SUMMARY_FILE, report, indent=2)
+        with open(RUN_HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, separators=(",", ":")) + "\n")
+    except OSError as e:
+        if not quiet:
+            print(f"Unable to write run summary: {e}")
+    if not quiet:
+        t = report["totals"]
+        print(f"Requests: {t['requests']} ({t['notModified']} not modified, {t['errors']} errors, "
+              f"{t['retries']} retries, {t['retries429']} throttled), {t['bytes'] / 1e6:.1f} MB, "
+              f"waited {t['rateWaitSeconds']:.1f}s on the rate limit and {t['throttleSeconds']:.1f}s on 429s")
+    return report
+
+
+class HttpCache:
+    """ETag/Last-Modified cache of GET responses stored under `directory`.
+
+    Each URL maps to `<sha1>.json` (validators) and `<sha1>.body` (payload).
+    Files are written atomically so concurrent workers and interrupted runs
+    never leave a torn entry behind.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".body"
+
+    def validators(self, url):
+        """Conditional request headers for `url`, empty if nothing is cached"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not os.path.exists(body_path):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("lastModified"):
+            headers["If-Modified-Since"] = meta["lastModified"]
+        return headers
+
+    def load(self, url):
+        """Rebuild a 200 Response from the cached entry for `url`"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp._content = body
+        resp.encoding = meta.get("encoding")
+        resp.headers["Content-Type"] = meta.get("contentType") or "application/json"
+        resp.from_cache = True
+        return resp
+
+    def store(self, url, resp):
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        meta_path, body_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "lastModified": last_modified,
+            "encoding": resp.encoding,
+            "contentType": resp.headers.get("Content-Type"),
+        }
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            f.write(resp.content)
+        os.replace(body_path + suffix, body_path)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+
+
+HTTP_CACHE = HttpCache(HTTP_CACHE_DIR) if os.environ.get("OKEY_HTTP_CACHE", "1") != "0" else None
+
+
+def safe_get(url, timeout=10, quiet=False, cache=False):
+    """Perform GET with shared session + retry
+
+    Requests go through the shared token bucket. On HTTP 429 all workers pause
+    for the server's Retry-After (or 5-10s) before the request is retried.
+
+    With `cache=True` the request is made conditional on the validators of the
+    last cached response; a 304 is answered from HTTP_CACHE as a 200 whose
+    `from_cache` attribute is True.
+    """
+    use_cache = cache and HTTP_CACHE is not None
+    headers = HTTP_CACHE.validators(url) if use_cache else None
+    kind = endpoint_type(url)
+    for attempt in range(MAX_429_RETRIES + 1):
+        t0 = time.perf_counter()
+        _wait_for_pause()
+        t1 = time.perf_counter()
+        RATE_LIMITER.acquire()
+        t2 = time.perf_counter()
+        TELEMETRY.waited(kind, rate_wait=t2 - t1, throttle=t1 - t0)
+        try:
+            resp = SESSION.get(url, timeout=timeout, headers=headers)
+        except RequestException as e:
+            TELEMETRY.request(kind, time.perf_counter() - t2, error=True)
+            if not quiet:
+                print(f"Error fetching {url}: {e}")
+            return None
+        TELEMETRY.request(kind, time.perf_counter() - t2, resp)
+
+        if use_cache and resp.status_code == 304:
+            cached = HTTP_CACHE.load(url)
+            if cached is not None:
+                TELEMETRY.cache_hit(kind)
+                return cached
+            # cache entry vanished; fetch the full body instead
+            headers = None
+            continue
+        if use_cache and resp.status_code == 200:
+            try:
+                HTTP_CACHE.store(url, resp)
+            except OSError as e:
+                if not quiet:
+                    print(f"Unable to cache {url}: {e}")
+
+        if resp.status_code != 429 or attempt == MAX_429_RETRIES:
+            return resp
+        wait = _retry_after(resp)
+        if wait is None:
+            wait = 5 + random.random() * 5
         if not quiet:
             print(f"HTTP 429 for {url} — backing off {wait:.1f}s")
-        time.sleep(wait)
+        _pause_all(wait)
     return resp
 
+def write_json_atomic(path, data, **dump_kwargs):
+    """Write `data` as JSON to a temp file and move it over `path`
+
+    Readers (the Flask app) only ever see the old or the new file. The temp
+    name carries the process and thread, so concurrent writers of one path
+    (scheduler jobs, live mode, the CLI) never share it.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class PlayerStaging:
+    """Append-only JSON Lines staging file with a per-team checkpoint
+
+    Records of a team are appended and fsynced, then the checkpoint is
+    rewritten atomically with the team abbreviation and the staging file
+    size. On resume, anything written after the last checkpoint (a team that
+    was cut short) is truncated away and completed teams are skipped.
+
+    A checkpoint of another season, or one whose run started more than
+    `max_age` seconds ago, is discarded: its teams' records are too old to
+    be merged with fresh ones, so the run starts over.
+    """
+
+    def __init__(self, directory, season_id, resume=True, max_age=STAGING_MAX_AGE):
+        self.path = os.path.join(directory, "playerStats.staging.jsonl")
+        self.checkpoint_path = os.path.join(directory, "playerStats.checkpoint.json")
+        self.season_id = str(season_id)
+        self.completed = []
+        self.started = time.time()
+        size = 0
+        if resume:
+            checkpoint = self._read_checkpoint() or {}
+            started = float(checkpoint.get("started") or 0)
+            if (checkpoint.get("season") == self.season_id and os.path.exists(self.path)
+                    and self.started - started <= max_age):
+                self.completed = list(checkpoint.get("completed") or [])
+                self.started = started
+                size = int(checkpoint.get("size") or 0)
+        if not self.completed:
+            size = 0
+        # drop anything after the last checkpoint (or everything when fresh)
+        with open(self.path, "ab") as f:
+            f.truncate(size)
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_team(self, abbr, records):
+        for record in records:
+            self._fh.write(json.dumps(record, ensure_ascii=False))
+            self._fh.write("\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.completed.append(abbr)
+        write_json_atomic(self.checkpoint_path, {
+            "season": self.season_id,
+            "started": self.started,
+            "completed": self.completed,
+            "size": self._fh.tell(),
+        })
+
+    def records(self):
+        self._fh.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def close(self, remove=False):
+        self._fh.close()
+        if remove:
+            for path in (self.path, self.checkpoint_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
 def stats(standings_date=None, game_type_id=2, wildcard_indicator=True, quiet=False):
     """Fetch comprehensive team standings with ALL available statistics"""
     params = {
@@ -57,7 +543,7 @@ def stats(standings_date=None, game_type_id=2, wildcard_indicator=True, quiet=Fa
     if standings_date:
         params['standingsDateTimeUtc'] = standings_date
     
-    url = 'https://api-web.nhle.com/v1/standings/now'
+    url = f'{API_BASE}/standings/now'
     if params:
         url += f"?{urllib.parse.urlencode(params)}"
     
@@ -183,15 +669,19 @@ def stats(standings_date=None, game_type_id=2, wildcard_indicator=True, quiet=Fa
         }
         equipes_stats.append(equipe_info)
 
-    with open(os.path.join(STATISTICS_DIR, "teamsStats.json"), "w", encoding="utf-8") as f:
-        json.dump(equipes_stats, f, ensure_ascii=False, indent=4)
+    teams_file = os.path.join(STATISTICS_DIR, "teamsStats.json")
+    write_json_atomic(teams_file, equipes_stats, ensure_ascii=False, indent=4)
+    write_snapshot(equipes_stats, snapshot_path(teams_file))
+    write_lookup(STATISTICS_DIR, teams=equipes_stats)
+    record_history(teams=equipes_stats, quiet=quiet)
     
     if not quiet:
         print(f"Updated {len(equipes_stats)} teams with 70+ statistics fields")
+    return equipes_stats
 
 def today_schedule(quiet=False):
     """Fetch today's game schedule"""
-    url = 'https://api-web.nhle.com/v1/schedule/now'
+    url = f'{API_BASE}/schedule/now'
     response = safe_get(url, quiet=quiet)
     if not response or response.status_code != 200:
         if not quiet:
@@ -213,6 +703,8 @@ def today_schedule(quiet=False):
         if day.get("date") == today_str:
             for game in day.get("games", []):
                 game_info = {
+                    "id": game.get("id"),
+                    "gameState": game.get("gameState"),
                     "date": day.get("date"),
                     "venue": game.get("venue", {}).get("default"),
                     "startTimeUTC": game.get("startTimeUTC"),
@@ -229,16 +721,16 @@ def today_schedule(quiet=False):
                 }
                 today_games.append(game_info)
 
-    with open(os.path.join(STATISTICS_DIR, "todayGames.json"), "w", encoding="utf-8") as f:
-        json.dump(today_games, f, indent=2, ensure_ascii=False)
+    write_json_atomic(os.path.join(STATISTICS_DIR, "todayGames.json"), today_games, indent=2, ensure_ascii=False)
     
     if not quiet:
         print(f"{len(today_games)} game(s) saved to todayGames.json")
+    return today_games
 
 def team_players(abbr, season_id):
     """Get team roster"""
-    url = f"https://api-web.nhle.com/v1/roster/{abbr}/{season_id}"
-    response = safe_get(url, timeout=10)
+    url = f"{API_BASE}/roster/{abbr}/{season_id}"
+    response = safe_get(url, timeout=10, cache=True)
     if not response or response.status_code != 200:
         return []
     try:
@@ -262,17 +754,44 @@ def team_players(abbr, season_id):
             informations.append(player_info)
     return informations
 
-def player_stats(player_id, season_id):
-    """Get comprehensive player statistics"""
-    url = f"https://api-web.nhle.com/v1/player/{player_id}/landing"
-    response = safe_get(url, timeout=10)
+def player_stats(player_id, season_id, hashes=None, past=None):
+    """Get comprehensive player statistics
+
+    `hashes` maps player ids to the content hash of their last landing payload
+    and the stats extracted from it; when the payload is unchanged the stored
+    stats are returned without re-parsing. The dict is updated in place.
+    When `past` is a dict, the player's earlier seasons (landing_seasons) are
+    stored in it under the player id.
+    """
+    url = f"{API_BASE}/player/{player_id}/landing"
+    response = safe_get(url, timeout=10, cache=True)
     if not response or response.status_code != 200:
         return None
+
+    digest = None
+    if hashes is not None:
+        digest = hashlib.sha256(response.content).hexdigest()
+        known = hashes.get(str(player_id))
+        if known and known.get("hash") == digest:
+            if past is not None:
+                past[player_id] = known["seasons"]
+            return known["stats"]
+
     try:
         data = response.json()
     except ValueError:
         return None
 
+    result = landing_stats(data)
+    seasons = landing_seasons(data)
+    if past is not None:
+        past[player_id] = seasons
+    if hashes is not None:
+        hashes[str(player_id)] = {"hash": digest, "stats": result, "seasons": seasons}
+    return result
+
+def landing_stats(data):
+    """Extract the stats we keep from a player landing payload"""
     featured_season = data.get("featuredStats", {}).get("season")
     position = data["position"].get("code", "").upper() if isinstance(data.get("position"), dict) else str(data.get("position", "")).upper()
 
@@ -341,70 +860,560 @@ def player_stats(player_id, season_id):
         "last5Games": data.get("last5Games", []),
     }
 
-def collect_all_player_stats(season_id, quiet=False):
-    """Collect stats for all players across all teams"""
+# seasonTotals fields summed over the teams of a season / averaged by games
+SEASON_TOTALS_SUMMED = (
+    "gamesPlayed", "goals", "assists", "points", "plusMinus", "shots", "pim", "powerPlayGoals",
+    "powerPlayPoints", "shorthandedGoals", "shorthandedPoints", "gameWinningGoals", "otGoals",
+    "wins", "losses", "otLosses", "shutouts",
+)
+SEASON_TOTALS_AVERAGED = ("goalsAgainstAvg", "savePctg")
+
+def landing_seasons(data):
+    """Earlier NHL regular seasons from a landing payload's seasonTotals
+
+    One totals dict per season, oldest first, shaped like the playerStats
+    fields (a season split across teams is summed; `teamName` is the last
+    team). The featured season is left out: the collection itself covers it.
+    """
+    featured = str(data.get("featuredStats", {}).get("season"))
+    by_season = {}
+    for entry in data.get("seasonTotals") or []:
+        if not isinstance(entry, dict) or entry.get("leagueAbbrev") != "NHL" or entry.get("gameTypeId") != 2:
+            continue
+        season = entry.get("season")
+        if season is None or str(season) == featured:
+            continue
+        by_season.setdefault(season, []).append(entry)
+
+    out = []
+    for season in sorted(by_season):
+        entries = by_season[season]
+        totals = {"season": season}
+        for field in SEASON_TOTALS_SUMMED:
+            if any(field in e for e in entries):
+                totals[field] = sum(e.get(field) or 0 for e in entries)
+        gp = totals.get("gamesPlayed") or 0
+        for field in SEASON_TOTALS_AVERAGED:
+            if gp and any(field in e for e in entries):
+                totals[field] = round(sum((e.get(field) or 0) * (e.get("gamesPlayed") or 0) for e in entries) / gp, 4)
+        if "shots" in totals:
+            totals["shootingPctg"] = round(totals.get("goals", 0) / totals["shots"], 6) if totals["shots"] else 0
+        name = entries[-1].get("teamName")
+        totals["teamName"] = name.get("default") if isinstance(name, dict) else name
+        out.append(totals)
+    return out
+
+def backfill_history(records, past, teams=None, quiet=False):
+    """Store the earlier seasons gathered by player_stats in HISTORY_DB
+
+    `past` maps player ids to landing_seasons() lists; `records` supplies the
+    name, nameKey and position. Rows that already exist are kept, since a
+    season collected while it was current is at least as complete. A failure
+    is reported but does not fail the run.
+    """
+    abbrevs = {t.get("team"): t.get("abrev") for t in teams or [] if isinstance(t, dict)}
+    rows = []
+    for record in records:
+        for totals in past.get(record.get("id")) or []:
+            rows.append({
+                "id": record.get("id"),
+                "name": record.get("name"),
+                "nameKey": record.get("nameKey"),
+                "position": record.get("position"),
+                "team": abbrevs.get(totals.get("teamName")),
+                **totals,
+            })
+    if not rows:
+        return 0
+    try:
+        conn = history.connect(HISTORY_DB)
+        try:
+            n = history.upsert_player_seasons(conn, rows, replace=False)
+        finally:
+            conn.close()
+    except Exception as e:
+        if not quiet:
+            print(f"History backfill failed: {e}")
+        return 0
+    if not quiet:
+        print(f"History: {n} earlier player seasons checked for backfill")
+    return n
+
+def load_landing_hashes():
+    """Load the per-player landing content hashes from the previous run"""
+    try:
+        with open(LANDING_HASHES_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_landing_hashes(hashes):
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    write_json_atomic(LANDING_HASHES_FILE, hashes, ensure_ascii=False)
+
+def _player_record(player, abbr, season_id, required_season, is_current, hashes=None, past=None):
+    """Fetch one roster entry's landing page and build its playerStats record"""
+    stats_data = player_stats(player["id"], season_id, hashes=hashes, past=past)
+    if not stats_data:
+        return None
+
+    stats_season = stats_data.get("season")
+    if str(stats_season) != required_season:
+        return None
+
+    gp = stats_data.get("gamesPlayed", 0)
+    if not is_current and gp == 0:
+        return None
+
+    headshot = stats_data.get("headshot") or player.get("headshot") or ""
+
+    # FIXED: Store both original name and lookup key
+    original_name = player.get("name")
+    name_key = original_name.lower().replace(" ", "") if original_name else ""
+
+    return {
+        "id": player.get("id"),
+        "name": original_name,  # "Gavin Brindley" (for display)
+        "nameKey": name_key,    # "gavinbrindley" (for CLI lookup)
+        "team": abbr,
+        "position": player.get("position"),
+        **stats_data,
+        "headshot": headshot,
+        # games that started before this are in the landing totals already
+        "syncedAt": _utc_stamp(),
+    }
+
+def collect_all_player_stats(season_id, quiet=False, concurrency=None, rate=None, resume=True):
+    """Collect stats for all players across all teams
+
+    Rosters and landing pages are fetched by a pool of `concurrency` worker
+    threads sharing SESSION. `rate` (requests/second) replaces the global
+    token bucket for this run only (see rate_limit); output order is the same
+    as a sequential run.
+
+    Requests are conditional (see HttpCache) and landing payloads whose
+    content hash matches the previous run are not re-processed.
+
+    Records are streamed to a staging file team by team (see PlayerStaging);
+    with `resume` an interrupted run continues after the last completed team.
+    playerStats.json is only replaced, atomically, once every team is done.
+
+    Landing pages only carry the current season's full stats, but their
+    seasonTotals list every earlier season; those are backfilled into the
+    history store (backfill_history) so careers reach back before the first
+    collection.
+    """
+    concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+    with rate_limit(rate, burst=concurrency):
+        return _collect_all_player_stats(season_id, quiet, concurrency, resume)
+
+def _collect_all_player_stats(season_id, quiet, concurrency, resume):
+    started_at = _utc_stamp()
     teams_file = os.path.join(STATISTICS_DIR, "teamsStats.json")
     if not os.path.exists(teams_file):
         if not quiet:
             print("teamsStats.json not found — run stats() first")
         return
 
-    REQUIRED_SEASON = "20252026"
+    # landing pages only carry the latest season's featuredStats
+    required_season = str(season_id)
     current_season = reg_season()
     is_current = (str(season_id) == str(current_season))
 
     with open(teams_file, "r", encoding="utf-8") as f:
         teams = json.load(f)
 
-    all_players = []
-    for team in teams:
-        abbr = team.get("abrev")
-        if not abbr:
+    abbrs = [team.get("abrev") for team in teams if team.get("abrev")]
+
+    staging = PlayerStaging(STATISTICS_DIR, season_id, resume=resume)
+    if staging.completed and not quiet:
+        print(f"Resuming after {len(staging.completed)} completed team(s)")
+    pending = [abbr for abbr in abbrs if abbr not in staging.completed]
+
+    hashes = load_landing_hashes() if HTTP_CACHE is not None else None
+    previous = {k: v.get("hash") for k, v in (hashes or {}).items()}
+    past = {}  # player id -> earlier seasons, for the history backfill
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            rosters = pool.map(lambda abbr: team_players(abbr, season_id), pending)
+            team_futures = []
+            for abbr, players in zip(pending, rosters):
+                if not quiet:
+                    print(f"Fetching players for {abbr}...")
+                team_futures.append((abbr, [
+                    pool.submit(_player_record, player, abbr, season_id, required_season, is_current, hashes, past)
+                    for player in players
+                ]))
+            for abbr, futures in team_futures:
+                staging.write_team(abbr, [info for info in (fut.result() for fut in futures) if info])
+    finally:
+        if hashes is not None:
+            save_landing_hashes(hashes)
+
+    all_players = staging.records()
+
+    if not quiet:
+        print(f"Total players collected: {len(all_players)}")
+        if hashes is not None:
+            changed = sum(1 for k, v in hashes.items() if previous.get(k) != v.get("hash"))
+            print(f"Landing pages changed since last run: {changed}")
+    
+    players_file = os.path.join(STATISTICS_DIR, "playerStats.json")
+    write_json_atomic(players_file, all_players, ensure_ascii=False, indent=2)
+    # compact columnar copy for fast readers (see stats/snapshot.py)
+    write_snapshot(all_players, snapshot_path(players_file))
+    # per-record lookup file for okey.py (see stats/lookup.py)
+    write_lookup(STATISTICS_DIR, players=all_players)
+    record_history(players=all_players, season_id=season_id, synced_at=started_at, quiet=quiet)
+    backfill_history(all_players, past, teams=teams, quiet=quiet)
+    staging.close(remove=True)
+    return all_players
+
+def refresh_teams(abbrs, season_id, quiet=False, concurrency=None):
+    """Re-fetch the players of some teams and merge them into playerStats.json
+
+    Used after a team's game ends: only its roster and landing pages are
+    fetched. The teams' records replace their previous block in the file,
+    which keeps its order; other teams are untouched. Returns the new
+    records, or None when there is no playerStats.json to merge into yet.
+    """
+    players_file = os.path.join(STATISTICS_DIR, "playerStats.json")
+    try:
+        with open(players_file, "r", encoding="utf-8") as f:
+            players = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    abbrs = [a for a in dict.fromkeys(abbrs) if a]
+    concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+    is_current = str(season_id) == str(reg_season())
+    hashes = load_landing_hashes() if HTTP_CACHE is not None else None
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            rosters = list(pool.map(lambda abbr: team_players(abbr, season_id), abbrs))
+            futures = {
+                abbr: [pool.submit(_player_record, player, abbr, season_id, str(season_id), is_current, hashes)
+                       for player in roster]
+                for abbr, roster in zip(abbrs, rosters)
+                if roster  # a failed roster fetch keeps the team's previous records
+            }
+            fresh = {abbr: [r for r in (fut.result() for fut in futs) if r] for abbr, futs in futures.items()}
+    finally:
+        if hashes is not None:
+            save_landing_hashes(hashes)
+
+    merged, placed = [], set()
+    for p in players:
+        team = p.get("team")
+        if team in fresh:
+            if team not in placed:
+                merged.extend(fresh[team])
+                placed.add(team)
             continue
-        
+        merged.append(p)
+    for abbr in fresh:
+        if abbr not in placed:
+            merged.extend(fresh[abbr])
+
+    write_json_atomic(players_file, merged, ensure_ascii=False, indent=2)
+    write_snapshot(merged, snapshot_path(players_file))
+    write_lookup(STATISTICS_DIR, players=merged)
+    updated = [r for records in fresh.values() for r in records]
+    record_history(players=updated, season_id=season_id, quiet=quiet)
+    if not quiet:
+        print(f"Refreshed {len(updated)} player(s) of {', '.join(fresh) or 'no team'}")
+    return updated
+
+def _utc_stamp(when=None):
+    return (when or datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _synced_key(season_id):
+    return f"players_synced_at:{season_id}"
+
+def record_history(teams=None, players=None, season_id=None, synced_at=None, quiet=False):
+    """Bulk-upsert a standings snapshot and/or a season's players into HISTORY_DB
+
+    `synced_at` records when the landing pages behind `players` were fetched
+    (see collect_box_scores). A failure is reported but does not fail the
+    run; the JSON files are already written.
+    """
+    try:
+        conn = history.connect(HISTORY_DB)
+        try:
+            if teams:
+                n = history.upsert_standings(conn, teams)
+                if not quiet:
+                    print(f"History: stored standings snapshot ({n} teams)")
+            if players:
+                n = history.upsert_player_seasons(conn, players, season_id=season_id)
+                if synced_at:
+                    history.set_state(conn, _synced_key(season_id), synced_at)
+                if not quiet:
+                    print(f"History: stored {n} player seasons for {season_id}")
+        finally:
+            conn.close()
+    except Exception as e:
+        if not quiet:
+            print(f"History store update failed: {e}")
+
+def player_game_log(player_id, season_id, game_type_id=2):
+    """Get a player's game-by-game log for a season (most recent game first)"""
+    url = f"{API_BASE}/player/{player_id}/game-log/{season_id}/{game_type_id}"
+    response = safe_get(url, timeout=10, cache=True)
+    if not response or response.status_code != 200:
+        return None
+    try:
+        return response.json().get("gameLog", [])
+    except (ValueError, AttributeError):
+        return None
+
+def collect_game_logs(season_id, players, quiet=False, concurrency=None):
+    """Ingest new games from the players' game logs into HISTORY_DB
+
+    Only players whose season gamesPlayed differs from the number of games
+    already stored are fetched, and only games not stored yet are ingested
+    (see stats/gamelog.py), so a nightly run touches the players who played.
+    """
+    concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+    conn = history.connect(HISTORY_DB)
+    try:
+        stored = gamelog.stored_counts(conn, int(season_id))
+        pending = [
+            p["id"] for p in players or []
+            if p.get("id") is not None and stored.get(int(p["id"]), 0) != (p.get("gamesPlayed") or 0)
+        ]
+        if not quiet:
+            print(f"Fetching game logs for {len(pending)} player(s)...")
+        added = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {pool.submit(player_game_log, pid, season_id): pid for pid in pending}
+            # sqlite has a single writer: ingest from this thread as logs arrive
+            for fut in concurrent.futures.as_completed(futures):
+                games = fut.result()
+                if games:
+                    added += gamelog.ingest_games(conn, futures[fut], season_id, games)
         if not quiet:
-            print(f"Fetching players for {abbr}...")
-        
-        players = team_players(abbr, season_id)
-        
-        for player in players:
-            time.sleep(0.12 + random.random() * 0.08)
-            stats_data = player_stats(player["id"], season_id)
-            if not stats_data:
+            print(f"Game logs: {added} new game(s) stored")
+        return added
+    finally:
+        conn.close()
+
+def schedule_games(start_date, end_date, quiet=False):
+    """Games scheduled between two dates (inclusive), one schedule fetch per week"""
+    games = []
+    day = start_date
+    while day <= end_date:
+        response = safe_get(f"{API_BASE}/schedule/{day.isoformat()}", quiet=quiet)
+        try:
+            data = response.json() if response is not None and response.status_code == 200 else None
+        except ValueError:
+            data = None
+        if not data:
+            if not quiet:
+                print(f"Error fetching schedule for week of {day}")
+            day += timedelta(days=7)
+            continue
+        for week_day in data.get("gameWeek", []):
+            try:
+                when = date.fromisoformat(week_day.get("date", ""))
+            except ValueError:
                 continue
+            if start_date <= when <= end_date:
+                for game in week_day.get("games", []):
+                    games.append(dict(game, gameDate=week_day.get("date")))
+        try:
+            following = date.fromisoformat(data.get("nextStartDate") or "")
+        except ValueError:
+            following = None
+        day = following if following and following > day else day + timedelta(days=7)
+    return games
+
+def box_score(game_id, cache=True):
+    """Get the box score of one game"""
+    response = safe_get(f"{API_BASE}/gamecenter/{game_id}/boxscore", timeout=10, cache=cache)
+    if not response or response.status_code != 200:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+def collect_box_scores(start_date=None, end_date=None, season_id=None, quiet=False, concurrency=None):
+    """Update player totals from the box scores of final games
+
+    Final regular-season games between `start_date` and `end_date` (default:
+    yesterday and today) whose box score is not stored yet are fetched by a
+    pool of workers over the shared SESSION, about 16 requests for a night of
+    games instead of a landing page per player. Every line is ingested into
+    the game logs and rolling aggregates (stats/gamelog.py). Games that
+    started after a record's last landing refresh (its `syncedAt`, else the
+    players_synced_at watermark or playerStats.json's mtime) are also added
+    to the playerStats records of the season (stats/boxscore.py); earlier
+    games are already counted.
+    """
+    season_id = str(season_id or reg_season())
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=1)
+    concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
 
-            stats_season = stats_data.get("season")
-            if str(stats_season) != REQUIRED_SEASON:
+    games = [
+        g for g in schedule_games(start_date, end_date, quiet=quiet)
+        if g.get("gameState") in boxscore.FINAL_STATES and g.get("gameType") == 2
+    ]
+    players_file = os.path.join(STATISTICS_DIR, "playerStats.json")
+    conn = history.connect(HISTORY_DB)
+    try:
+        known = history.known_box_scores(conn, [g.get("id") for g in games])
+        games = sorted((g for g in games if g.get("id") not in known), key=lambda g: (g.get("startTimeUTC") or "", g.get("id")))
+        if not quiet:
+            print(f"Fetching {len(games)} box score(s) ({len(known)} already stored)...")
+        if not games:
+            return 0
+
+        synced_at = history.get_state(conn, _synced_key(season_id))
+        if synced_at is None and os.path.exists(players_file):
+            synced_at = _utc_stamp(datetime.fromtimestamp(os.path.getmtime(players_file), timezone.utc))
+
+        try:
+            with open(players_file, "r", encoding="utf-8") as f:
+                players = json.load(f)
+        except (OSError, ValueError):
+            players = []
+        by_id = {p.get("id"): p for p in players if isinstance(p, dict) and str(p.get("season")) == season_id}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            boxes = list(pool.map(lambda g: box_score(g["id"]), games))
+
+        fetched, changed, unknown = [], {}, set()
+        for game, box in zip(games, boxes):
+            if not box:
                 continue
+            fetched.append(box)
+            started = game.get("startTimeUTC") or ""
+            for line in boxscore.player_lines(box):
+                record = by_id.get(line["playerId"])
+                if record is None:
+                    unknown.add(line["playerId"])
+                    continue
+                # per record: refresh_teams re-syncs some teams between full runs
+                since = record.get("syncedAt") or synced_at
+                counts = since is None or started > since
+                if counts and str(box.get("season")) == season_id and boxscore.apply_line(record, line):
+                    changed[record["id"]] = record
+
+        if changed:
+            write_json_atomic(players_file, players, ensure_ascii=False, indent=2)
+            write_snapshot(players, snapshot_path(players_file))
+            write_lookup(STATISTICS_DIR, players=players)
+            history.upsert_player_seasons(conn, changed.values(), season_id=season_id)
 
-            gp = stats_data.get("gamesPlayed", 0)
-            if not is_current and gp == 0:
+        # box scores are marked stored only once the totals above are on disk
+        for box in fetched:
+            for line in boxscore.player_lines(box):
+                if boxscore.played(line):
+                    gamelog.ingest_games(conn, line["playerId"], box.get("season"), [boxscore.game_log_entry(line)])
+            with conn:
+                history.store_box_score(conn, box)
+
+        if not quiet:
+            print(f"Box scores: {len(fetched)} game(s), {len(changed)} player record(s) updated")
+            if unknown:
+                print(f"{len(unknown)} player(s) not in playerStats.json; the next full collection adds them")
+        return len(fetched)
+    finally:
+        conn.close()
+
+def _live_interval(states, upcoming):
+    """Seconds until the next live poll, from the state of the games"""
+    if not states:
+        if not upcoming:
+            return None
+        now = datetime.now(timezone.utc)
+        starts = []
+        for game in upcoming:
+            try:
+                starts.append(datetime.fromisoformat(game["startTimeUTC"].replace("Z", "+00:00")))
+            except (KeyError, AttributeError, ValueError):
                 continue
+        wait = (min(starts) - now).total_seconds() if starts else LIVE_IDLE_INTERVAL
+        return min(max(wait, LIVE_SLOW_INTERVAL), LIVE_IDLE_INTERVAL)
+    interval = LIVE_SLOW_INTERVAL
+    for state in states:
+        if state.get("intermission"):
+            continue
+        close = abs(state["home"]["score"] - state["away"]["score"]) <= 1
+        late = state.get("period", 0) >= 4 or (state.get("period") == 3 and (state.get("clock") or "99:99") < "05:00")
+        interval = min(interval, LIVE_FAST_INTERVAL if state.get("gameState") == "CRIT" or (close and late) else LIVE_INTERVAL)
+    return interval
 
-            headshot = stats_data.get("headshot") or player.get("headshot") or ""
-            
-            # FIXED: Store both original name and lookup key
-            original_name = player.get("name")
-            name_key = original_name.lower().replace(" ", "") if original_name else ""
-            
-            player_info = {
-                "id": player.get("id"),
-                "name": original_name,  # "Gavin Brindley" (for display)
-                "nameKey": name_key,    # "gavinbrindley" (for CLI lookup)
-                "team": abbr,
-                "position": player.get("position"),
-                **stats_data,
-                "headshot": headshot,
-            }
-            all_players.append(player_info)
+def live(quiet=False, once=False):
+    """Poll the games in progress and publish their deltas to live.json
 
-        time.sleep(0.6 + random.random() * 0.6)
+    Today's games come from today_schedule(); only those in a live state
+    have their box score fetched. Each poll is diffed against the last known
+    state (stats/live.py) and live.json is rewritten only when something
+    changed; the app streams those events to browsers. The interval adapts
+    to the games (see _live_interval) and the loop ends once every game of
+    the day is final.
+    """
+    try:
+        with open(LIVE_FILE, "r", encoding="utf-8") as f:
+            log = live_state.LiveLog(json.load(f))
+    except (OSError, ValueError):
+        log = live_state.LiveLog()
 
-    if not quiet:
-        print(f"Total players collected: {len(all_players)}")
-    
-    with open(os.path.join(STATISTICS_DIR, "playerStats.json"), "w", encoding="utf-8") as f:
-        json.dump(all_players, f, ensure_ascii=False, indent=2)
+    schedule, schedule_at, schedule_failed = None, 0.0, False
+    while True:
+        # the schedule is only needed to find games that are about to start
+        if schedule is None or time.monotonic() - schedule_at > LIVE_IDLE_INTERVAL or not any(
+            g.get("gameState") in live_state.LIVE_STATES for g in schedule
+        ):
+            fresh = today_schedule(quiet=True)
+            schedule_at = time.monotonic()
+            schedule_failed = fresh is None
+            if schedule_failed:
+                # keep what we knew and try again after LIVE_SLOW_INTERVAL
+                schedule = schedule or []
+                schedule_at -= LIVE_IDLE_INTERVAL - LIVE_SLOW_INTERVAL
+            else:
+                schedule = fresh
+                today_ids = {str(g.get("id")) for g in schedule}
+                log.games = {gid: st for gid, st in log.games.items() if gid in today_ids}
+
+        in_progress = [g for g in schedule if g.get("gameState") in live_state.LIVE_STATES]
+        fetched = []
+        if in_progress:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(in_progress), DEFAULT_CONCURRENCY)) as pool:
+                # keep each box with its game: a failed fetch must not shift the others
+                boxes = pool.map(lambda g: box_score(g["id"], cache=False), in_progress)
+                fetched = [(g, b) for g, b in zip(in_progress, boxes) if b]
+        states = []
+        for game, box in fetched:
+            state = live_state.game_state(box)
+            game["gameState"] = state.get("gameState") or game.get("gameState")
+            states.append(state)
+
+        events = log.update(states)
+        if events:
+            write_json_atomic(LIVE_FILE, log.to_json(), ensure_ascii=False, separators=(",", ":"))
+            if not quiet:
+                for event in events:
+                    print(f"[live] game {event['gameId']}: {', '.join(event['changes'])}")
+
+        upcoming = [g for g in schedule if g.get("gameState") not in live_state.FINAL_STATES + live_state.LIVE_STATES]
+        interval = _live_interval([s for s in states if s.get("gameState") in live_state.LIVE_STATES], upcoming)
+        if len(fetched) < len(in_progress):
+            # a game whose box score failed is still being played
+            interval = min(interval or LIVE_INTERVAL, LIVE_INTERVAL)
+        elif schedule_failed:
+            interval = min(interval or LIVE_SLOW_INTERVAL, LIVE_SLOW_INTERVAL)
+        if once or interval is None:
+            if not quiet and interval is None:
+                print("[live] no game in progress or to come today")
+            return log
+        time.sleep(interval * random.uniform(0.9, 1.1))
 
 def reg_season():
     """Detect current NHL season"""
@@ -417,7 +1426,8 @@ def reg_season():
         year2 = now.year + 1
     return f"{year1}{year2}"
 
-def collector(quiet=False, standings_date=None, game_type_id=2, wildcard_indicator=True, season_id=None):
+def collector(quiet=False, standings_date=None, game_type_id=2, wildcard_indicator=True, season_id=None,
+              concurrency=None, rate=None, resume=True, game_logs=True):
     """
     Main collector function with full parameter support
     
@@ -427,13 +1437,60 @@ def collector(quiet=False, standings_date=None, game_type_id=2, wildcard_indicat
         game_type_id: 2=regular, 4=playoffs
         wildcard_indicator: Include wildcard teams
         season_id: Override auto-detection
+        concurrency: Number of parallel fetch workers (default OKEY_CONCURRENCY)
+        rate: Max requests per second across workers (default OKEY_RATE)
+        resume: Continue an interrupted player collection from its checkpoint
+        game_logs: Also ingest new games from every player's game log
     """
     stats(standings_date=standings_date, game_type_id=game_type_id, 
           wildcard_indicator=wildcard_indicator, quiet=quiet)
     today_schedule(quiet=quiet)
     
     season = season_id or reg_season()
-    collect_all_player_stats(season, quiet=quiet)
+    players = collect_all_player_stats(season, quiet=quiet, concurrency=concurrency, rate=rate, resume=resume)
+    if game_logs and players:
+        collect_game_logs(season, players, quiet=quiet, concurrency=concurrency)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect NHL standings, schedule and player stats into stats/")
+    parser.add_argument("--season", default=None, help="Season id, e.g. 20252026 (default: current)")
+    parser.add_argument("--concurrency", type=int, default=None, help=f"Parallel fetch workers (default {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=None, help=f"Max requests per second (default {DEFAULT_RATE:g})")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the HTTP cache")
+    parser.add_argument("--no-resume", action="store_true", help="Discard the checkpoint of an interrupted run")
+    parser.add_argument("--no-game-logs", action="store_true", help="Skip per-player game log ingestion")
+    parser.add_argument("--box-scores", action="store_true",
+                        help="Update standings and player totals from final games' box scores instead of every landing page")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=None,
+                        help="With --box-scores: first game date, YYYY-MM-DD (default: yesterday)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=None,
+                        help="With --box-scores: last game date, YYYY-MM-DD (default: today)")
+    parser.add_argument("--live", action="store_true",
+                        help="Poll today's games in progress and publish deltas to live.json until they are final")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    if args.no_cache:
+        global HTTP_CACHE
+        HTTP_CACHE = None
+    command = "live" if args.live else "box-scores" if args.box_scores else "full"
+    concurrency = args.concurrency or DEFAULT_CONCURRENCY
+    TELEMETRY.reset()
+    with rate_limit(args.rate, burst=max(1, concurrency)):
+        try:
+            if args.live:
+                live(quiet=args.quiet)
+                return 0
+            if args.box_scores:
+                stats(quiet=args.quiet)
+                today_schedule(quiet=args.quiet)
+                collect_box_scores(args.start, args.end, season_id=args.season, quiet=args.quiet, concurrency=args.concurrency)
+                return 0
+            collector(quiet=args.quiet, season_id=args.season, concurrency=args.concurrency,
+                      resume=not args.no_resume, game_logs=not args.no_game_logs)
+            return 0
+        finally:
+            # also written for interrupted or failed runs: that is when it matters
+            write_run_summary(command, quiet=args.quiet, concurrency=concurrency, rate=RATE_LIMITER.rate)
 
 if __name__ == "__main__":
-    collector()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
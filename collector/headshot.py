@@ -1,31 +1,83 @@
 #!/usr/bin/env python3
 """Download NHL player headshots listed in src/stats/playerStats.json
 
-Saves images to: src/headshots/
+Saves images to: src/headshots/, one file per player named
+`<nameKey>-<id>.<ext>` (two players can share a nameKey).
+
+Downloads go through one pooled keep-alive session. Each image's ETag and
+Last-Modified are kept in headshots/manifest.json (keyed by player id), so
+later runs send conditional requests and only re-download images that
+changed upstream; a player whose URL changed (new season or team) is fetched
+again, and a renamed player's file is renamed instead of re-downloaded.
+
+For every new or changed image, a process pool renders WebP variants into
+headshots/thumbs/, named by the image's content hash:
+  <sha>.webp        full size
+  <sha>-<N>.webp    thumbnails for N in THUMB_SIZES (64 px for lists)
 
 Usage:
-  python collector/headshot.py [--workers N] [--force] [--limit N]
+  python collector/headshot.py [--workers N] [--procs N] [--force] [--limit N]
 
 Options:
-  --workers N   Number of parallel downloads (default 6)
-  --force       Re-download files even if they exist
-  --limit N     Stop after N images (for testing)
-  --quiet       Minimal output
+  --workers N    Number of parallel downloads (default 6)
+  --procs N      Processes rendering variants (default: CPU count)
+  --force        Re-download files even if they are unchanged
+  --no-variants  Skip WebP/thumbnail generation
+  --limit N      Stop after N images (for testing)
+  --quiet        Minimal output
 """
 from __future__ import annotations
 
 import argparse
 import concurrent.futures
+import hashlib
 import json
 import os
 import sys
+import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
+from email.utils import formatdate
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from stats.snapshot import open_snapshot
+
+MANIFEST_NAME = "manifest.json"
+THUMBS_DIR = "thumbs"
+THUMB_SIZES = (64, 128)
+WEBP_QUALITY = 82
+
+
+def _load_players_snapshot(stats_path: str) -> list[dict] | None:
+    # only four fields are needed, so read them straight from the columnar
+    # snapshot instead of parsing the whole JSON file
+    snap = open_snapshot(stats_path)
+    if snap is None:
+        return None
+    try:
+        players = []
+        for i in range(len(snap)):
+            url = snap.value("headshot", i) or snap.value("heroImage", i)
+            nid = snap.value("id", i)
+            key = snap.value("nameKey", i) or snap.value("name", i) or str(nid if nid is not None else "unknown")
+            if url and key:
+                players.append({"nameKey": key, "url": url, "id": nid})
+        return players
+    finally:
+        snap.close()
 
 
 def load_players(stats_path: str) -> list[dict]:
+    players = _load_players_snapshot(stats_path)
+    if players is not None:
+        return players
     with open(stats_path, "r", encoding="utf-8") as fh:
         data = json.load(fh)
     players = []
@@ -46,8 +98,53 @@ def sane_filename(name: str) -> str:
     return "".join(c for c in name if c in keep)
 
 
-def download_one(item: dict, dest_dir: str, force: bool = False, quiet: bool = False) -> tuple[str, bool, str]:
-    """Download one headshot. Returns (filename, ok, message)"""
+def headshot_filename(key: str, nid, ext: str) -> str:
+    """File a player's headshot is saved under; the id keeps namesakes apart"""
+    stem = sane_filename(key)
+    if nid is not None:
+        stem = f"{stem}-{nid}" if stem else str(nid)
+    return (stem or "unknown") + ext
+
+
+def make_session(workers: int) -> requests.Session:
+    """Keep-alive session whose connection pool fits `workers` threads"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": "okey-headshot-collector/1.0"})
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=max(4, workers))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def load_manifest(dest_dir: str) -> dict:
+    try:
+        with open(os.path.join(dest_dir, MANIFEST_NAME), "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_manifest(dest_dir: str, manifest: dict) -> None:
+    path = os.path.join(dest_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def manifest_key(item: dict) -> str:
+    return str(item["id"]) if item.get("id") is not None else item["nameKey"]
+
+
+def download_one(item: dict, dest_dir: str, session: requests.Session, prev: dict | None = None,
+                 force: bool = False, quiet: bool = False) -> tuple[str, bool, str, dict | None]:
+    """Download one headshot. Returns (filename, ok, message, manifest entry)
+
+    `prev` is the player's manifest entry from the last run; its validators
+    make the request conditional unless `force` is set.
+    """
     url = item["url"]
     key = item["nameKey"]
     parsed = urllib.parse.urlparse(url)
@@ -57,36 +154,113 @@ def download_one(item: dict, dest_dir: str, force: bool = False, quiet: bool = F
         # fallback
         ext = ".png"
 
-    fname = sane_filename(key) or f"{item.get('id','unknown')}"
-    out_path = os.path.join(dest_dir, f"{fname}{ext}")
+    fname = headshot_filename(key, item.get("id"), ext)
+    out_path = os.path.join(dest_dir, fname)
 
-    if os.path.exists(out_path) and not force:
-        return (out_path, True, "exists")
+    prev = prev or {}
+    if not prev and os.path.exists(out_path):
+        # file from before the manifest existed: revalidate by its mtime
+        prev = {"url": url, "file": fname, "lastModified": formatdate(os.path.getmtime(out_path), usegmt=True)}
+    prev_path = os.path.join(dest_dir, prev["file"]) if prev.get("file") else None
+    have_prev = bool(prev_path) and os.path.exists(prev_path) and prev.get("url") == url
+    if have_prev and prev_path != out_path:
+        # only keep a file to rename if it still holds this player's image:
+        # files named by nameKey alone could be shared by two players
+        try:
+            with open(prev_path, "rb") as fh:
+                have_prev = hashlib.sha256(fh.read()).hexdigest() == prev.get("sha256")
+        except OSError:
+            have_prev = False
 
-    headers = {"User-Agent": "okey-headshot-collector/1.0"}
-    req = urllib.request.Request(url, headers=headers)
+    headers = {}
+    if have_prev and not force:
+        if prev.get("etag"):
+            headers["If-None-Match"] = prev["etag"]
+        if prev.get("lastModified"):
+            headers["If-Modified-Since"] = prev["lastModified"]
 
     try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            data = resp.read()
-            # write atomically
-            tmp = out_path + ".tmp"
-            with open(tmp, "wb") as out:
-                out.write(data)
-            os.replace(tmp, out_path)
-        if not quiet:
-            print(f"Saved: {out_path}")
-        return (out_path, True, "downloaded")
-    except urllib.error.HTTPError as e:
-        return (out_path, False, f"http {e.code}")
-    except Exception as e:
-        return (out_path, False, f"error {e}")
+        resp = session.get(url, headers=headers, timeout=20)
+    except requests.RequestException as e:
+        return (out_path, False, f"error {e}", None)
+
+    entry = dict(prev, url=url, file=fname, checked=int(time.time()))
+    if resp.status_code == 304 and have_prev:
+        if prev_path != out_path:
+            # the player was renamed: keep the bytes, change the name
+            try:
+                os.replace(prev_path, out_path)
+            except OSError as e:
+                return (out_path, False, f"error {e}", None)
+            return (out_path, True, "renamed", entry)
+        return (out_path, True, "not modified", entry)
+    if resp.status_code != 200:
+        return (out_path, False, f"http {resp.status_code}", None)
+
+    data = resp.content
+    digest = hashlib.sha256(data).hexdigest()
+    entry.update(etag=resp.headers.get("ETag"), lastModified=resp.headers.get("Last-Modified"), size=len(data))
+    if have_prev and prev.get("sha256") == digest and prev_path == out_path and not force:
+        # server without validators: same bytes, nothing to write
+        return (out_path, True, "unchanged", entry)
+
+    # write atomically
+    tmp = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as out:
+        out.write(data)
+    os.replace(tmp, out_path)
+    if prev_path and prev_path != out_path and os.path.exists(prev_path):
+        os.remove(prev_path)
+    entry["sha256"] = digest
+    if not quiet:
+        print(f"Saved: {out_path}")
+    return (out_path, True, "downloaded", entry)
+
+
+def variant_names(digest: str, sizes=THUMB_SIZES) -> dict:
+    """Variant files of an image, relative to the headshots directory"""
+    names = {"webp": f"{THUMBS_DIR}/{digest[:20]}.webp"}
+    for size in sizes:
+        names[str(size)] = f"{THUMBS_DIR}/{digest[:20]}-{size}.webp"
+    return names
+
+
+def make_variants(src: str, dest_dir: str, digest: str, sizes=THUMB_SIZES) -> dict:
+    """Render the WebP variants of one image (runs in a worker process)"""
+    from PIL import Image
+
+    names = variant_names(digest, sizes)
+    os.makedirs(os.path.join(dest_dir, THUMBS_DIR), exist_ok=True)
+    with Image.open(src) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        targets = [(names["webp"], None)] + [(names[str(s)], s) for s in sizes]
+        for rel, size in targets:
+            out = img
+            if size:
+                out = img.copy()
+                out.thumbnail((size, size), Image.LANCZOS)
+            path = os.path.join(dest_dir, rel)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            out.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(tmp, path)
+    return names
+
+
+def _variants_missing(entry: dict, dest_dir: str) -> bool:
+    variants = entry.get("variants")
+    if not variants or variants != variant_names(entry.get("sha256") or ""):
+        return True
+    return not all(os.path.exists(os.path.join(dest_dir, rel)) for rel in variants.values())
 
 
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Download player headshots into /headshots")
     parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--procs", type=int, default=None)
     parser.add_argument("--force", action="store_true")
+    parser.add_argument("--no-variants", action="store_true")
     parser.add_argument("--limit", type=int, default=0)
     parser.add_argument("--quiet", action="store_true")
     args = parser.parse_args(argv)
@@ -107,20 +281,63 @@ def main(argv: list[str] | None = None) -> int:
     if not args.quiet:
         print(f"Found {len(players)} players. Downloading to: {out_dir}")
 
+    manifest = load_manifest(out_dir)
+    session = make_session(args.workers)
     results = []
     start = time.time()
     with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as ex:
-        futures = [ex.submit(download_one, p, out_dir, args.force, args.quiet) for p in players]
+        futures = {
+            ex.submit(download_one, p, out_dir, session, manifest.get(manifest_key(p)), args.force, args.quiet): p
+            for p in players
+        }
         for fut in concurrent.futures.as_completed(futures):
             try:
-                results.append(fut.result())
+                path, ok, msg, entry = fut.result()
             except Exception as e:
-                results.append(("", False, f"exception {e}"))
+                path, ok, msg, entry = "", False, f"exception {e}", None
+            if entry is not None:
+                manifest[manifest_key(futures[fut])] = entry
+            results.append((path, ok, msg))
+
+    built = 0
+    if not args.no_variants:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("Pillow is not installed; skipping WebP/thumbnail variants", file=sys.stderr)
+        else:
+            todo = {}
+            for key, entry in manifest.items():
+                if not entry.get("sha256") and os.path.exists(os.path.join(out_dir, entry.get("file", ""))):
+                    with open(os.path.join(out_dir, entry["file"]), "rb") as fh:
+                        entry["sha256"] = hashlib.sha256(fh.read()).hexdigest()
+                if entry.get("sha256") and _variants_missing(entry, out_dir):
+                    todo[key] = entry
+            if todo:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=args.procs) as pool:
+                    jobs = {
+                        pool.submit(make_variants, os.path.join(out_dir, e["file"]), out_dir, e["sha256"]): k
+                        for k, e in todo.items()
+                    }
+                    for fut in concurrent.futures.as_completed(jobs):
+                        try:
+                            manifest[jobs[fut]]["variants"] = fut.result()
+                            built += 1
+                        except Exception as e:
+                            if not args.quiet:
+                                print(f"Variants failed for {manifest[jobs[fut]].get('file')}: {e}")
+
+    save_manifest(out_dir, manifest)
 
     ok = sum(1 for _, s, _ in results if s)
     bad = len(results) - ok
     if not args.quiet:
-        print(f"Done. {ok} saved, {bad} failed in {time.time()-start:.1f}s")
+        counts = {}
+        for _, s, msg in results:
+            if s:
+                counts[msg] = counts.get(msg, 0) + 1
+        detail = ", ".join(f"{n} {msg}" for msg, n in sorted(counts.items()))
+        print(f"Done. {ok} ok ({detail}), {bad} failed, {built} variant set(s) built in {time.time()-start:.1f}s")
 
     # exit code 0 if at least one succeeded
     return 0 if ok > 0 else 1
@@ -0,0 +1,375 @@
+"""Long-running collector scheduler
+
+Instead of refreshing everything on every `collector()` run, each resource
+has its own cadence:
+
+  schedule   today's games; every 5 min on game days, else every 30 min.
+             Games that just went final queue a `landings:<teams>` task.
+  standings  every 10 min on game days, every 6 h otherwise
+  rosters    daily full player collection (rosters + every landing page),
+             which picks up trades and call-ups
+  landings   one-shot, SETTLE_DELAY after a game ends: the rosters and
+             landing pages of the two teams that played, plus their game logs
+
+Every interval gets +/- JITTER so runs drift apart. All jobs share the
+collector's token bucket (the global request budget, --rate). A job never
+overlaps with itself or with another job writing the same resource
+(teams / players); it is deferred instead. Failed jobs retry with
+exponential back-off, capped at their normal interval.
+
+The scheduler state (per job: last success, last error, next run, runs,
+failures; queue depth; handled games; request telemetry since start, see
+collector.Telemetry) is written to stats/scheduler.json after every change.
+The web app serves it at /api/status/scheduler.
+
+Usage:
+  python collector/scheduler.py [--rate 4] [--workers 2] [--season 20252026]
+  python collector/scheduler.py --run standings   # run one job now and exit
+"""
+import argparse
+import concurrent.futures
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+import collector as col
+
+STATUS_FILE = os.path.join(col.STATISTICS_DIR, "scheduler.json")
+LOCK_FILE = os.path.join(col.STATISTICS_DIR, ".scheduler.lock")
+
+JITTER = 0.1                 # +/- fraction of every interval
+SETTLE_DELAY = 30 * 60       # wait after a final horn before re-reading landings
+BUSY_RETRY = 60              # a deferred job is retried after this many seconds
+MAX_BACKOFF = 6 * 3600
+MAX_HANDLED_GAMES = 200
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+
+def _stamp(ts=None):
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class Job:
+    """A unit of work run by the Scheduler
+
+    `every(scheduler)` returns the seconds until the next run, or None for
+    a one-shot task. `resources` are names of the data a job writes; two
+    jobs sharing one never run at the same time.
+    """
+
+    def __init__(self, name, run, every=None, resources=(), description=""):
+        self.name = name
+        self.run = run
+        self.every = every
+        self.resources = frozenset(resources)
+        self.description = description
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.deferred = 0
+        self.last_start = None
+        self.last_success = None
+        self.last_error = None
+        self.last_error_at = None
+        self.last_duration = None
+        self.next_run = None
+
+    def status(self):
+        return {
+            "description": self.description,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "deferred": self.deferred,
+            "lastStart": _stamp(self.last_start),
+            "lastSuccess": _stamp(self.last_success),
+            "lastError": self.last_error,
+            "lastErrorAt": _stamp(self.last_error_at),
+            "lastDuration": None if self.last_duration is None else round(self.last_duration, 3),
+            "nextRun": _stamp(self.next_run),
+        }
+
+
+class Scheduler:
+    """Runs Jobs on their cadence with a small worker pool"""
+
+    def __init__(self, season_id, workers=2, quiet=True, status_file=STATUS_FILE):
+        self.season_id = str(season_id)
+        self.quiet = quiet
+        self.status_file = status_file
+        self.jobs = {}
+        self.games = []
+        self.handled_games = []
+        self.started_at = time.time()
+        self._queue = []
+        self._seq = itertools.count()
+        self._busy = set()
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+        self._load_status()
+
+    # ---- queue ---------------------------------------------------------
+
+    def add(self, job, delay=0.0):
+        with self._lock:
+            self.jobs[job.name] = job
+            self._push(job, time.time() + delay)
+
+    def once(self, name, run, delay=0.0, resources=(), description=""):
+        """Queue a one-shot task; ignored if one with that name is pending"""
+        with self._lock:
+            if name in self.jobs:
+                return
+            self.add(Job(name, run, None, resources, description), delay)
+
+    def mark_handled(self, gid):
+        """Record that the landings task of game `gid` has completed"""
+        if gid is None:
+            return
+        with self._lock:
+            if gid not in self.handled_games:
+                self.handled_games.append(gid)
+            del self.handled_games[:-MAX_HANDLED_GAMES]
+
+    def _push(self, job, when):
+        job.next_run = when
+        heapq.heappush(self._queue, (when, next(self._seq), job.name))
+        self._wake.set()
+
+    def _jittered(self, seconds):
+        return seconds * (1 + random.uniform(-JITTER, JITTER))
+
+    # ---- running -------------------------------------------------------
+
+    def tick(self):
+        """Start every due job that can run; returns seconds until the next"""
+        now = time.time()
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                _, _, name = heapq.heappop(self._queue)
+                job = self.jobs.get(name)
+                if job is None or job.next_run is None or job.next_run > now:
+                    continue  # rescheduled meanwhile; a later heap entry exists
+                if job.running or job.resources & self._busy:
+                    job.deferred += 1
+                    self._push(job, now + BUSY_RETRY)
+                    continue
+                job.running = True
+                job.next_run = None
+                self._busy |= job.resources
+                self._pool.submit(self._run, job)
+            self._write_status()
+            return (self._queue[0][0] - now) if self._queue else None
+
+    def _run(self, job):
+        start = time.time()
+        job.last_start = start
+        error = None
+        try:
+            job.run(self)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if not self.quiet:
+                traceback.print_exc()
+        with self._lock:
+            job.running = False
+            job.runs += 1
+            job.last_duration = time.time() - start
+            self._busy -= job.resources
+            if error is None:
+                job.last_success = time.time()
+                job.consecutive_failures = 0
+            else:
+                job.failures += 1
+                job.consecutive_failures += 1
+                job.last_error = error
+                job.last_error_at = time.time()
+            interval = job.every(self) if job.every else None
+            if interval is not None:
+                if error is not None:
+                    # back off: 1, 2, 4... minutes, never longer than the cadence
+                    interval = min(interval, MAX_BACKOFF, MINUTE * 2 ** (job.consecutive_failures - 1))
+                self._push(job, time.time() + self._jittered(interval))
+            elif error is not None and job.consecutive_failures < 3:
+                self._push(job, time.time() + MINUTE * 2 ** job.consecutive_failures)
+            else:
+                self.jobs.pop(job.name, None)
+            self._write_status()
+        if not self.quiet:
+            outcome = "ok" if error is None else f"failed ({error})"
+            print(f"[scheduler] {job.name}: {outcome} in {job.last_duration:.1f}s")
+
+    def run_forever(self, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            wait = self.tick()
+            self._wake.clear()
+            self._wake.wait(timeout=min(wait if wait is not None else HOUR, HOUR))
+        self._pool.shutdown(wait=True)
+
+    # ---- monitoring ----------------------------------------------------
+
+    def status(self):
+        now = time.time()
+        with self._lock:
+            pending = [(when, name) for when, _, name in self._queue if name in self.jobs and self.jobs[name].next_run == when]
+            return {
+                "updated": _stamp(now),
+                "startedAt": _stamp(self.started_at),
+                "pid": os.getpid(),
+                "season": self.season_id,
+                "queueDepth": len(pending),
+                "due": sum(1 for when, _ in pending if when <= now),
+                "running": sorted(name for name, job in self.jobs.items() if job.running),
+                "rate": col.RATE_LIMITER.rate,
+                "gameDay": self.game_day,
+                "jobs": {name: job.status() for name, job in sorted(self.jobs.items())},
+                "handledGames": self.handled_games[-MAX_HANDLED_GAMES:],
+                "telemetry": col.TELEMETRY.summary(),
+            }
+
+    def _write_status(self):
+        try:
+            col.write_json_atomic(self.status_file, self.status(), indent=2)
+        except OSError:
+            pass
+
+    def _load_status(self):
+        try:
+            import json
+
+            with open(self.status_file, "r", encoding="utf-8") as f:
+                self.handled_games = list(json.load(f).get("handledGames") or [])
+        except (OSError, ValueError, AttributeError):
+            self.handled_games = []
+
+    # ---- game-day helpers ----------------------------------------------
+
+    @property
+    def game_day(self):
+        return bool(self.games)
+
+    @property
+    def games_left(self):
+        return any(g.get("gameState") not in col.boxscore.FINAL_STATES for g in self.games)
+
+
+# ---- jobs ----------------------------------------------------------------
+
+def run_schedule(scheduler):
+    games = col.today_schedule(quiet=scheduler.quiet)
+    if games is None:
+        raise RuntimeError("schedule fetch failed")
+    scheduler.games = games
+    for game in games:
+        gid = game.get("id")
+        if gid is None or game.get("gameState") not in col.boxscore.FINAL_STATES or gid in scheduler.handled_games:
+            continue
+        teams = [game.get("awayTeam", {}).get("abbrev"), game.get("homeTeam", {}).get("abbrev")]
+        scheduler.once(
+            f"landings:{'-'.join(t for t in teams if t)}",
+            lambda s, teams=teams, gid=gid: run_landings(s, teams, gid),
+            delay=SETTLE_DELAY,
+            resources=("players",),
+            description=f"landing pages of {', '.join(t for t in teams if t)} after game {gid}",
+        )
+
+
+def run_standings(scheduler):
+    if col.stats(quiet=scheduler.quiet) is None:
+        raise RuntimeError("standings fetch failed")
+
+
+def run_rosters(scheduler):
+    players = col.collect_all_player_stats(scheduler.season_id, quiet=scheduler.quiet)
+    if players is None:
+        raise RuntimeError("player collection did not run (missing teamsStats.json?)")
+
+
+def run_landings(scheduler, teams, gid=None):
+    updated = col.refresh_teams(teams, scheduler.season_id, quiet=scheduler.quiet)
+    if updated is None:
+        raise RuntimeError("playerStats.json missing; waiting for the rosters job")
+    col.collect_game_logs(scheduler.season_id, updated, quiet=scheduler.quiet)
+    # only now: a task that gave up is queued again by the next schedule run
+    scheduler.mark_handled(gid)
+
+
+def default_jobs():
+    return [
+        Job("schedule", run_schedule, lambda s: 5 * MINUTE if s.games_left else 30 * MINUTE,
+            description="today's games; queues landing refreshes after final horns"),
+        Job("standings", run_standings, lambda s: 10 * MINUTE if s.game_day else 6 * HOUR, ("teams",),
+            description="league standings"),
+        Job("rosters", run_rosters, lambda s: 24 * HOUR, ("players",),
+            description="full player collection: rosters and every landing page"),
+    ]
+
+
+def _acquire_lock(path):
+    """Hold an exclusive lock on `path` for the life of the process, or exit"""
+    try:
+        import fcntl
+    except ImportError:  # not POSIX: skip the single-instance check
+        return None
+    fh = open(path, "w")
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        raise SystemExit(f"another scheduler holds {path}")
+    fh.write(str(os.getpid()))
+    fh.flush()
+    return fh
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the collector jobs on their own cadences")
+    parser.add_argument("--season", default=None, help="Season id, e.g. 20252026 (default: current)")
+    parser.add_argument("--rate", type=float, default=None, help=f"Max requests per second for all jobs (default {col.DEFAULT_RATE:g})")
+    parser.add_argument("--workers", type=int, default=2, help="Jobs running at the same time (default 2)")
+    parser.add_argument("--run", choices=["schedule", "standings", "rosters"], help="Run one job now and exit")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    # one request budget shared by every job (see collector.rate_limit)
+    with col.rate_limit(args.rate, burst=col.DEFAULT_CONCURRENCY):
+        lock = _acquire_lock(LOCK_FILE)
+        scheduler = Scheduler(args.season or col.reg_season(), workers=args.workers, quiet=args.quiet)
+        jobs = {job.name: job for job in default_jobs()}
+        if args.run:
+            jobs[args.run].run(scheduler)
+            return 0
+
+        # standings wait for the first schedule so their cadence knows if it is a
+        # game day; a restart does not redo a full player collection that is
+        # less than a day old
+        scheduler.add(jobs["schedule"])
+        scheduler.add(jobs["standings"], delay=5)
+        try:
+            age = time.time() - os.path.getmtime(os.path.join(col.STATISTICS_DIR, "playerStats.json"))
+        except OSError:
+            age = 24 * HOUR
+        scheduler.add(jobs["rosters"], delay=max(10, 24 * HOUR - age))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if lock is not None:
+                lock.close()
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
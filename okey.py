@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Command line lookups over the collected stats.
+
+Usage:
+  python okey.py -p nicksuzuki              season stats of a player
+  python okey.py -p nicksuzuki -s advanced  special teams, career, last 5 games
+  python okey.py -p "Nick Suzuki" -s bio    id, team, number, age, awards
+  python okey.py -t MTL                     team standings line
+  python okey.py -f suzuki                  players whose name matches
+  python okey.py --update                   run the collector first
+  python okey.py -b keys.txt --format csv   many players at once (- for stdin)
+
+Lookups are answered from stats/lookup.idx (see stats/lookup.py), which the
+collector writes next to the stats files, so a query reads one record
+instead of parsing playerStats.json. Modules are imported only by the
+command that needs them: offline lookups never load requests or Flask.
+
+Batch mode (`-b`) is for exports: it loads the dataset once into the same
+`PlayerIndex` and `StatsEngine` the web app uses and streams one JSON line
+or CSV row per requested player, adding recent-form sums and league ranks.
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATS_DIR = os.environ.get("OKEY_STATS_DIR") or os.path.join(REPO_ROOT, "stats")
+
+SECTIONS = ("basic", "advanced", "bio")
+
+# default batch columns; goalie-only fields are empty for skaters and vice versa
+BATCH_FIELDS = (
+    "id", "nameKey", "name", "team", "position", "gamesPlayed",
+    "goals", "assists", "points", "plusMinus", "shots", "pim",
+    "wins", "losses", "otLosses", "savePctg", "goalsAgainstAvg", "shutouts",
+    "pointsRank", "lastGames", "lastGoals", "lastAssists", "lastPoints",
+)
+# computed batch columns -> (kind, stat)
+BATCH_COMPUTED = {
+    "lastGames": ("games", None),
+    "lastGoals": ("recent", "goals"),
+    "lastAssists": ("recent", "assists"),
+    "lastPoints": ("recent", "points"),
+    "lastShots": ("recent", "shots"),
+    "pointsRank": ("rank", "points"),
+    "goalsRank": ("rank", "goals"),
+    "assistsRank": ("rank", "assists"),
+}
+
+
+def _num(value, digits=None):
+    if value is None:
+        return "-"
+    if digits is not None and isinstance(value, (int, float)):
+        return f"{value:.{digits}f}"
+    return str(value)
+
+
+def _pct(value):
+    return "-" if value is None else f"{value * 100:.1f}%"
+
+
+def _rows(rows):
+    width = max(len(label) for label, _ in rows)
+    return "\n".join(f"  {label.ljust(width)}  {value}" for label, value in rows)
+
+
+def _title(p):
+    number = f"#{p['sweaterNumber']} " if p.get("sweaterNumber") is not None else ""
+    return f"{p.get('name') or p.get('nameKey')}  {number}{p.get('position') or ''} {p.get('team') or ''}".rstrip()
+
+
+def format_basic(p):
+    if p.get("position") == "G":
+        rows = [
+            ("Games", _num(p.get("gamesPlayed"))),
+            ("Record", f"{_num(p.get('wins'))}-{_num(p.get('losses'))}-{_num(p.get('otLosses'))}"),
+            ("GAA", _num(p.get("goalsAgainstAvg"), 2)),
+            ("Save %", _num(p.get("savePctg"), 3)),
+            ("Shutouts", _num(p.get("shutouts"))),
+        ]
+    else:
+        rows = [
+            ("Games", _num(p.get("gamesPlayed"))),
+            ("Goals", _num(p.get("goals"))),
+            ("Assists", _num(p.get("assists"))),
+            ("Points", _num(p.get("points"))),
+            ("+/-", _num(p.get("plusMinus"))),
+            ("PIM", _num(p.get("pim"))),
+        ]
+    return f"{_title(p)}  ({p.get('season') or ''})\n{_rows(rows)}"
+
+
+def format_advanced(p):
+    if p.get("position") == "G":
+        rows = [
+            ("Career games", _num(p.get("careerGamesPlayed"))),
+            ("Career record", f"{_num(p.get('careerWins'))}-{_num(p.get('careerLosses'))}-{_num(p.get('careerOtLosses'))}"),
+            ("Career GAA", _num(p.get("careerGoalsAgainstAvg"), 2)),
+            ("Career save %", _num(p.get("careerSavePctg"), 3)),
+            ("Career shutouts", _num(p.get("careerShutouts"))),
+        ]
+    else:
+        rows = [
+            ("Shots", _num(p.get("shots"))),
+            ("Shooting %", _pct(p.get("shootingPctg"))),
+            ("PP goals / points", f"{_num(p.get('powerPlayGoals'))} / {_num(p.get('powerPlayPoints'))}"),
+            ("SH goals / points", f"{_num(p.get('shorthandedGoals'))} / {_num(p.get('shorthandedPoints'))}"),
+            ("Game-winning goals", _num(p.get("gameWinningGoals"))),
+            ("OT goals", _num(p.get("otGoals"))),
+            ("Career GP / G / A / P", f"{_num(p.get('careerGamesPlayed'))} / {_num(p.get('careerGoals'))} / "
+                                      f"{_num(p.get('careerAssists'))} / {_num(p.get('careerPoints'))}"),
+        ]
+    out = f"{_title(p)}  advanced\n{_rows(rows)}"
+    games = [g for g in p.get("last5Games") or [] if isinstance(g, dict)]
+    if games:
+        lines = []
+        for g in games:
+            where = "vs" if g.get("homeRoadFlag") == "H" else "@"
+            line = f"  {g.get('gameDate', '')}  {where} {g.get('opponentAbbrev', ''):<3}  "
+            if "decision" in g:
+                line += f"{g.get('decision') or '-'}  {_num(g.get('goalsAgainst'))} GA on {_num(g.get('shotsAgainst'))}"
+            else:
+                line += f"{_num(g.get('goals'))}G {_num(g.get('assists'))}A  {_num(g.get('shots'))} SOG  {g.get('toi') or ''}"
+            lines.append(line)
+        out += "\nLast games\n" + "\n".join(lines)
+    return out
+
+
+def format_bio(p):
+    from datetime import date
+
+    age = "-"
+    born = p.get("birthDate")
+    if born:
+        try:
+            y, m, d = (int(x) for x in born.split("-"))
+            today = date.today()
+            age = str(today.year - y - ((today.month, today.day) < (m, d)))
+        except ValueError:
+            pass
+    awards = [a.get("trophy") for a in p.get("awards") or [] if isinstance(a, dict) and a.get("trophy")]
+    rows = [
+        ("Id", _num(p.get("id"))),
+        ("Key", _num(p.get("nameKey"))),
+        ("Team", _num(p.get("team"))),
+        ("Position", _num(p.get("position"))),
+        ("Number", _num(p.get("sweaterNumber"))),
+        ("Born", f"{born or '-'} (age {age})"),
+        ("Awards", ", ".join(dict.fromkeys(awards)) or "-"),
+    ]
+    return f"{_title(p)}  bio\n{_rows(rows)}"
+
+
+def format_team(t):
+    rows = [
+        ("Record", f"{_num(t.get('wins'))}-{_num(t.get('losses'))}-{_num(t.get('otLosses'))}"),
+        ("Points", f"{_num(t.get('points'))} in {_num(t.get('gamesPlayed'))} games ({_num(t.get('pointPctg'), 3)})"),
+        ("Goals for / against", f"{_num(t.get('goalFor'))} / {_num(t.get('goalAgainst'))}"),
+        ("Division", f"{_num(t.get('division'))} ({_num(t.get('divisionSequence'))})"),
+        ("Conference", f"{_num(t.get('conference'))} ({_num(t.get('conferenceSequence'))})"),
+        ("Last 10", f"{_num(t.get('l10Wins'))}-{_num(t.get('l10Losses'))}-{_num(t.get('l10OtLosses'))}"),
+        ("Streak", f"{t.get('streakCode') or ''}{_num(t.get('streakCount'))}"),
+    ]
+    return f"{t.get('team') or t.get('abrev')}  ({t.get('date') or ''})\n{_rows(rows)}"
+
+
+FORMATTERS = {"basic": format_basic, "advanced": format_advanced, "bio": format_bio}
+
+
+def _dump(record):
+    import json
+
+    return json.dumps(record, ensure_ascii=False, indent=2)
+
+
+def _batch_keys(stream):
+    """Player keys from a batch input: one per line, first CSV cell, # comments."""
+    for line in stream:
+        cell = line.split(",", 1)[0].strip().strip('"')
+        if cell and not cell.startswith("#") and cell not in ("id", "nameKey", "key"):
+            yield cell
+
+
+def _load_players():
+    from stats.snapshot import open_snapshot
+
+    path = os.path.join(STATS_DIR, "playerStats.json")
+    snap = open_snapshot(path)
+    if snap is not None:
+        try:
+            return snap.records()
+        finally:
+            snap.close()
+    import json
+
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def run_batch(source, fmt="jsonl", fields=None, last_n=5, out=None) -> int:
+    """Write one record per key read from `source` (a path or "-" for stdin).
+
+    Returns the number of keys that matched no player; those still produce
+    a line, with an "error" field in JSON Lines and empty columns in CSV.
+    """
+    import json
+
+    from stats.index import PlayerIndex
+    from stats.lookup import key_for
+
+    out = out or sys.stdout
+    index = PlayerIndex(_load_players())
+    engine = index.analytics
+    fields = list(fields or BATCH_FIELDS)
+
+    # every aggregate is computed once for all players, then indexed per row
+    columns = {}
+    for name in fields:
+        kind, stat = BATCH_COMPUTED.get(name, (None, None))
+        if kind == "recent":
+            columns[name] = engine.recent_sum(stat, last_n)
+        elif kind == "rank":
+            columns[name] = engine.rank(stat)
+        elif kind == "games":
+            columns[name] = engine.recent_games.clip(max=last_n)
+
+    def value(name, player, row):
+        col = columns.get(name)
+        if col is None:
+            return player.get(name)
+        v = float(col[row])
+        if v != v:  # NaN: no recent games
+            return None
+        return int(v) if v.is_integer() else v
+
+    writer = None
+    if fmt == "csv":
+        import csv
+
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["query"] + fields)
+
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    missing = 0
+    try:
+        for key in _batch_keys(stream):
+            player = index.get(key) or index.get(key_for(key))
+            row = engine.row(player) if player is not None else None
+            if player is None or row is None:
+                missing += 1
+                if writer:
+                    writer.writerow([key] + [""] * len(fields))
+                else:
+                    out.write(json.dumps({"query": key, "error": "not found"}, ensure_ascii=False) + "\n")
+                continue
+            values = [value(name, player, row) for name in fields]
+            if writer:
+                writer.writerow([key] + ["" if v is None else v for v in values])
+            else:
+                record = {"query": key}
+                record.update(zip(fields, values))
+                out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    out.flush()
+    return missing
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="okey.py", description="Look up NHL player and team stats collected in stats/")
+    parser.add_argument("-p", "--player", help="Player nameKey, id or full name")
+    parser.add_argument("-s", "--section", choices=SECTIONS, default="basic", help="What to show for a player")
+    parser.add_argument("-t", "--team", help="Team abbreviation or name")
+    parser.add_argument("-f", "--find", help="List players whose name contains this text")
+    parser.add_argument("--json", action="store_true", help="Print the raw record as JSON")
+    parser.add_argument("-b", "--batch", metavar="FILE", help="Look up every nameKey/id listed in FILE (- for stdin)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl", help="Batch output format")
+    parser.add_argument("--fields", help="Comma-separated batch columns (record fields or " + ", ".join(BATCH_COMPUTED) + ")")
+    parser.add_argument("--last", type=int, default=5, help="Games in the batch recent-form columns (default 5)")
+    parser.add_argument("--update", action="store_true", help="Run the collector before looking anything up")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        # the only command that needs the network (and requests)
+        sys.path.insert(0, os.path.join(REPO_ROOT, "collector"))
+        import collector
+
+        collector.collector(quiet=True)
+    if args.batch:
+        if REPO_ROOT not in sys.path:
+            sys.path.insert(0, REPO_ROOT)
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+        try:
+            missing = run_batch(args.batch, args.format, fields, max(1, args.last))
+        except OSError as e:
+            print(f"Cannot read batch input: {e}", file=sys.stderr)
+            return 1
+        if missing:
+            print(f"{missing} key(s) matched no player", file=sys.stderr)
+        return 0
+    if not (args.player or args.team or args.find):
+        if args.update:
+            return 0
+        parser.print_usage(sys.stderr)
+        return 2
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from stats.lookup import open_lookup
+
+    lookup = open_lookup(STATS_DIR)
+    if lookup is None:
+        print(f"No stats in {STATS_DIR}; run `python okey.py --update` first", file=sys.stderr)
+        return 1
+
+    if args.find:
+        matches = lookup.search(args.find, limit=20)
+        for name, key in matches:
+            print(f"{key:<28} {name}")
+        return 0 if matches else 1
+
+    if args.team:
+        team = lookup.team(args.team)
+        if team is None:
+            print(f"No team matches {args.team!r}", file=sys.stderr)
+            return 1
+        print(_dump(team) if args.json else format_team(team))
+        return 0
+
+    player = lookup.player(args.player)
+    if player is None:
+        print(f"No player matches {args.player!r}", file=sys.stderr)
+        suggestions = lookup.search(args.player, limit=5)
+        if suggestions:
+            print("Did you mean: " + ", ".join(key for _, key in suggestions), file=sys.stderr)
+        return 1
+    print(_dump(player) if args.json else FORMATTERS[args.section](player))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
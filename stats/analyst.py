@@ -6,10 +6,53 @@ based on points in the last `last_n` games.
 
 The function is defensive: it tries several common field names and falls back
 to simple summary fields where available.
+
+`StatsEngine` is the columnar counterpart used by the web app: it turns the
+player list into NumPy arrays once per dataset version and answers top-k
+queries on any numeric stat (season totals or sums over the last N games),
+optionally filtered by team and position, with `argpartition`. Results are
+memoized on the engine, which is rebuilt whenever the dataset reloads.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# common keys that datasets use for recent game lists
+RECENT_KEYS = (
+    "last5Games",
+    "lastFive",
+    "last_5",
+    "recentGames",
+    "recent_game_stats",
+    "recentGameStats",
+    "lastGames",
+    "gameLog",
+    "gameLogs",
+    "games",
+)
+
+# per-game fields kept by StatsEngine, with the aliases hottest_players accepts
+RECENT_STATS = {
+    "goals": ("goals", "G", "g"),
+    "assists": ("assists", "A", "a"),
+    "points": ("points", "PTS", "pts"),
+    "shots": ("shots",),
+    "pim": ("pim",),
+    "plusMinus": ("plusMinus",),
+    "powerPlayGoals": ("powerPlayGoals",),
+    "shorthandedGoals": ("shorthandedGoals",),
+    "shifts": ("shifts",),
+    "toi": ("toi",),
+}
+
+FORWARD_POSITIONS = ("C", "L", "R")
+
+# distinct filtered rankings kept per engine (see StatsEngine.ranking)
+MAX_RANKINGS = 64
+# memoized top()/hottest() results kept per engine, least recently used dropped
+MAX_CACHED = 256
 
 
 def _int(v: Any) -> int:
@@ -19,6 +62,76 @@ def _int(v: Any) -> int:
         return 0
 
 
+def _float(v: Any) -> float:
+    """Numeric value of `v` or NaN; "mm:ss" strings are converted to seconds."""
+    if isinstance(v, bool) or v is None:
+        return math.nan
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str) and ":" in v:
+        mins, _, secs = v.partition(":")
+        try:
+            return int(mins) * 60 + int(secs)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _game_int(entry: Dict[str, Any], stat: str) -> int:
+    """`stat` of one recent game: the first non-empty alias, as an int."""
+    value = None
+    for alias in RECENT_STATS[stat]:
+        value = entry.get(alias)
+        if value:
+            break
+    return _int(value)
+
+
+def _summary_last(p: Dict[str, Any]) -> Tuple[Any, Any]:
+    """(goals, assists) from summary fields like goalsLast5, None when absent."""
+    g = p.get("goalsLast5") or p.get("g_last5") or p.get("last5_goals")
+    a = p.get("assistsLast5") or p.get("a_last5") or p.get("last5_assists")
+    return g, a
+
+
+def _recent_games(p: Dict[str, Any]) -> Optional[List[Any]]:
+    for k in RECENT_KEYS:
+        v = p.get(k)
+        if isinstance(v, list) and v:
+            return v
+    return None
+
+
+def _headshot(p: Dict[str, Any]) -> str:
+    """Best-effort headshot path: prefer absolute URL, fall back to /headshots/<id|nameKey>."""
+    hs = None
+    for hk in ("headshot", "headshotUrl", "photo", "photoUrl", "img"):
+        cand = p.get(hk)
+        if cand:
+            hs = cand
+            break
+    if isinstance(hs, str):
+        return hs if hs.startswith("http") else f"/headshots/{hs}"
+    # try nameKey or id
+    nid = p.get("nameKey") or p.get("id")
+    if nid:
+        return f"/headshots/{nid}.jpg"
+    return "/static/placeholder_headshot.png"
+
+
+def _team_logo(p: Dict[str, Any]) -> Optional[str]:
+    """Best-effort team logo path."""
+    team_logo = p.get("teamLogo") or p.get("team_logo")
+    if isinstance(team_logo, str):
+        return team_logo if team_logo.startswith("http") else f"{team_logo}"
+    # try team abbreviation
+    t = p.get("team") or p.get("teamAbbrev") or p.get("teamName") or p.get("team_name")
+    if t:
+        abbr = str(t).lower().replace(" ", "_")
+        return f"/static/team_logos/{abbr}.png"
+    return None
+
+
 def hottest_players(players: List[Dict[str, Any]], top_n: int = 3, last_n: int = 5) -> List[Dict[str, Any]]:
     """Return up to `top_n` players most productive over the last `last_n` games.
 
@@ -34,30 +147,11 @@ def hottest_players(players: List[Dict[str, Any]], top_n: int = 3, last_n: int =
 
     results: List[Dict[str, Any]] = []
 
-    # common keys that datasets use for recent game lists
-    recent_keys = (
-        "last5Games",
-        "lastFive",
-        "last_5",
-        "recentGames",
-        "recent_game_stats",
-        "recentGameStats",
-        "lastGames",
-        "gameLog",
-        "gameLogs",
-        "games",
-    )
-
     for p in players:
         if not isinstance(p, dict):
             continue
 
-        recent: Optional[List[Dict[str, Any]]] = None
-        for k in recent_keys:
-            v = p.get(k)
-            if isinstance(v, list) and v:
-                recent = v
-                break
+        recent = _recent_games(p)
 
         goals = assists = pts = 0
         games_seen = 0
@@ -66,15 +160,14 @@ def hottest_players(players: List[Dict[str, Any]], top_n: int = 3, last_n: int =
             for entry in recent[:last_n]:
                 if not isinstance(entry, dict):
                     continue
-                goals += _int(entry.get("goals") or entry.get("G") or entry.get("g"))
-                assists += _int(entry.get("assists") or entry.get("A") or entry.get("a"))
-                pts += _int(entry.get("points") or entry.get("PTS") or entry.get("pts"))
+                goals += _game_int(entry, "goals")
+                assists += _game_int(entry, "assists")
+                pts += _game_int(entry, "points")
                 games_seen += 1
 
         else:
             # try summary fields like goalsLast5 / assistsLast5
-            g = p.get("goalsLast5") or p.get("g_last5") or p.get("last5_goals")
-            a = p.get("assistsLast5") or p.get("a_last5") or p.get("last5_assists")
+            g, a = _summary_last(p)
             if g is not None or a is not None:
                 goals = _int(g)
                 assists = _int(a)
@@ -86,35 +179,8 @@ def hottest_players(players: List[Dict[str, Any]], top_n: int = 3, last_n: int =
 
         score = pts
 
-        # best-effort headshot path: prefer absolute URL, fall back to /headshots/<id|nameKey>.
-        hs = None
-        for hk in ("headshot", "headshotUrl", "photo", "photoUrl", "img"):
-            cand = p.get(hk)
-            if cand:
-                hs = cand
-                break
-        if isinstance(hs, str):
-            hs = hs if hs.startswith("http") else f"/headshots/{hs}"
-        else:
-            # try nameKey or id
-            nid = p.get("nameKey") or p.get("id")
-            if nid:
-                hs = f"/headshots/{nid}.jpg"
-            else:
-                hs = "/static/placeholder_headshot.png"
-
-        # best-effort team logo path
-        team_logo = p.get("teamLogo") or p.get("team_logo")
-        if isinstance(team_logo, str):
-            team_logo = team_logo if team_logo.startswith("http") else f"{team_logo}"
-        else:
-            # try team abbreviation
-            t = p.get("team") or p.get("teamAbbrev") or p.get("teamName") or p.get("team_name")
-            if t:
-                abbr = str(t).lower().replace(" ", "_")
-                team_logo = f"/static/team_logos/{abbr}.png"
-            else:
-                team_logo = None
+        hs = _headshot(p)
+        team_logo = _team_logo(p)
 
         results.append(
             {
@@ -132,3 +198,393 @@ def hottest_players(players: List[Dict[str, Any]], top_n: int = 3, last_n: int =
     # sort by score (points in last_n games) descending
     results.sort(key=lambda r: r.get("score", 0), reverse=True)
     return results[: max(0, int(top_n))]
+
+
+class StatsEngine:
+    """Columnar analytics over a player list.
+
+    Season stats are exposed as float64 columns (NaN when a player lacks the
+    stat), built lazily the first time a stat is queried. Recent games are
+    stored as an (players x games) matrix per stat in `RECENT_STATS`, most
+    recent game first, so "last N" sums are a slice and a row sum.
+
+    The engine is meant to live as long as one dataset version: it memoizes
+    query results and is simply replaced when the data reloads.
+    """
+
+    def __init__(self, players: Sequence[Dict[str, Any]]):
+        import numpy as np
+
+        self._np = np
+        self.players: List[Dict[str, Any]] = [p for p in players if isinstance(p, dict)] if isinstance(players, (list, tuple)) else []
+        n = len(self.players)
+        self.team = np.array([str(p.get("team") or "").upper() for p in self.players], dtype=object)
+        self.position = np.array([str(p.get("position") or "").upper() for p in self.players], dtype=object)
+
+        recents = [_recent_games(p) or [] for p in self.players]
+        width = max((len(r) for r in recents), default=0)
+        self.recent_games = np.zeros(n, dtype=np.int64)
+        self.recent: Dict[str, Any] = {}
+        for stat in RECENT_STATS:
+            self.recent[stat] = np.zeros((n, width), dtype=np.float64)
+        for i, games in enumerate(recents):
+            seen = 0
+            for entry in games:
+                if not isinstance(entry, dict):
+                    continue
+                for stat, aliases in RECENT_STATS.items():
+                    v = math.nan
+                    for alias in aliases:
+                        v = _float(entry.get(alias))
+                        if not math.isnan(v) and v != 0:
+                            break
+                    self.recent[stat][i, seen] = 0.0 if math.isnan(v) else v
+                seen += 1
+            self.recent_games[i] = seen
+
+        self._columns: Dict[str, Any] = {}
+        self._hot: Optional[Tuple[Any, Any, Dict[str, Any], Any]] = None
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._rankings: Dict[Tuple, Tuple[Any, Any, Any]] = {}
+        self._pos_by_id = {}
+        for i, p in enumerate(self.players):
+            self._pos_by_id.setdefault(str(p.get("id")), i)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def _cached(self, key: Tuple) -> Any:
+        hit = self._cache.get(key)
+        if hit is not None:
+            try:
+                self._cache.move_to_end(key)
+            except KeyError:  # evicted by another thread meanwhile
+                pass
+        return hit
+
+    def _remember(self, key: Tuple, value: Any) -> Any:
+        # keys include caller-supplied filters, so the memo must stay bounded
+        self._cache[key] = value
+        while len(self._cache) > MAX_CACHED:
+            try:
+                self._cache.popitem(last=False)
+            except KeyError:
+                break
+        return value
+
+    @property
+    def numeric_stats(self) -> List[str]:
+        """Season-level fields holding a number for at least one player."""
+        stats = self._cached(("numeric_stats",))
+        if stats is None:
+            seen: Dict[str, None] = {}
+            for p in self.players:
+                for k, v in p.items():
+                    if k not in seen and isinstance(v, (int, float)) and not isinstance(v, bool):
+                        seen[k] = None
+            stats = self._remember(("numeric_stats",), list(seen))
+        return stats
+
+    def column(self, stat: str):
+        """Season-level values of `stat` as a float64 array (NaN if missing)."""
+        col = self._columns.get(stat)
+        if col is None:
+            col = self._np.fromiter((_float(p.get(stat)) for p in self.players), dtype=self._np.float64, count=len(self.players))
+            self._columns[stat] = col
+        return col
+
+    def recent_sum(self, stat: str, last_n: int):
+        """Sum of `stat` over each player's last `last_n` games.
+
+        Players without any recent game get NaN so they drop out of rankings.
+        """
+        np = self._np
+        matrix = self.recent.get(stat)
+        if matrix is None:
+            raise KeyError(f"no per-game values for {stat!r}")
+        total = matrix[:, : max(0, int(last_n))].sum(axis=1)
+        return np.where(self.recent_games > 0, total, np.nan)
+
+    def row(self, player: Dict[str, Any]) -> Optional[int]:
+        """Row of `player` (matched by id) in the engine's columns, or None."""
+        return self._pos_by_id.get(str(player.get("id")))
+
+    def rank(self, stat: str, descending: bool = True):
+        """1-based league rank of every row by `stat`; 0 for players without it."""
+        _, _, inverse = self.ranking(stat, descending)
+        return inverse + 1
+
+    def mask(self, team: Optional[str] = None, position: Optional[str] = None):
+        """Boolean row filter for a team abbreviation and/or position code.
+
+        `position` accepts the roster codes (C, L, R, D, G) and F for forwards.
+        """
+        np = self._np
+        keep = np.ones(len(self.players), dtype=bool)
+        if team:
+            keep &= self.team == str(team).upper()
+        if position:
+            pos = str(position).upper()
+            codes = FORWARD_POSITIONS if pos == "F" else (pos,)
+            keep &= np.isin(self.position, codes)
+        return keep
+
+    def _top_indices(self, values, k: int, ascending: bool = False):
+        """Indices of the `k` best values (NaN excluded), ties in file order."""
+        np = self._np
+        valid = np.flatnonzero(~np.isnan(values))
+        if k <= 0 or valid.size == 0:
+            return valid[:0]
+        keyed = values[valid] if ascending else -values[valid]
+        if k < valid.size:
+            # argpartition finds the k-th best value in O(n); keep every
+            # element at least that good so ties resolve deterministically
+            kth = keyed[np.argpartition(keyed, k - 1)[k - 1]]
+            keep = keyed <= kth
+            valid, keyed = valid[keep], keyed[keep]
+        order = np.argsort(keyed, kind="stable")[:k]
+        return valid[order]
+
+    def top(
+        self,
+        stat: str,
+        k: int = 10,
+        team: Optional[str] = None,
+        position: Optional[str] = None,
+        last_n: Optional[int] = None,
+        ascending: bool = False,
+    ) -> List[Tuple[Dict[str, Any], Any]]:
+        """Return up to `k` `(player, value)` pairs ranked by `stat`.
+
+        With `last_n` the value is the sum over the player's last `last_n`
+        games (see `RECENT_STATS`), otherwise the season value.
+        """
+        key = ("top", stat, k, team, position, last_n, ascending)
+        hit = self._cached(key)
+        if hit is not None:
+            return hit
+        np = self._np
+        values = self.recent_sum(stat, last_n) if last_n else self.column(stat)
+        if team or position:
+            values = np.where(self.mask(team, position), values, np.nan)
+        result = []
+        for i in self._top_indices(values, int(k), ascending=ascending):
+            v = float(values[i])
+            result.append((self.players[i], int(v) if v.is_integer() else v))
+        return self._remember(key, result)
+
+    def ranking(
+        self,
+        stat: str,
+        descending: bool = True,
+        team: Optional[str] = None,
+        position: Optional[str] = None,
+        ranges: Sequence[Tuple[str, Optional[float], Optional[float]]] = (),
+    ):
+        """Rows sorted by `stat` after filtering, as `(order, keyed, inverse)`.
+
+        `order` holds row positions best first (players without `stat` are
+        left out, ties are ordered by player id), `keyed` the matching sort keys in
+        ascending order and `inverse[row]` the rank of a row in `order` (-1 if
+        filtered out). `ranges` is a list of `(stat, lo, hi)` bounds, either
+        side may be None. The result is kept for the lifetime of the engine,
+        so paging through it costs O(page size).
+        """
+        key = (stat, descending, team, position, tuple(ranges))
+        hit = self._rankings.get(key)
+        if hit is not None:
+            return hit
+        np = self._np
+        values = self.column(stat)
+        keep = self.mask(team, position) & ~np.isnan(values)
+        for name, lo, hi in ranges:
+            col = self.column(name)
+            if lo is not None:
+                keep &= col >= lo
+            if hi is not None:
+                keep &= col <= hi
+        rows = np.flatnonzero(keep)
+        keyed = -values[rows] if descending else values[rows]
+        # ids break ties so a cursor can resume inside a run of equal values
+        # even after a reload moved the rows (see page)
+        sort = np.lexsort((self.column("id")[rows], keyed))
+        order, keyed = rows[sort], keyed[sort]
+        inverse = np.full(len(self.players), -1, dtype=np.int64)
+        inverse[order] = np.arange(order.size)
+        if len(self._rankings) >= MAX_RANKINGS:
+            self._rankings.pop(next(iter(self._rankings)))
+        result = self._rankings[key] = (order, keyed, inverse)
+        return result
+
+    def page(
+        self,
+        stat: str,
+        limit: int = 50,
+        after: Optional[Tuple[Any, float]] = None,
+        descending: bool = True,
+        team: Optional[str] = None,
+        position: Optional[str] = None,
+        ranges: Sequence[Tuple[str, Optional[float], Optional[float]]] = (),
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Any, float]]]:
+        """One page of a ranking, keyset-paginated.
+
+        `after` is the `(id, value)` of the last player of the previous page,
+        as returned in the third element; it stays valid across dataset
+        reloads because a vanished id falls back to seeking `(value, id)`,
+        the ranking's sort key. Returns `(players, total, next_after)`;
+        `next_after` is None on the last page.
+        """
+        order, keyed, inverse = self.ranking(stat, descending, team, position, ranges)
+        start = 0
+        if after is not None:
+            last_id, last_value = after
+            row = self._pos_by_id.get(str(last_id))
+            rank = int(inverse[row]) if row is not None else -1
+            if rank >= 0:
+                start = rank + 1
+            else:
+                np = self._np
+                target = -float(last_value) if descending else float(last_value)
+                lo = int(np.searchsorted(keyed, target, side="left"))
+                hi = int(np.searchsorted(keyed, target, side="right"))
+                ties = self.column("id")[order[lo:hi]]
+                start = lo + int(np.searchsorted(ties, _float(last_id), side="right"))
+        rows = order[start:start + max(0, int(limit))]
+        players = [self.players[i] for i in rows]
+        next_after = None
+        if start + len(rows) < order.size and len(rows):
+            last = int(rows[-1])
+            next_after = (self.players[last].get("id"), float(self.column(stat)[last]))
+        return players, int(order.size), next_after
+
+    def _hot_lines(self) -> Tuple[Any, Any, Dict[str, Any], Any]:
+        """Inputs of `hottest`, parsed exactly the way `hottest_players` does.
+
+        Per-game goals/assists/points as ints by position in the player's
+        recent list (non-dict entries count as no game), which players have a
+        recent list at all, and the goalsLast5/assistsLast5 summary fallback
+        (NaN when absent). Built on the first `hottest` call.
+        """
+        if self._hot is None:
+            np = self._np
+            n = len(self.players)
+            recents = [_recent_games(p) for p in self.players]
+            width = max((len(r) for r in recents if r), default=0)
+            counted = np.zeros((n, width), dtype=bool)
+            lines = {stat: np.zeros((n, width), dtype=np.int64) for stat in ("goals", "assists", "points")}
+            summary = np.full((n, 2), np.nan)
+            for i, (p, games) in enumerate(zip(self.players, recents)):
+                if games:
+                    for j, entry in enumerate(games):
+                        if isinstance(entry, dict):
+                            counted[i, j] = True
+                            for stat, matrix in lines.items():
+                                matrix[i, j] = _game_int(entry, stat)
+                else:
+                    g, a = _summary_last(p)
+                    if g is not None or a is not None:
+                        summary[i] = (_int(g), _int(a))
+            has_recent = np.array([bool(r) for r in recents], dtype=bool)
+            self._hot = (has_recent, counted, lines, summary)
+        return self._hot
+
+    def hottest(self, top_n: int = 3, last_n: int = 5) -> List[Dict[str, Any]]:
+        """Vectorized `hottest_players`: same players, order and dict layout."""
+        key = ("hottest", top_n, last_n)
+        hit = self._cached(key)
+        if hit is not None:
+            return hit
+        np = self._np
+        has_recent, counted, lines, summary = self._hot_lines()
+        window = max(0, int(last_n))
+        goals = lines["goals"][:, :window].sum(axis=1)
+        assists = lines["assists"][:, :window].sum(axis=1)
+        points = lines["points"][:, :window].sum(axis=1)
+        games = counted[:, :window].sum(axis=1)
+        # players without a recent list use their summary fields, if any
+        fallback = ~has_recent & ~np.isnan(summary[:, 0])
+        goals = np.where(fallback, summary[:, 0], goals)
+        assists = np.where(fallback, summary[:, 1], assists)
+        points = np.where(fallback, summary[:, 0] + summary[:, 1], points)
+        games = np.where(fallback, last_n, games)
+        score = np.where(has_recent | fallback, points, np.nan)
+        results = []
+        for i in self._top_indices(score, max(0, int(top_n))):
+            p = self.players[i]
+            results.append(
+                {
+                    "player": p,
+                    "games": int(games[i]),
+                    "goals": int(goals[i]),
+                    "assists": int(assists[i]),
+                    "points": int(points[i]),
+                    "score": int(points[i]),
+                    "headshot": _headshot(p),
+                    "team_logo": _team_logo(p),
+                }
+            )
+        return self._remember(key, results)
+
+
+# stats compared season over season by `career_trajectory`
+CAREER_STATS = ("gamesPlayed", "goals", "assists", "points")
+
+
+def career_trajectory(conn: Any, key: Any, stats: Sequence[str] = CAREER_STATS) -> List[Dict[str, Any]]:
+    """Season-by-season line of a player from the history store.
+
+    `conn` is a `stats.history` connection and `key` an id or nameKey. Each
+    entry has the season, team, the raw `stats`, their per-game rates and the
+    change from the previous stored season.
+    """
+    from stats.history import career
+
+    out: List[Dict[str, Any]] = []
+    prev: Optional[Dict[str, float]] = None
+    for rec in career(conn, key):
+        values = {s: _float(rec.get(s)) for s in stats}
+        gp = _float(rec.get("gamesPlayed"))
+        entry: Dict[str, Any] = {"season": rec.get("season"), "team": rec.get("team")}
+        for s, v in values.items():
+            entry[s] = None if math.isnan(v) else v
+            if s != "gamesPlayed":
+                entry[f"{s}PerGame"] = round(v / gp, 3) if gp > 0 and not math.isnan(v) else None
+            if prev is not None:
+                p = prev.get(s, math.nan)
+                entry[f"{s}Delta"] = None if math.isnan(v) or math.isnan(p) else v - p
+        out.append(entry)
+        prev = values
+    return out
+
+
+def season_engine(conn: Any, season_id: Any) -> "StatsEngine":
+    """`StatsEngine` over one stored season, for seasons other than the live one."""
+    from stats.history import season_players
+
+    return StatsEngine(season_players(conn, season_id))
+
+
+def hottest_from_history(conn: Any, season_id: Any, top_n: int = 3, last_n: int = 10) -> List[Dict[str, Any]]:
+    """`hottest_players` over any window of `stats.gamelog.ROLLING_WINDOWS`.
+
+    Reads the precomputed rolling rows of the history store instead of the
+    five games in `last5Games`; returns the same dict layout.
+    """
+    from stats.gamelog import leaders
+
+    results = []
+    for row in leaders(conn, season_id, last_n=last_n, stat="points", limit=top_n):
+        p = row["player"] or {"id": row["player_id"]}
+        results.append(
+            {
+                "player": p,
+                "games": row["games"],
+                "goals": row["goals"],
+                "assists": row["assists"],
+                "points": row["points"],
+                "score": row["points"],
+                "headshot": _headshot(p),
+                "team_logo": _team_logo(p),
+            }
+        )
+    return results
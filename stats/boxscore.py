@@ -0,0 +1,164 @@
+"""Player lines and stat deltas from NHL box scores.
+
+A night of games is about 16 box scores, against about 800 landing pages for
+a full player refresh. `player_lines` flattens the `playerByGameStats` of a
+`/gamecenter/<id>/boxscore` payload into one line per player. `apply_line`
+adds a line to a playerStats record, i.e. the season (and career) counting
+stats move by exactly that game, and the line is pushed onto `last5Games`.
+
+Rates the box score cannot rebuild exactly (goalie save percentage and GAA)
+are left as the last landing refresh reported them. Counters the box score
+does not carry are left untouched too, and their names are listed in the
+record's `partial` field: until the next landing refresh rebuilds the record
+(without that field) those totals lag behind the others.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+FINAL_STATES = ("OFF", "FINAL")
+
+# skater box-score field -> playerStats field, for every counter playerStats
+# keeps. The box score reports only some of them (no PP points, SH or
+# game-winning/OT goals): those are applied when present, otherwise the
+# record is marked `partial` (see apply_line)
+SKATER_DELTAS = {
+    "goals": "goals",
+    "assists": "assists",
+    "points": "points",
+    "plusMinus": "plusMinus",
+    "sog": "shots",
+    "pim": "pim",
+    "powerPlayGoals": "powerPlayGoals",
+    "powerPlayPoints": "powerPlayPoints",
+    "shorthandedGoals": "shorthandedGoals",
+    "shorthandedPoints": "shorthandedPoints",
+    "gameWinningGoals": "gameWinningGoals",
+    "otGoals": "otGoals",
+}
+# subsets of points: known to be 0 for a game without a point
+POINT_SPLITS = ("powerPlayGoals", "powerPlayPoints", "shorthandedGoals", "shorthandedPoints",
+                "gameWinningGoals", "otGoals")
+CAREER_DELTAS = {
+    "goals": "careerGoals",
+    "assists": "careerAssists",
+    "points": "careerPoints",
+}
+GOALIE_DECISIONS = {"W": "wins", "L": "losses", "O": "otLosses"}
+
+
+def _int(v: Any) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+
+def played(line: Dict[str, Any]) -> bool:
+    toi = line.get("toi")
+    return bool(toi) and toi not in ("0:00", "00:00")
+
+
+def player_lines(box: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One dict per player who dressed, with game context attached.
+
+    Each line keeps the box-score fields and adds `gameId`, `gameDate`,
+    `season`, `teamAbbrev`, `opponentAbbrev`, `homeRoadFlag` and `goalie`.
+    """
+    stats = box.get("playerByGameStats") or {}
+    home = (box.get("homeTeam") or {}).get("abbrev")
+    away = (box.get("awayTeam") or {}).get("abbrev")
+    lines = []
+    for side, team, opponent, flag in (("awayTeam", away, home, "R"), ("homeTeam", home, away, "H")):
+        groups = stats.get(side) or {}
+        for group in ("forwards", "defense", "goalies"):
+            for entry in groups.get(group) or []:
+                if not isinstance(entry, dict) or entry.get("playerId") is None:
+                    continue
+                line = dict(entry)
+                line.update({
+                    "gameId": box.get("id"),
+                    "gameDate": box.get("gameDate"),
+                    "gameTypeId": box.get("gameType"),
+                    "season": box.get("season"),
+                    "teamAbbrev": team,
+                    "opponentAbbrev": opponent,
+                    "homeRoadFlag": flag,
+                    "goalie": group == "goalies",
+                })
+                if "points" not in line and not line["goalie"]:
+                    line["points"] = _int(line.get("goals")) + _int(line.get("assists"))
+                lines.append(line)
+    return lines
+
+
+def game_log_entry(line: Dict[str, Any]) -> Dict[str, Any]:
+    """A box-score line shaped like a `game-log` / `last5Games` entry."""
+    entry = {
+        "gameId": line.get("gameId"),
+        "gameDate": line.get("gameDate"),
+        "gameTypeId": line.get("gameTypeId"),
+        "teamAbbrev": line.get("teamAbbrev"),
+        "opponentAbbrev": line.get("opponentAbbrev"),
+        "homeRoadFlag": line.get("homeRoadFlag"),
+        "toi": line.get("toi"),
+        "goals": _int(line.get("goals")),
+        "assists": _int(line.get("assists")),
+        "points": _int(line.get("points", _int(line.get("goals")) + _int(line.get("assists")))),
+        "pim": _int(line.get("pim")),
+    }
+    if line.get("goalie"):
+        entry.update({
+            "decision": line.get("decision"),
+            "shotsAgainst": _int(line.get("shotsAgainst")),
+            "goalsAgainst": _int(line.get("goalsAgainst")),
+            "savePctg": line.get("savePctg"),
+        })
+    else:
+        entry.update({
+            "shots": _int(line.get("sog")),
+            "plusMinus": _int(line.get("plusMinus")),
+            "powerPlayGoals": _int(line.get("powerPlayGoals")),
+            "shifts": _int(line.get("shifts")),
+        })
+    return entry
+
+
+def apply_line(record: Dict[str, Any], line: Dict[str, Any]) -> bool:
+    """Add one game to a playerStats record in place; False if they did not play."""
+    if not played(line):
+        return False
+    record["gamesPlayed"] = _int(record.get("gamesPlayed")) + 1
+    if "careerGamesPlayed" in record:
+        record["careerGamesPlayed"] = _int(record.get("careerGamesPlayed")) + 1
+
+    if line.get("goalie"):
+        field = GOALIE_DECISIONS.get(line.get("decision") or "")
+        if field:
+            record[field] = _int(record.get(field)) + 1
+            career = "career" + field[0].upper() + field[1:]
+            if career in record:
+                record[career] = _int(record.get(career)) + 1
+        if line.get("decision") == "W" and _int(line.get("goalsAgainst")) == 0:
+            record["shutouts"] = _int(record.get("shutouts")) + 1
+            if "careerShutouts" in record:
+                record["careerShutouts"] = _int(record.get("careerShutouts")) + 1
+    else:
+        missing = set(record.get("partial") or ())
+        scored = _int(line.get("points")) > 0
+        for src, dst in SKATER_DELTAS.items():
+            if src in line:
+                record[dst] = _int(record.get(dst)) + _int(line.get(src))
+            elif scored or src not in POINT_SPLITS:
+                missing.add(dst)
+        if missing:
+            record["partial"] = sorted(missing)
+        for src, dst in CAREER_DELTAS.items():
+            if dst in record:
+                record[dst] = _int(record.get(dst)) + _int(line.get(src))
+        shots = _int(record.get("shots"))
+        record["shootingPctg"] = round(_int(record.get("goals")) / shots, 6) if shots else 0
+
+    last5 = [g for g in record.get("last5Games") or [] if isinstance(g, dict) and g.get("gameId") != line.get("gameId")]
+    record["last5Games"] = [game_log_entry(line)] + last5[:4]
+    return True
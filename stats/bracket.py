@@ -0,0 +1,169 @@
+"""Playoff bracket "if the playoffs started today".
+
+`build_bracket` turns the standings in `teamsStats.json` into the NHL
+divisional/wild-card bracket:
+
+  - the top three teams of each division qualify, plus the next two teams in
+    the conference as wild cards (WC1, WC2);
+  - the division winner with the better record meets WC2, the other division
+    winner meets WC1, and 2 meets 3 inside each division;
+  - brackets are fixed (no re-seeding): round 2 is played inside each
+    division bracket, then the conference final and the Stanley Cup final.
+
+Division and wild-card ranks follow the league's own `divisionSequence` /
+`wildcardSequence` when present. Otherwise, and for projecting later rounds,
+teams are compared by points, then point percentage, regulation wins,
+regulation + OT wins and wins; the higher seed keeps ties.
+
+Standings only change a few times a day, so `cached_bracket` keeps the result
+for the teams list it was computed from; the app's `DataStore` hands out a
+new list only when the file changes.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+Team = Dict[str, Any]
+
+
+def _num(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def record_key(t: Team) -> Tuple[float, ...]:
+    """Sort key for standings, higher is better."""
+    return (
+        _num(t.get("points")),
+        _num(t.get("pointPctg")),
+        _num(t.get("regulationWins")),
+        _num(t.get("regulationPlusOtWins")),
+        _num(t.get("wins")),
+    )
+
+
+def _better(a: Optional[Team], b: Optional[Team]) -> Optional[Team]:
+    if a is None or b is None:
+        return a or b
+    return b if record_key(b) > record_key(a) else a
+
+
+def sorted_pair(a: Optional[Team], b: Optional[Team]) -> Tuple[Optional[Team], Optional[Team]]:
+    """Order two teams so the one with home ice comes first."""
+    return (a, b) if _better(a, b) is a else (b, a)
+
+
+def series(top: Optional[Team], bottom: Optional[Team], top_seed: Optional[str] = None, bottom_seed: Optional[str] = None) -> Dict[str, Any]:
+    """A best-of-seven matchup; `top` has home ice."""
+    return {
+        "top": top,
+        "bottom": bottom,
+        "topSeed": top_seed,
+        "bottomSeed": bottom_seed,
+        "winner": _better(top, bottom),
+    }
+
+
+def _division_order(lst: List[Team]) -> List[Team]:
+    # divisionSequence is the league's own ranking (1 is top); fall back to record
+    if all(t.get("divisionSequence") for t in lst):
+        return sorted(lst, key=lambda t: t.get("divisionSequence"))
+    return sorted(lst, key=record_key, reverse=True)
+
+
+def _at(lst: List[Any], i: int) -> Any:
+    return lst[i] if len(lst) > i else None
+
+
+def _conference(lst: List[Team]) -> Any:
+    divs: Dict[str, List[Team]] = {}
+    for t in lst:
+        div = t.get("divisionAbbrev") or t.get("division") or "Unknown"
+        divs.setdefault(div, []).append(t)
+
+    if len(divs) != 2:
+        # fallback: simple top-8 seeding by points (1v8,2v7,...)
+        seeds = sorted(lst, key=record_key, reverse=True)[:8]
+        return [(i + 1, _at(seeds, i), 8 - i, _at(seeds, 7 - i)) for i in range(4)]
+
+    ordered = {k: _division_order(v) for k, v in divs.items()}
+    qualified = set()
+    for v in ordered.values():
+        qualified.update(id(t) for t in v[:3])
+    remaining = [t for t in lst if id(t) not in qualified]
+    if all(t.get("wildcardSequence") for t in remaining):
+        remaining.sort(key=lambda t: t.get("wildcardSequence"))
+    else:
+        remaining.sort(key=record_key, reverse=True)
+    wc1, wc2 = _at(remaining, 0), _at(remaining, 1)
+
+    # the division whose winner has the better record faces the lower wild card
+    (name_a, div_a), (name_b, div_b) = ordered.items()
+    if _better(_at(div_a, 0), _at(div_b, 0)) is _at(div_a, 0):
+        top_name, top_div, other_name, other_div = name_a, div_a, name_b, div_b
+    else:
+        top_name, top_div, other_name, other_div = name_b, div_b, name_a, div_a
+
+    def first_round(name: str, div: List[Team], wild: Optional[Team], wild_seed: str) -> List[Dict[str, Any]]:
+        return [
+            series(_at(div, 0), wild, f"{name}1", wild_seed),
+            series(_at(div, 1), _at(div, 2), f"{name}2", f"{name}3"),
+        ]
+
+    upper_r1 = first_round(top_name, top_div, wc2, "WC2")
+    lower_r1 = first_round(other_name, other_div, wc1, "WC1")
+    upper_r2 = series(upper_r1[0]["winner"], upper_r1[1]["winner"])
+    lower_r2 = series(lower_r1[0]["winner"], lower_r1[1]["winner"])
+    final = series(*sorted_pair(upper_r2["winner"], lower_r2["winner"]))
+
+    def slots(r1: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+        # (seedA, teamA, seedB, teamB) tuples as rendered by bracket.html
+        return [(1, r1[0]["top"], None, r1[0]["bottom"]), (2, r1[1]["top"], 3, r1[1]["bottom"])]
+
+    return {
+        "upper": slots(upper_r1),
+        "lower": slots(lower_r1),
+        "rounds": {
+            "first": upper_r1 + lower_r1,
+            "second": [upper_r2, lower_r2],
+            "conferenceFinal": final,
+        },
+    }
+
+
+def build_bracket(teams: Any) -> Dict[str, Any]:
+    """Compute the playoff bracket from a standings list.
+
+    Returns `{"conferences": {abbrev: conference}, "final": series}` where a
+    conference is the `upper`/`lower` first-round slots used by the template
+    plus the full `rounds` tree (or, for unusual league layouts, a plain
+    1v8..4v5 list). Conferences keep the order they first appear in.
+    """
+    by_conf: Dict[str, List[Team]] = {}
+    for t in teams if isinstance(teams, list) else []:
+        if not isinstance(t, dict):
+            continue
+        conf = t.get("conferenceAbbrev") or t.get("conference") or "Unknown"
+        by_conf.setdefault(conf, []).append(t)
+
+    conferences = {conf: _conference(lst) for conf, lst in by_conf.items()}
+
+    champions = [c["rounds"]["conferenceFinal"]["winner"] for c in conferences.values() if isinstance(c, dict)]
+    final = series(*sorted_pair(_at(champions, 0), _at(champions, 1))) if len(champions) == 2 else None
+    return {"conferences": conferences, "final": final}
+
+
+_cached: Tuple[Any, Optional[Dict[str, Any]]] = (None, None)
+
+
+def cached_bracket(teams: Any) -> Dict[str, Any]:
+    """`build_bracket`, computed once per teams list object."""
+    global _cached
+    source, result = _cached
+    if source is teams and result is not None:
+        return result
+    result = build_bracket(teams)
+    _cached = (teams, result)
+    return result
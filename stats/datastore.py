@@ -0,0 +1,147 @@
+"""In-memory cache for the JSON files produced by the collector.
+
+The web app used to call `json.load` on `playerStats.json` for every request.
+A `DataStore` parses its file once and keeps the result in memory. At most
+every `check_interval` seconds it stats the file and, when the mtime or size
+changed, parses it again and swaps the new snapshot in with a single
+attribute assignment, so concurrent readers always see either the old or the
+new dataset, never a half-loaded one.
+
+If a reload fails (for instance because the collector is halfway through
+writing the file) the previous snapshot is kept and the reload is retried on
+the next check.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+DEFAULT_CHECK_INTERVAL = float(os.environ.get("OKEY_RELOAD_INTERVAL", "2.0"))
+
+
+def _load_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class Snapshot:
+    """An immutable view of one version of a data file.
+
+    `data` is the parsed (and optionally built) value, `version` is the
+    `(mtime_ns, size)` pair of the file it was read from, or None if the file
+    could not be read.
+    """
+
+    __slots__ = ("data", "version", "loaded_at")
+
+    def __init__(self, data: Any, version: Optional[Tuple[int, int]], loaded_at: float):
+        self.data = data
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+class DataStore:
+    """Lazily loaded, auto-reloading cache of a single JSON file.
+
+    Args:
+        path: file to load.
+        build: optional callable applied to the parsed JSON; its result is what
+            `data()` returns. Runs once per file version.
+        default: value used when the file is missing or unreadable and no
+            previous snapshot exists.
+        check_interval: minimum number of seconds between two `os.stat` calls.
+        loader: callable reading `path`; defaults to `json.load`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        build: Optional[Callable[[Any], Any]] = None,
+        default: Any = None,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        loader: Optional[Callable[[str], Any]] = None,
+    ):
+        self.path = path
+        self.build = build
+        self.default = default
+        self.check_interval = check_interval
+        self.loader = loader or _load_json
+        self._snapshot: Optional[Snapshot] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, version: Optional[Tuple[int, int]]) -> Snapshot:
+        data = self.default
+        if version is not None:
+            data = self.loader(self.path)
+        if self.build is not None:
+            data = self.build(data)
+        return Snapshot(data, version, time.time())
+
+    def snapshot(self) -> Snapshot:
+        """Return the current snapshot, reloading the file if it changed."""
+        snap = self._snapshot
+        now = time.monotonic()
+        if snap is not None and now < self._next_check:
+            return snap
+
+        # only one thread reloads; the others keep serving the old snapshot
+        blocking = snap is None
+        if not self._lock.acquire(blocking=blocking):
+            return snap
+        try:
+            snap = self._snapshot
+            if snap is not None and time.monotonic() < self._next_check:
+                return snap
+            version = self._stat()
+            if snap is None or version != snap.version:
+                try:
+                    snap = self._load(version)
+                except Exception:
+                    # keep serving the previous version; retried next check
+                    if snap is None:
+                        snap = self._load(None)
+                self._snapshot = snap
+            self._next_check = time.monotonic() + self.check_interval
+            return snap
+        finally:
+            self._lock.release()
+
+    def current(self) -> Optional[Snapshot]:
+        """The loaded snapshot if no stat check is due yet, else None.
+
+        Never touches the disk, so async code can call it on the event loop
+        and fall back to `snapshot()` in a thread only when it returns None.
+        """
+        snap = self._snapshot
+        if snap is not None and time.monotonic() < self._next_check:
+            return snap
+        return None
+
+    def data(self) -> Any:
+        """Return the current parsed data."""
+        return self.snapshot().data
+
+    def version(self) -> Optional[Tuple[int, int]]:
+        """Return the `(mtime_ns, size)` of the loaded file, if any."""
+        return self.snapshot().version
+
+    def freeze(self) -> None:
+        """Keep the current snapshot for good: no further stat checks or reloads."""
+        self.check_interval = math.inf
+        self._next_check = math.inf
+
+    def invalidate(self) -> None:
+        """Force a stat check on the next access."""
+        self._next_check = 0.0
@@ -0,0 +1,261 @@
+"""Per-game player logs and rolling aggregates, kept in the history store.
+
+`ingest_games` appends the games of a player's log that are not stored yet
+to `player_games`, numbering them with a per-season sequence (`seq`). Each
+player also has one `player_rolling` row per window in `ROLLING_WINDOWS`
+plus a season-to-date row (`last_n = SEASON`), holding the sums over their
+last N games. A new game adds its values to every row and subtracts the game
+that falls out of each window (a primary-key lookup by `seq`), so ingesting
+a game costs O(len(ROLLING_WINDOWS)) no matter how long the season is, and
+"last 10 games" queries read a precomputed row instead of re-summing logs.
+`seq` follows (gameDate, gameId) order: a game older than the newest stored
+one makes `rebuild_rolling` renumber the player's season and recompute it.
+
+Windows that are not precomputed are still answered by `window_totals`,
+an indexed range scan over the last N `seq` values.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+ROLLING_WINDOWS = (5, 10, 20)
+SEASON = 0  # last_n of the season-to-date row
+
+SUMMED = ("goals", "assists", "points", "shots", "toi_seconds")
+SORTABLE = ("games",) + SUMMED
+
+
+def _int(v: Any) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+
+def toi_seconds(v: Any) -> int:
+    """Seconds of a "mm:ss" time-on-ice string (or a number of seconds)."""
+    if isinstance(v, str) and ":" in v:
+        mins, _, secs = v.partition(":")
+        return _int(mins) * 60 + _int(secs)
+    return _int(v)
+
+
+def game_row(game: Dict[str, Any]) -> Dict[str, Any]:
+    """The summed columns of one game-log entry, as stored in `player_games`."""
+    goals = _int(game.get("goals"))
+    assists = _int(game.get("assists"))
+    points = game.get("points")
+    return {
+        "game_id": _int(game.get("gameId")),
+        "game_date": game.get("gameDate"),
+        "team": game.get("teamAbbrev"),
+        "opponent": game.get("opponentAbbrev"),
+        "goals": goals,
+        "assists": assists,
+        "points": goals + assists if points is None else _int(points),
+        "shots": _int(game.get("shots")),
+        "toi_seconds": toi_seconds(game.get("toi")),
+    }
+
+
+def _empty(last_n: int) -> Dict[str, Any]:
+    return {"last_n": last_n, "games": 0, "last_game_id": None, **{k: 0 for k in SUMMED}}
+
+
+def load_rolling(conn: sqlite3.Connection, player_id: int, season_id: int) -> Dict[int, Dict[str, Any]]:
+    """The rolling rows of one player and season, keyed by `last_n`."""
+    rows = {n: _empty(n) for n in (SEASON,) + ROLLING_WINDOWS}
+    for r in conn.execute(
+        "SELECT * FROM player_rolling WHERE player_id = ? AND season_id = ?",
+        (player_id, season_id),
+    ):
+        rows[r["last_n"]] = {k: r[k] for k in ("last_n", "games", "last_game_id") + SUMMED}
+    return rows
+
+
+def stored_counts(conn: sqlite3.Connection, season_id: int) -> Dict[int, int]:
+    """Games stored per player for a season, from the season-to-date rows."""
+    rows = conn.execute(
+        "SELECT player_id, games FROM player_rolling WHERE season_id = ? AND last_n = ?",
+        (season_id, SEASON),
+    )
+    return {r[0]: r[1] for r in rows}
+
+
+def ingest_games(conn: sqlite3.Connection, player_id: int, season_id: int, games: Iterable[Dict[str, Any]]) -> int:
+    """Store the games of a game log that are new; returns how many were added.
+
+    `games` are raw game-log entries in any order. The player's games and
+    rolling rows are updated in one transaction.
+    """
+    player_id, season_id = int(player_id), int(season_id)
+    known = {r[0] for r in conn.execute(
+        "SELECT game_id FROM player_games WHERE player_id = ? AND season_id = ?", (player_id, season_id)
+    )}
+    new = [g for g in games if isinstance(g, dict) and g.get("gameId") is not None and _int(g.get("gameId")) not in known]
+    if not new:
+        return 0
+    new.sort(key=lambda g: (str(g.get("gameDate") or ""), _int(g.get("gameId"))))
+
+    with conn:
+        rolling = load_rolling(conn, player_id, season_id)
+        seq = rolling[SEASON]["games"]
+        newest = conn.execute(
+            "SELECT game_date, game_id FROM player_games WHERE player_id = ? AND season_id = ? ORDER BY seq DESC LIMIT 1",
+            (player_id, season_id),
+        ).fetchone()
+        # a game older than the newest stored one (e.g. a failed game-log
+        # fetch overtaken by a box-score ingest) must not become the latest
+        # game of every window: renumber and rebuild instead
+        in_order = newest is None or _game_order(game_row(new[0])) > _game_order(newest)
+        for game in new:
+            row = game_row(game)
+            seq += 1
+            conn.execute(
+                """
+                INSERT INTO player_games (player_id, season_id, seq, game_id, game_date, team, opponent,
+                                          goals, assists, points, shots, toi_seconds, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (player_id, season_id, seq, row["game_id"], row["game_date"], row["team"], row["opponent"],
+                 row["goals"], row["assists"], row["points"], row["shots"], row["toi_seconds"],
+                 json.dumps(game, ensure_ascii=False)),
+            )
+            if not in_order:
+                continue
+            for last_n, agg in rolling.items():
+                agg["games"] += 1
+                for k in SUMMED:
+                    agg[k] += row[k]
+                agg["last_game_id"] = row["game_id"]
+                if last_n and agg["games"] > last_n:
+                    dropped = conn.execute(
+                        "SELECT * FROM player_games WHERE player_id = ? AND season_id = ? AND seq = ?",
+                        (player_id, season_id, seq - last_n),
+                    ).fetchone()
+                    agg["games"] -= 1
+                    for k in SUMMED:
+                        agg[k] -= dropped[k]
+        if in_order:
+            _save_rolling(conn, player_id, season_id, rolling)
+        else:
+            rebuild_rolling(conn, player_id, season_id)
+    return len(new)
+
+
+def _game_order(row) -> tuple:
+    """Chronological sort key of a stored or `game_row` game."""
+    return (str(row["game_date"] or ""), _int(row["game_id"]))
+
+
+def _save_rolling(conn: sqlite3.Connection, player_id: int, season_id: int, rolling: Dict[int, Dict[str, Any]]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO player_rolling (player_id, season_id, last_n, games, goals, assists, points,
+                                    shots, toi_seconds, last_game_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (player_id, season_id, last_n) DO UPDATE SET
+            games = excluded.games, goals = excluded.goals, assists = excluded.assists,
+            points = excluded.points, shots = excluded.shots, toi_seconds = excluded.toi_seconds,
+            last_game_id = excluded.last_game_id
+        """,
+        [(player_id, season_id, a["last_n"], a["games"], *(a[k] for k in SUMMED), a["last_game_id"])
+         for a in rolling.values()],
+    )
+
+
+def rebuild_rolling(conn: sqlite3.Connection, player_id: int, season_id: int) -> None:
+    """Renumber a player's games by (gameDate, gameId) and recompute the rolling rows.
+
+    O(games in the season); only needed when a game arrives out of order.
+    """
+    player_id, season_id = int(player_id), int(season_id)
+    rows = conn.execute(
+        f"SELECT seq, game_id, game_date, {', '.join(SUMMED)} FROM player_games WHERE player_id = ? AND season_id = ?",
+        (player_id, season_id),
+    ).fetchall()
+    rows.sort(key=_game_order)
+    # negate first so the renumbering never collides with the primary key
+    conn.execute("UPDATE player_games SET seq = -seq WHERE player_id = ? AND season_id = ?", (player_id, season_id))
+    conn.executemany(
+        "UPDATE player_games SET seq = ? WHERE player_id = ? AND season_id = ? AND seq = ?",
+        [(i, player_id, season_id, -r["seq"]) for i, r in enumerate(rows, 1)],
+    )
+    rolling = {}
+    for last_n in (SEASON,) + ROLLING_WINDOWS:
+        window = rows[-last_n:] if last_n else rows
+        agg = _empty(last_n)
+        agg["games"] = len(window)
+        agg["last_game_id"] = window[-1]["game_id"] if window else None
+        for k in SUMMED:
+            agg[k] = sum(r[k] or 0 for r in window)
+        rolling[last_n] = agg
+    _save_rolling(conn, player_id, season_id, rolling)
+
+
+def _with_rates(row: Dict[str, Any]) -> Dict[str, Any]:
+    games = row.get("games") or 0
+    for k in SUMMED:
+        row[f"{k}PerGame"] = round(row[k] / games, 3) if games else None
+    return row
+
+
+def window_totals(conn: sqlite3.Connection, player_id: int, season_id: int, last_n: int) -> Dict[str, Any]:
+    """Sums and per-game rates over a player's last `last_n` games (0: season)."""
+    last_n = max(0, int(last_n))
+    if last_n == SEASON or last_n in ROLLING_WINDOWS:
+        row = load_rolling(conn, int(player_id), int(season_id))[last_n]
+        return _with_rates(row)
+    total = conn.execute(
+        "SELECT games FROM player_rolling WHERE player_id = ? AND season_id = ? AND last_n = ?",
+        (int(player_id), int(season_id), SEASON),
+    ).fetchone()
+    count = total[0] if total else 0
+    cols = ", ".join(f"COALESCE(SUM({k}), 0) AS {k}" for k in SUMMED)
+    r = conn.execute(
+        f"SELECT COUNT(*) AS games, {cols} FROM player_games WHERE player_id = ? AND season_id = ? AND seq > ?",
+        (int(player_id), int(season_id), count - last_n),
+    ).fetchone()
+    return _with_rates({"last_n": last_n, **{k: r[k] for k in ("games",) + SUMMED}})
+
+
+def leaders(conn: sqlite3.Connection, season_id: int, last_n: int = 10, stat: str = "points", limit: int = 10,
+            min_games: int = 1) -> List[Dict[str, Any]]:
+    """Players with the highest `stat` summed over their last `last_n` games.
+
+    `last_n` must be one of `ROLLING_WINDOWS` or `SEASON`. Each result has the
+    rolling sums, per-game rates and, under "player", the stored season record
+    when there is one.
+    """
+    if stat not in SORTABLE:
+        raise ValueError(f"unknown stat {stat!r}")
+    if last_n != SEASON and last_n not in ROLLING_WINDOWS:
+        raise ValueError(f"last_n must be one of {(SEASON,) + ROLLING_WINDOWS}")
+    rows = conn.execute(
+        f"""
+        SELECT r.*, ps.data AS player FROM player_rolling r
+        LEFT JOIN player_seasons ps ON ps.player_id = r.player_id AND ps.season_id = r.season_id
+        WHERE r.season_id = ? AND r.last_n = ? AND r.games >= ?
+        ORDER BY r.{stat} DESC, r.player_id
+        LIMIT ?
+        """,
+        (int(season_id), int(last_n), int(min_games), int(limit)),
+    )
+    out = []
+    for r in rows:
+        row = {k: r[k] for k in ("player_id", "last_n", "games") + SUMMED}
+        row["player"] = json.loads(r["player"]) if r["player"] else None
+        out.append(_with_rates(row))
+    return out
+
+
+def recent_games(conn: sqlite3.Connection, player_id: int, season_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """A player's stored game-log entries, most recent first."""
+    sql = "SELECT data FROM player_games WHERE player_id = ? AND season_id = ? ORDER BY seq DESC"
+    params: List[Any] = [int(player_id), int(season_id)]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return [json.loads(r[0]) for r in conn.execute(sql, params)]
@@ -0,0 +1,345 @@
+"""Multi-season history store (SQLite).
+
+The JSON files only hold the latest collection. The collector also upserts
+every run into `stats/history.sqlite3` (override with OKEY_HISTORY_DB):
+
+  standings       one row per (snapshot_date, team): the standings as they
+                  were on that date
+  player_seasons  one row per (player_id, season_id): the latest totals
+                  collected for that player and season
+  player_games    one row per game a player appeared in (see stats/gamelog.py)
+  player_rolling  running sums over each player's last N games, kept up to
+                  date as games are ingested
+  box_scores      one row per final game collected from its box score
+  sync_state      small key/value table for collector watermarks
+
+Both tables keep the full record as JSON in `data` next to a few indexed
+columns, so "standings on date X" and "career of player Y" are index lookups
+instead of re-collections.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from datetime import date as _date
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_DB = os.environ.get("OKEY_HISTORY_DB") or os.path.join(
+    os.environ.get("OKEY_STATS_DIR") or os.path.dirname(os.path.abspath(__file__)), "history.sqlite3"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS standings (
+    snapshot_date TEXT NOT NULL,
+    team          TEXT NOT NULL,
+    season_id     INTEGER,
+    conference    TEXT,
+    division      TEXT,
+    games_played  INTEGER,
+    points        INTEGER,
+    point_pctg    REAL,
+    data          TEXT NOT NULL,
+    PRIMARY KEY (snapshot_date, team)
+);
+CREATE INDEX IF NOT EXISTS standings_team_date ON standings (team, snapshot_date);
+CREATE INDEX IF NOT EXISTS standings_season_date ON standings (season_id, snapshot_date);
+
+CREATE TABLE IF NOT EXISTS player_seasons (
+    player_id    INTEGER NOT NULL,
+    season_id    INTEGER NOT NULL,
+    name         TEXT,
+    name_key     TEXT,
+    team         TEXT,
+    position     TEXT,
+    games_played INTEGER,
+    goals        INTEGER,
+    assists      INTEGER,
+    points       INTEGER,
+    collected_at TEXT,
+    data         TEXT NOT NULL,
+    PRIMARY KEY (player_id, season_id)
+);
+CREATE INDEX IF NOT EXISTS player_seasons_key ON player_seasons (name_key, season_id);
+CREATE INDEX IF NOT EXISTS player_seasons_season_points ON player_seasons (season_id, points DESC);
+CREATE INDEX IF NOT EXISTS player_seasons_season_team ON player_seasons (season_id, team);
+
+CREATE TABLE IF NOT EXISTS player_games (
+    player_id   INTEGER NOT NULL,
+    season_id   INTEGER NOT NULL,
+    seq         INTEGER NOT NULL,
+    game_id     INTEGER NOT NULL,
+    game_date   TEXT,
+    team        TEXT,
+    opponent    TEXT,
+    goals       INTEGER,
+    assists     INTEGER,
+    points      INTEGER,
+    shots       INTEGER,
+    toi_seconds INTEGER,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (player_id, season_id, seq),
+    UNIQUE (player_id, game_id)
+);
+
+CREATE TABLE IF NOT EXISTS player_rolling (
+    player_id    INTEGER NOT NULL,
+    season_id    INTEGER NOT NULL,
+    last_n       INTEGER NOT NULL,
+    games        INTEGER NOT NULL,
+    goals        INTEGER NOT NULL,
+    assists      INTEGER NOT NULL,
+    points       INTEGER NOT NULL,
+    shots        INTEGER NOT NULL,
+    toi_seconds  INTEGER NOT NULL,
+    last_game_id INTEGER,
+    PRIMARY KEY (player_id, season_id, last_n)
+);
+CREATE INDEX IF NOT EXISTS player_rolling_points ON player_rolling (season_id, last_n, points DESC);
+
+CREATE TABLE IF NOT EXISTS box_scores (
+    game_id      INTEGER PRIMARY KEY,
+    season_id    INTEGER,
+    game_date    TEXT,
+    home         TEXT,
+    away         TEXT,
+    home_score   INTEGER,
+    away_score   INTEGER,
+    collected_at TEXT,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS box_scores_date ON box_scores (game_date);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def connect(path: Optional[str] = None, readonly: bool = False) -> Optional[sqlite3.Connection]:
+    """Open the history database.
+
+    Writers get the schema created and WAL enabled so readers are never
+    blocked by a collector run. Read-only connections return None when the
+    database does not exist yet.
+    """
+    path = path or DEFAULT_DB
+    if readonly:
+        if not os.path.exists(path):
+            return None
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def version(path: Optional[str] = None) -> tuple:
+    """Cheap change token for the database: (mtime_ns, size) of it and its WAL."""
+    path = path or DEFAULT_DB
+    out = []
+    for p in (path, path + "-wal"):
+        try:
+            st = os.stat(p)
+            out.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+
+def _int(v: Any) -> Optional[int]:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def upsert_standings(conn: sqlite3.Connection, teams: Iterable[Dict[str, Any]], snapshot_date: Optional[str] = None) -> int:
+    """Store one standings snapshot; returns the number of rows written.
+
+    The snapshot date defaults to each record's own `date` field, then today.
+    """
+    today = _date.today().isoformat()
+    rows = []
+    for t in teams:
+        if not isinstance(t, dict) or not t.get("abrev"):
+            continue
+        rows.append((
+            snapshot_date or t.get("date") or today,
+            t.get("abrev"),
+            _int(t.get("seasonId")),
+            t.get("conferenceAbbrev") or t.get("conference"),
+            t.get("divisionAbbrev") or t.get("division"),
+            _int(t.get("gamesPlayed")),
+            _int(t.get("points")),
+            t.get("pointPctg"),
+            json.dumps(t, ensure_ascii=False),
+        ))
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO standings (snapshot_date, team, season_id, conference, division,
+                                   games_played, points, point_pctg, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (snapshot_date, team) DO UPDATE SET
+                season_id = excluded.season_id, conference = excluded.conference,
+                division = excluded.division, games_played = excluded.games_played,
+                points = excluded.points, point_pctg = excluded.point_pctg, data = excluded.data
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def upsert_player_seasons(conn: sqlite3.Connection, players: Iterable[Dict[str, Any]], season_id: Any = None,
+                          collected_at: Optional[str] = None, replace: bool = True) -> int:
+    """Store per-season player totals; returns the number of rows given.
+
+    The season defaults to each record's `season` field. With `replace`
+    False, rows already stored are left alone (used to backfill past seasons).
+    """
+    collected_at = collected_at or _date.today().isoformat()
+    rows = []
+    for p in players:
+        if not isinstance(p, dict) or p.get("id") is None:
+            continue
+        season = _int(season_id if season_id is not None else p.get("season"))
+        if season is None:
+            continue
+        rows.append((
+            _int(p.get("id")),
+            season,
+            p.get("name"),
+            p.get("nameKey"),
+            p.get("team"),
+            p.get("position"),
+            _int(p.get("gamesPlayed")),
+            _int(p.get("goals")),
+            _int(p.get("assists")),
+            _int(p.get("points")),
+            collected_at,
+            json.dumps(p, ensure_ascii=False),
+        ))
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO player_seasons (player_id, season_id, name, name_key, team, position,
+                                        games_played, goals, assists, points, collected_at, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (player_id, season_id) DO """ + (
+                """UPDATE SET
+                name = excluded.name, name_key = excluded.name_key, team = excluded.team,
+                position = excluded.position, games_played = excluded.games_played,
+                goals = excluded.goals, assists = excluded.assists, points = excluded.points,
+                collected_at = excluded.collected_at, data = excluded.data
+            """ if replace else "NOTHING"),
+            rows,
+        )
+    return len(rows)
+
+
+def get_state(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state(conn: sqlite3.Connection, key: str, value: Any) -> None:
+    with conn:
+        conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, None if value is None else str(value)),
+        )
+
+
+def known_box_scores(conn: sqlite3.Connection, game_ids: Iterable[Any]) -> set:
+    """The subset of `game_ids` whose box score is already stored."""
+    ids = [_int(g) for g in game_ids]
+    known = set()
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        known.update(r[0] for r in conn.execute(f"SELECT game_id FROM box_scores WHERE game_id IN ({marks})", chunk))
+    return known
+
+
+def store_box_score(conn: sqlite3.Connection, box: Dict[str, Any]) -> None:
+    """Insert or replace one box score (commits with the caller's transaction)."""
+    home = box.get("homeTeam") or {}
+    away = box.get("awayTeam") or {}
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO box_scores (game_id, season_id, game_date, home, away, home_score, away_score,
+                                           collected_at, data)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (_int(box.get("id")), _int(box.get("season")), box.get("gameDate"), home.get("abbrev"), away.get("abbrev"),
+         _int(home.get("score")), _int(away.get("score")), _date.today().isoformat(), json.dumps(box, ensure_ascii=False)),
+    )
+
+
+def seasons(conn: sqlite3.Connection) -> List[int]:
+    """Seasons with player data, newest first."""
+    return [r[0] for r in conn.execute("SELECT DISTINCT season_id FROM player_seasons ORDER BY season_id DESC")]
+
+
+def snapshot_dates(conn: sqlite3.Connection, season_id: Any = None) -> List[str]:
+    """Dates with a standings snapshot, oldest first."""
+    if season_id is None:
+        cur = conn.execute("SELECT DISTINCT snapshot_date FROM standings ORDER BY snapshot_date")
+    else:
+        cur = conn.execute("SELECT DISTINCT snapshot_date FROM standings WHERE season_id = ? ORDER BY snapshot_date", (_int(season_id),))
+    return [r[0] for r in cur]
+
+
+def snapshot_on(conn: sqlite3.Connection, day: Optional[str] = None) -> Optional[str]:
+    """Date of the latest standings snapshot on or before `day` (default: any)."""
+    if day is None:
+        row = conn.execute("SELECT MAX(snapshot_date) FROM standings").fetchone()
+    else:
+        row = conn.execute("SELECT MAX(snapshot_date) FROM standings WHERE snapshot_date <= ?", (day,)).fetchone()
+    return row[0] if row else None
+
+
+def standings_on(conn: sqlite3.Connection, day: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Standings as of `day` (YYYY-MM-DD): the latest snapshot on or before it."""
+    snapshot = snapshot_on(conn, day)
+    if snapshot is None:
+        return []
+    rows = conn.execute(
+        "SELECT data FROM standings WHERE snapshot_date = ? ORDER BY points DESC, point_pctg DESC",
+        (snapshot,),
+    )
+    return [json.loads(r[0]) for r in rows]
+
+
+def team_history(conn: sqlite3.Connection, team: str, season_id: Any = None) -> List[Dict[str, Any]]:
+    """Every stored standings snapshot of one team, oldest first."""
+    sql = "SELECT data FROM standings WHERE team = ?"
+    params: List[Any] = [str(team).upper()]
+    if season_id is not None:
+        sql += " AND season_id = ?"
+        params.append(_int(season_id))
+    rows = conn.execute(sql + " ORDER BY snapshot_date", params)
+    return [json.loads(r[0]) for r in rows]
+
+
+def career(conn: sqlite3.Connection, key: Any) -> List[Dict[str, Any]]:
+    """Season-by-season records of a player (by id or nameKey), oldest first."""
+    key = str(key)
+    if key.isdigit():
+        rows = conn.execute("SELECT data FROM player_seasons WHERE player_id = ? ORDER BY season_id", (int(key),))
+    else:
+        rows = conn.execute("SELECT data FROM player_seasons WHERE name_key = ? ORDER BY season_id", (key,))
+    return [json.loads(r[0]) for r in rows]
+
+
+def season_players(conn: sqlite3.Connection, season_id: Any) -> List[Dict[str, Any]]:
+    """All player records stored for one season, by points descending."""
+    rows = conn.execute(
+        "SELECT data FROM player_seasons WHERE season_id = ? ORDER BY points DESC",
+        (_int(season_id),),
+    )
+    return [json.loads(r[0]) for r in rows]
@@ -0,0 +1,134 @@
+"""Lookup and search index over the player list.
+
+`PlayerIndex` is built once per version of `playerStats.json` (see
+`stats.datastore.DataStore`) and answers:
+
+  - `get(key)`: O(1) lookup by numeric id or `nameKey` (accent-insensitive)
+  - `search(q)`: substring search over names and nameKeys using an n-gram
+    inverted index, so a keystroke only touches the players sharing every
+    n-gram of the query instead of scanning the whole list.
+
+Names are normalized with `normalize`, which lowercases and strips accents,
+so "stutzle" finds "Tim Stützle".
+"""
+from __future__ import annotations
+
+import unicodedata
+from typing import Any, Dict, List, Optional, Set
+
+NGRAM = 3
+
+
+def normalize(text: Any) -> str:
+    """Lowercase `text` and fold accented characters to their ASCII base."""
+    if text is None:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def _grams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class PlayerIndex:
+    """Prebuilt lookups over a list of player dicts.
+
+    `players` keeps the original file order; `by_points` is the same list
+    sorted by points descending, as shown on the players page.
+    """
+
+    def __init__(self, players: Any):
+        if not isinstance(players, list):
+            players = []
+        self.players: List[Dict[str, Any]] = [p for p in players if isinstance(p, dict)]
+
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_key: Dict[str, Dict[str, Any]] = {}
+        self._id_pos: Dict[str, int] = {}
+        self._haystacks: List[tuple] = []
+        # one inverted index per gram length so 1- and 2-character queries
+        # are indexed as well
+        self._grams: List[Dict[str, Set[int]]] = [{} for _ in range(NGRAM)]
+
+        for pos, p in enumerate(self.players):
+            nid = p.get("id")
+            if nid is not None:
+                self.by_id.setdefault(str(nid), p)
+                self._id_pos.setdefault(str(nid), pos)
+            key = p.get("nameKey") or ""
+            if key:
+                self.by_key.setdefault(key, p)
+                self.by_key.setdefault(normalize(key), p)
+
+            hay = (normalize(p.get("name")), normalize(key))
+            self._haystacks.append(hay)
+            for n in range(1, NGRAM + 1):
+                table = self._grams[n - 1]
+                for text in hay:
+                    for g in _grams(text, n):
+                        table.setdefault(g, set()).add(pos)
+
+        order = sorted(range(len(self.players)), key=lambda i: self.players[i].get("points") or 0, reverse=True)
+        self._rank = [0] * len(order)
+        for rank, pos in enumerate(order):
+            self._rank[pos] = rank
+        self.by_points: List[Dict[str, Any]] = [self.players[i] for i in order]
+        self._analytics = None
+
+    @property
+    def analytics(self):
+        """`stats.analyst.StatsEngine` over these players, built on first use.
+
+        It lives as long as this index, i.e. until the dataset reloads.
+        """
+        if self._analytics is None:
+            from stats.analyst import StatsEngine
+
+            self._analytics = StatsEngine(self.players)
+        return self._analytics
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        """Return the player whose id or nameKey equals `key`, or None."""
+        key = str(key)
+        return self.by_id.get(key) or self.by_key.get(key) or self.by_key.get(normalize(key))
+
+    def _candidates(self, q: str) -> Set[int]:
+        n = min(len(q), NGRAM)
+        table = self._grams[n - 1]
+        postings = []
+        for g in _grams(q, n):
+            hits = table.get(g)
+            if not hits:
+                return set()
+            postings.append(hits)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for hits in postings[1:]:
+            result &= hits
+            if not result:
+                break
+        return result
+
+    def search(self, q: str, limit: Optional[int] = None, by_points: bool = False) -> List[Dict[str, Any]]:
+        """Return players whose name or nameKey contains `q` or whose id is `q`.
+
+        Results keep file order unless `by_points` is set. `limit` caps the
+        number of results.
+        """
+        q = normalize(q)
+        if not q:
+            return []
+        positions = self._candidates(q)
+        # n-grams only narrow the candidates; confirm the full substring
+        matches = [i for i in positions if any(q in text for text in self._haystacks[i])]
+        exact = self._id_pos.get(q)
+        if exact is not None and exact not in matches:
+            matches.append(exact)
+        matches.sort(key=self._rank.__getitem__ if by_points else None)
+        if limit is not None:
+            matches = matches[:limit]
+        return [self.players[i] for i in matches]
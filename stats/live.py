@@ -0,0 +1,138 @@
+"""Live game state and deltas for in-game polling.
+
+The collector's live mode (`collector.py --live`) polls the box score of each
+game in progress and reduces it with `game_state` to a small dict: state,
+period, clock, score and shots per team, and the goals/assists/shots of every
+player who has a point or a shot. `LiveLog.update` diffs the new states
+against the last known ones and appends one event per changed game, holding
+only the fields that changed.
+
+The log is written to `stats/live.json`:
+
+    {"seq": last event number, "updated": iso time,
+     "games": {gameId: state}, "events": [{"seq", "gameId", ...}, ...]}
+
+with at most MAX_EVENTS events kept. The app's `/live/events` stream sends a
+client the events after the last one it saw, or the full `games` when it is
+too far behind (see `events_after`).
+"""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+LIVE_STATES = ("LIVE", "CRIT")
+FINAL_STATES = ("OFF", "FINAL")
+MAX_EVENTS = 500
+
+PLAYER_FIELDS = ("goals", "assists", "sog")
+
+
+def _int(v: Any) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _team(t: Dict[str, Any]) -> Dict[str, Any]:
+    return {"abbrev": t.get("abbrev"), "score": _int(t.get("score")), "sog": _int(t.get("sog"))}
+
+
+def game_state(box: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact live state of a game from its `/gamecenter/<id>/boxscore`."""
+    clock = box.get("clock") or {}
+    period = box.get("periodDescriptor") or {}
+    players: Dict[str, Dict[str, int]] = {}
+    by_side = box.get("playerByGameStats") or {}
+    for side in ("awayTeam", "homeTeam"):
+        for group in ("forwards", "defense"):
+            for p in (by_side.get(side) or {}).get(group) or []:
+                line = {k: _int(p.get(k)) for k in PLAYER_FIELDS}
+                if any(line.values()) and p.get("playerId") is not None:
+                    players[str(p["playerId"])] = line
+    return {
+        "id": box.get("id"),
+        "gameState": box.get("gameState"),
+        "period": _int(period.get("number")),
+        "periodType": period.get("periodType"),
+        "clock": clock.get("timeRemaining"),
+        "intermission": bool(clock.get("inIntermission")),
+        "home": _team(box.get("homeTeam") or {}),
+        "away": _team(box.get("awayTeam") or {}),
+        "players": players,
+    }
+
+
+def diff_game(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of `new` that differ from `old`; empty when nothing changed."""
+    if not old:
+        return dict(new)
+    changes: Dict[str, Any] = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if key in ("home", "away"):
+            sub = {k: v for k, v in value.items() if (before or {}).get(k) != v}
+            if sub:
+                changes[key] = sub
+        elif key == "players":
+            sub = {pid: line for pid, line in value.items() if (before or {}).get(pid) != line}
+            if sub:
+                changes[key] = sub
+        elif before != value:
+            changes[key] = value
+    return changes
+
+
+class LiveLog:
+    """Last known game states plus a bounded log of delta events."""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data if isinstance(data, dict) else {}
+        self.seq: int = _int(data.get("seq"))
+        self.games: Dict[str, Dict[str, Any]] = dict(data.get("games") or {})
+        self.events: deque = deque(data.get("events") or [], maxlen=MAX_EVENTS)
+
+    def update(self, states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Record new game states; returns the events they produced."""
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        produced = []
+        for state in states:
+            gid = str(state.get("id"))
+            changes = diff_game(self.games.get(gid), state)
+            if not changes:
+                continue
+            self.games[gid] = state
+            self.seq += 1
+            event = {"seq": self.seq, "gameId": state.get("id"), "at": now, "changes": changes}
+            self.events.append(event)
+            produced.append(event)
+        return produced
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "games": self.games,
+            "events": list(self.events),
+        }
+
+
+def events_after(data: Any, seq: int) -> Optional[List[Dict[str, Any]]]:
+    """Events of a live.json payload newer than `seq`.
+
+    Returns None when events after `seq` were already dropped from the log
+    (or the log restarted), i.e. the client needs the full state again.
+    """
+    if not isinstance(data, dict):
+        return []
+    events = data.get("events") or []
+    last = _int(data.get("seq"))
+    if seq > last:
+        return None
+    if seq == last:
+        return []
+    if not events or events[0].get("seq", 0) > seq + 1:
+        return None
+    return [e for e in events if e.get("seq", 0) > seq]
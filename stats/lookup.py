@@ -0,0 +1,192 @@
+"""Precompiled lookup file for the command line (`okey.py`).
+
+Parsing the 2 MB `playerStats.json` costs more than everything else the CLI
+does, so the collector also writes `stats/lookup.idx`, which answers a
+player or team query by reading one record:
+
+    magic    b"OKEYLKP1\\n"
+    header   one JSON line: {"sources": {file: [mtime_ns, size]},
+                             "players": {key: [offset, length]},
+                             "teams": {key: [offset, length]},
+                             "names": [[search text, key], ...]}
+    records  one compact JSON object per player and team; offsets are
+             relative to the first byte after the header line
+
+Players are keyed by id, `nameKey` and their name with accents, spaces and
+punctuation removed (`key_for`), teams by abbreviation and common name. The
+file is stale once either stats file it was built from changes; `open_lookup`
+rebuilds it then (or when it is missing) so the CLI keeps working without
+the collector.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from stats.index import normalize
+
+MAGIC = b"OKEYLKP1\n"
+LOOKUP_NAME = "lookup.idx"
+SOURCES = ("playerStats.json", "teamsStats.json")
+
+# the scheduler rebuilds the file from more than one job thread
+_WRITE_LOCK = threading.Lock()
+
+
+def key_for(text: Any) -> str:
+    """Lookup key of a name or query: "Nick Suzuki" -> "nicksuzuki"."""
+    return "".join(c for c in normalize(text) if c.isalnum())
+
+
+def _source_versions(stats_dir: str) -> Dict[str, Optional[List[int]]]:
+    versions = {}
+    for name in SOURCES:
+        try:
+            st = os.stat(os.path.join(stats_dir, name))
+            versions[name] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            versions[name] = None
+    return versions
+
+
+def _load(path: str) -> List[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return []
+    return [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+
+
+def write_lookup(stats_dir: str, players: Optional[List[Dict[str, Any]]] = None,
+                 teams: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Build `<stats_dir>/lookup.idx`; lists not passed are read from disk.
+
+    Call it after the stats files are written: the file records their
+    versions to detect when it goes stale. The versions are taken before
+    either file is read, so a file replaced meanwhile makes the lookup look
+    stale rather than fresh.
+    """
+    with _WRITE_LOCK:
+        return _write_lookup(stats_dir, _source_versions(stats_dir), players, teams)
+
+
+def _write_lookup(stats_dir: str, sources: Dict[str, Optional[List[int]]],
+                  players: Optional[List[Dict[str, Any]]], teams: Optional[List[Dict[str, Any]]]) -> str:
+    if players is None:
+        players = _load(os.path.join(stats_dir, SOURCES[0]))
+    if teams is None:
+        teams = _load(os.path.join(stats_dir, SOURCES[1]))
+
+    body = bytearray()
+    player_keys: Dict[str, List[int]] = {}
+    team_keys: Dict[str, List[int]] = {}
+    names: List[List[str]] = []
+
+    def add(record, keys, table):
+        span = [len(body), 0]
+        body.extend(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        span[1] = len(body) - span[0]
+        for key in keys:
+            if key:
+                table.setdefault(key, span)
+        return span
+
+    for p in players:
+        primary = p.get("nameKey") or key_for(p.get("name")) or str(p.get("id") or "")
+        if not primary:
+            continue
+        add(p, (primary, key_for(primary), key_for(p.get("name")), str(p.get("id") or "")), player_keys)
+        names.append([normalize(p.get("name")), primary])
+    for t in teams:
+        abbr = t.get("abrev") or t.get("abbrev") or ""
+        add(t, (abbr.lower(), key_for(t.get("teamCommonName")), key_for(t.get("team"))), team_keys)
+
+    header = {
+        "sources": sources,
+        "players": player_keys,
+        "teams": team_keys,
+        "names": names,
+    }
+    path = os.path.join(stats_dir, LOOKUP_NAME)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        fh.write(b"\n")
+        fh.write(body)
+    os.replace(tmp, path)
+    return path
+
+
+class Lookup:
+    """Reader for a lookup file; records are read one at a time on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an okey lookup file")
+            header = json.loads(fh.readline())
+            self._base = fh.tell()
+        self.sources: Dict[str, Any] = header.get("sources") or {}
+        self._players: Dict[str, List[int]] = header.get("players") or {}
+        self._teams: Dict[str, List[int]] = header.get("teams") or {}
+        self._names: List[List[str]] = header.get("names") or []
+
+    def _read(self, span: List[int]) -> Dict[str, Any]:
+        with open(self.path, "rb") as fh:
+            fh.seek(self._base + span[0])
+            return json.loads(fh.read(span[1]))
+
+    def player(self, query: Any) -> Optional[Dict[str, Any]]:
+        """A player by id, nameKey or full name; None if there is no exact match."""
+        text = str(query).strip()
+        span = self._players.get(text) or self._players.get(key_for(text))
+        return self._read(span) if span else None
+
+    def team(self, query: Any) -> Optional[Dict[str, Any]]:
+        """A team by abbreviation ("MTL") or name ("Canadiens")."""
+        text = str(query).strip()
+        span = self._teams.get(text.lower()) or self._teams.get(key_for(text))
+        return self._read(span) if span else None
+
+    def search(self, query: Any, limit: int = 10) -> List[Tuple[str, str]]:
+        """(name, nameKey) of players whose name or key contains `query`."""
+        needle, compact = normalize(query), key_for(query)
+        if not compact:
+            return []
+        out = []
+        for name, key in self._names:
+            if needle in name or compact in key:
+                out.append((name, key))
+                if len(out) >= limit:
+                    break
+        return out
+
+    def stale(self, stats_dir: str) -> bool:
+        return _source_versions(stats_dir) != self.sources
+
+
+def open_lookup(stats_dir: str, rebuild: bool = True) -> Optional[Lookup]:
+    """Open `<stats_dir>/lookup.idx`, rebuilding it when missing or stale.
+
+    Returns None when there is nothing to build it from. If the stats
+    directory is not writable a stale file is still returned.
+    """
+    path = os.path.join(stats_dir, LOOKUP_NAME)
+    found = None
+    try:
+        found = Lookup(path)
+        if not found.stale(stats_dir):
+            return found
+    except (OSError, ValueError):
+        pass
+    if not rebuild or not any(_source_versions(stats_dir).values()):
+        return found
+    try:
+        return Lookup(write_lookup(stats_dir))
+    except OSError:
+        return found
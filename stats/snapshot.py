@@ -0,0 +1,237 @@
+"""Compact columnar snapshot of the stats files.
+
+The collector writes `playerStats.json` / `teamsStats.json` for humans and
+other tools, and alongside them a `.snap` file holding the same records as
+columns that can be memory-mapped and read without a parse step:
+
+    magic    8 bytes   b"OKEYSNP1"
+    metalen  uint32    length of the JSON header that follows
+    meta     JSON      {"n": records, "fields": [[name, kind, offset]...],
+                        "strings": [count, offsets_at, blob_at]}
+    columns  ...       one contiguous array per field, 8-byte aligned
+    strings  ...       uint32 offsets[count + 1] followed by a UTF-8 blob
+
+Field kinds:
+  i  int64, missing = INT64_MIN
+  f  float64, missing = NaN
+  s  uint32 index into the string table, MISSING / NONE sentinels
+  j  like `s`, but the string is JSON (lists, dicts, mixed types)
+
+Opening a snapshot only reads the small header. `numeric_column(name)`
+returns a zero-copy memoryview over the mapped file and `value(name, i)`
+decodes a single cell, so readers that need a few fields (headshot
+downloads, analytics) skip parsing the rest. `records()` rebuilds the list
+of dicts the JSON file contains.
+"""
+from __future__ import annotations
+
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Optional
+
+MAGIC = b"OKEYSNP1"
+SUFFIX = ".snap"
+
+INT_MISSING = -(2 ** 63)
+STR_MISSING = 0xFFFFFFFF
+STR_NONE = 0xFFFFFFFE
+
+_TYPECODES = {"i": "q", "f": "d", "s": "I", "j": "I"}
+_ABSENT = object()
+
+
+def snapshot_path(json_path: str) -> str:
+    """Return the snapshot file that sits next to `json_path`."""
+    return os.path.splitext(json_path)[0] + SUFFIX
+
+
+def _kind(values: List[Any]) -> str:
+    present = [v for v in values if v is not _ABSENT]
+    if present and all(type(v) is int for v in present):
+        return "i"
+    if present and all(type(v) in (int, float) for v in present):
+        return "f"
+    if all(v is None or isinstance(v, str) for v in present):
+        return "s"
+    return "j"
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def write_snapshot(records: List[Dict[str, Any]], path: str) -> None:
+    """Write `records` (a list of flat-ish dicts) to `path` atomically."""
+    records = [r for r in records if isinstance(r, dict)]
+    names: List[str] = []
+    seen = set()
+    for r in records:
+        for k in r:
+            if k not in seen:
+                seen.add(k)
+                names.append(k)
+
+    strings: List[bytes] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        idx = string_ids.get(text)
+        if idx is None:
+            idx = string_ids[text] = len(strings)
+            strings.append(text.encode("utf-8"))
+        return idx
+
+    columns = []
+    for name in names:
+        values = [r.get(name, _ABSENT) for r in records]
+        kind = _kind(values)
+        if kind == "i":
+            data = [INT_MISSING if v is _ABSENT else v for v in values]
+        elif kind == "f":
+            data = [math.nan if v is _ABSENT else float(v) for v in values]
+        elif kind == "s":
+            data = [STR_MISSING if v is _ABSENT else STR_NONE if v is None else intern(v) for v in values]
+        else:
+            data = [STR_MISSING if v is _ABSENT else intern(json.dumps(v, ensure_ascii=False, separators=(",", ":"))) for v in values]
+        columns.append((name, kind, struct.pack(f"<{len(data)}{_TYPECODES[kind]}", *data)))
+
+    offsets = [0]
+    for b in strings:
+        offsets.append(offsets[-1] + len(b))
+    string_offsets = struct.pack(f"<{len(offsets)}I", *offsets)
+    blob = b"".join(strings)
+
+    # header size depends on the offsets it contains; iterate until stable
+    meta_len = 0
+    while True:
+        pos = _align(len(MAGIC) + 4 + meta_len)
+        fields = []
+        for name, kind, payload in columns:
+            fields.append([name, kind, pos])
+            pos = _align(pos + len(payload))
+        offsets_at = pos
+        blob_at = offsets_at + len(string_offsets)
+        meta = json.dumps(
+            {"n": len(records), "fields": fields, "strings": [len(strings), offsets_at, blob_at]},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        if len(meta) == meta_len:
+            break
+        meta_len = len(meta)
+
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(struct.pack("<I", len(meta)))
+        fh.write(meta)
+        for (_, _, payload), (_, _, at) in zip(columns, fields):
+            fh.write(b"\0" * (at - fh.tell()))
+            fh.write(payload)
+        fh.write(b"\0" * (offsets_at - fh.tell()))
+        fh.write(string_offsets)
+        fh.write(blob)
+    os.replace(tmp, path)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an okey snapshot")
+        (meta_len,) = struct.unpack_from("<I", buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        meta = json.loads(bytes(buf[start:start + meta_len]))
+        self.n: int = meta["n"]
+        self.kinds: Dict[str, str] = {}
+        self._columns: Dict[str, memoryview] = {}
+        for name, kind, at in meta["fields"]:
+            code = _TYPECODES[kind]
+            size = struct.calcsize(code) * self.n
+            self.kinds[name] = kind
+            self._columns[name] = buf[at:at + size].cast(code)
+        count, offsets_at, blob_at = meta["strings"]
+        self._offsets = buf[offsets_at:offsets_at + 4 * (count + 1)].cast("I")
+        self._blob = buf[blob_at:blob_at + (self._offsets[count] if count else 0)]
+        self._strings: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def _string(self, idx: int) -> str:
+        s = self._strings.get(idx)
+        if s is None:
+            s = self._strings[idx] = str(self._blob[self._offsets[idx]:self._offsets[idx + 1]], "utf-8")
+        return s
+
+    def numeric_column(self, name: str) -> Optional[memoryview]:
+        """Zero-copy int64/float64 view of a numeric field, or None."""
+        if self.kinds.get(name) not in ("i", "f"):
+            return None
+        return self._columns[name]
+
+    def value(self, name: str, i: int, default: Any = None) -> Any:
+        kind = self.kinds.get(name)
+        if kind is None:
+            return default
+        raw = self._columns[name][i]
+        if kind == "i":
+            return default if raw == INT_MISSING else raw
+        if kind == "f":
+            return default if math.isnan(raw) else raw
+        if raw == STR_MISSING:
+            return default
+        if raw == STR_NONE:
+            return None
+        text = self._string(raw)
+        return json.loads(text) if kind == "j" else text
+
+    def column(self, name: str) -> List[Any]:
+        """Decoded values of one field; missing values are None."""
+        return [self.value(name, i) for i in range(self.n)]
+
+    def record(self, i: int) -> Dict[str, Any]:
+        out = {}
+        for name in self._columns:
+            v = self.value(name, i, _ABSENT)
+            if v is not _ABSENT:
+                out[name] = v
+        return out
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [self.record(i) for i in range(self.n)]
+
+    def close(self) -> None:
+        self._columns.clear()
+        self._offsets.release()
+        self._blob.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # a caller still holds a numeric_column view
+            pass
+
+
+def open_snapshot(json_path: str) -> Optional[Snapshot]:
+    """Open the snapshot for `json_path` if it exists and is not older."""
+    snap = snapshot_path(json_path)
+    try:
+        if os.path.getmtime(snap) < os.path.getmtime(json_path):
+            return None
+        return Snapshot(snap)
+    except (OSError, ValueError):
+        return None
+